@@ -20,10 +20,19 @@ import asyncio
 import tornado.autoreload
 import tornado.httpserver
 import tornado.ioloop
+import tornado.netutil
 import uvloop
 from tornado.platform.asyncio import AsyncIOMainLoop
 
 from api.routes import make_app
+from api.workers import (
+    WorkerMetrics,
+    WorkerSupervisor,
+    drain_server,
+    get_process_count,
+    signal_worker_ready,
+    warm_worker_caches,
+)
 from common.lib.plugins import fluent_bit, get_plugin_by_name
 
 log = config.get_logger(__name__)
@@ -56,35 +65,105 @@ def main():
     return app
 
 
-if config.get("_global_.tornado.uvloop", True):
-    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
-AsyncIOMainLoop().install()
-app = main()
-if config.get("_global_.elastic_apn.enabled"):
-    from elasticapm.contrib.tornado import ElasticAPM
-
-    app.settings["ELASTIC_APM"] = {
-        "SERVICE_NAME": config.get("_global_.elastic_apn.service_name", "cloudumi"),
-        "SECRET_TOKEN": config.get("_global_.elastic_apn.secret_token"),
-        "SERVER_URL": config.get("_global_.elastic_apn.server_url"),
-    }
-    apm = ElasticAPM(app)
+def create_app():
+    # The event loop must be created after forking so each worker gets its own
+    if config.get("_global_.tornado.uvloop", True):
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    AsyncIOMainLoop().install()
+    app = main()
+    if config.get("_global_.elastic_apn.enabled"):
+        from elasticapm.contrib.tornado import ElasticAPM
+
+        app.settings["ELASTIC_APM"] = {
+            "SERVICE_NAME": config.get("_global_.elastic_apn.service_name", "cloudumi"),
+            "SECRET_TOKEN": config.get("_global_.elastic_apn.secret_token"),
+            "SERVER_URL": config.get("_global_.elastic_apn.server_url"),
+        }
+        ElasticAPM(app)
+    return app
 
 
-async def shutdown(signal, loop):
+async def shutdown(signal, loop, server=None):
     """Cleanup tasks tied to the service's shutdown."""
     log.info(f"Received exit signal {signal.name}...")
+    if server:
+        log.info("Draining in-flight requests")
+        await drain_server(server)
     log.info("Closing database connections")
     tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
 
     [task.cancel() for task in tasks]
 
     log.info(f"Cancelling {len(tasks)} outstanding tasks")
-    await asyncio.gather(*tasks)
+    await asyncio.gather(*tasks, return_exceptions=True)
     log.info("Flushing metrics")
     loop.stop()
 
 
+def stop_profiler():
+    if configured_profiler:
+        if configured_profiler == "pprofile":
+            profiler.disable()
+            with open("/tmp/noq_profile.pprof", "w") as f:
+                profiler.callgrind(f)
+        if configured_profiler == "memray":
+            profiler.__exit__(None, None, None)
+        if configured_profiler == "yappi":
+            yappi.stop()
+            yappi.get_func_stats().print_all()
+            yappi.get_thread_stats().print_all()
+            stats = yappi.get_func_stats()
+            stats.save("/tmp/yappi.callgrind", type="callgrind")
+            print("Saved callgrind data to /tmp/yappi.callgrind")
+
+
+def serve_worker(worker_id: int, ready_fd: int):
+    """Runs a single API worker in prefork mode.
+
+    The worker binds its own socket with SO_REUSEPORT, warms its caches and then signals the master it is ready.
+    """
+    stats = get_plugin_by_name(
+        config.get("_global_.plugins.metrics", "cmsaas_metrics")
+    )()
+    port = config.get("_global_.tornado.port", 8092)
+    app = create_app()
+    worker_metrics = WorkerMetrics(worker_id, get_process_count(), stats)
+    worker_metrics.install(app)
+
+    server = tornado.httpserver.HTTPServer(app)
+    loop = asyncio.get_event_loop()
+    if config.get("_global_.tornado.warm_caches", True):
+        loop.run_until_complete(warm_worker_caches())
+
+    server.add_sockets(
+        tornado.netutil.bind_sockets(
+            port, address=config.get("_global_.tornado.address"), reuse_port=True
+        )
+    )
+    worker_metrics.start()
+    stats.count("tornado.worker.start", tags=worker_metrics.tags)
+    log.debug(
+        {
+            "message": "Worker started",
+            "port": port,
+            "worker_id": worker_id,
+            "pid": os.getpid(),
+        }
+    )
+    signal_worker_ready(ready_fd)
+
+    for s in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(
+            s, lambda s=s: asyncio.create_task(shutdown(s, loop, server))
+        )
+    try:
+        loop.run_forever()
+    finally:
+        worker_metrics.stop()
+        loop.close()
+        log.info("Successfully shutdown the worker.", worker_id=worker_id)
+
+
 def init():
     stats = get_plugin_by_name(
         config.get("_global_.plugins.metrics", "cmsaas_metrics")
@@ -93,12 +172,31 @@ def init():
         port = config.get("_global_.tornado.port", 8092)
         stats.count("tornado.start")
 
+        process_count = get_process_count()
+        if process_count > 1:
+            log.debug(
+                {
+                    "message": "Starting server in prefork mode",
+                    "port": port,
+                    "process_count": process_count,
+                }
+            )
+            fluent_bit.add_fluent_bit_service()
+            try:
+                WorkerSupervisor(process_count, serve_worker).run()
+            finally:
+                fluent_bit.remove_fluent_bit_service()
+                stop_profiler()
+                log.info("Successfully shutdown the service.")
+            return
+
+        app = create_app()
         server = tornado.httpserver.HTTPServer(app)
 
         if port:
             server.bind(port, address=config.get("_global_.tornado.address"))
 
-        server.start()  # forks one process per cpu
+        server.start()
 
         log.debug({"message": "Server started", "port": port})
         signals = (signal.SIGHUP, signal.SIGTERM, signal.SIGINT)
@@ -113,20 +211,7 @@ def init():
         finally:
             loop.close()
             fluent_bit.remove_fluent_bit_service()
-            if configured_profiler:
-                if configured_profiler == "pprofile":
-                    profiler.disable()
-                    with open("/tmp/noq_profile.pprof", "w") as f:
-                        profiler.callgrind(f)
-                if configured_profiler == "memray":
-                    profiler.__exit__(None, None, None)
-                if configured_profiler == "yappi":
-                    yappi.stop()
-                    yappi.get_func_stats().print_all()
-                    yappi.get_thread_stats().print_all()
-                    stats = yappi.get_func_stats()
-                    stats.save("/tmp/yappi.callgrind", type="callgrind")
-                    print("Saved callgrind data to /tmp/yappi.callgrind")
+            stop_profiler()
             log.info("Successfully shutdown the service.")
 
 
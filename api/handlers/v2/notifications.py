@@ -146,7 +146,6 @@ class NotificationsHandler(BaseAPIV2Handler):
                     self.groups,
                     tenant,
                     max_notifications,
-                    force_refresh=True,
                 )
             )
             notifications: List[
@@ -4,13 +4,14 @@ from datetime import datetime, timedelta
 import sentry_sdk
 from policy_sentry.util.arns import parse_arn
 
-import common.lib.noq_json as json
 from common.aws.utils import ResourceSummary, get_url_for_resource
 from common.config import config
 from common.exceptions.exceptions import MustBeFte, ResourceNotFound
 from common.handlers.base import BaseAPIV2Handler, BaseMtlsHandler
 from common.lib.account_indexers import get_account_id_to_name_mapping
+from common.lib.asyncio import aio_wrapper
 from common.lib.auth import can_admin_policies, get_accounts_user_can_view_resources_for
+from common.lib.aws.resource_errors import get_s3_errors_for_arn
 from common.lib.aws.utils import fetch_resource_details
 from common.lib.cache import retrieve_json_data_from_redis_or_s3
 from common.lib.plugins import get_plugin_by_name
@@ -27,7 +28,6 @@ class ResourceDetailHandler(BaseAPIV2Handler):
         if not self.user:
             return
         tenant = self.ctx.tenant
-        red = await RedisHandler().redis(tenant)
         if (
             config.get_tenant_specific_key(
                 "policy_editor.disallow_contractors", tenant, True
@@ -121,19 +121,12 @@ class ResourceDetailHandler(BaseAPIV2Handler):
         s3_query_url = None
         if resource_type == "s3":
             s3_query_url = config.get_tenant_specific_key("s3.bucket_query_url", tenant)
-        all_s3_errors = None
+        s3_errors = []
         if s3_query_url:
             s3_query_url = s3_query_url.format(
                 yesterday=yesterday, bucket_name=f"'{resource_name}'"
             )
-            s3_error_topic = config.get_tenant_specific_key(
-                "redis.s3_errors", tenant, f"{tenant}_S3_ERRORS"
-            )
-            all_s3_errors = red.get(s3_error_topic)
-
-        s3_errors = []
-        if all_s3_errors:
-            s3_errors = json.loads(all_s3_errors).get(arn, [])
+            s3_errors = await aio_wrapper(get_s3_errors_for_arn, tenant, arn)
 
         account_ids_to_name = await get_account_id_to_name_mapping(tenant)
         # TODO(ccastrapel/psanders): Make a Swagger spec for this
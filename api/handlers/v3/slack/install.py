@@ -12,12 +12,11 @@ from tornado.httputil import HTTPServerRequest
 from common.config import config
 from common.handlers.base import BaseAdminHandler, TornadoRequestHandler
 from common.lib.auth import is_tenant_admin
-from common.lib.slack.app import TenantSlackApp
+from common.lib.slack.app import TenantSlackAppRegistry
 from common.lib.slack.models import (
     SlackTenantInstallRelationship,
     TenantOauthRelationship,
     get_slack_bot,
-    get_tenant_from_team_id,
 )
 from common.lib.web import handle_generic_error_response
 from common.models import WebResponse
@@ -70,15 +69,14 @@ class AsyncSlackEventsHandler(TornadoRequestHandler):
 
     async def post(self):
         if self.slack_team_id:
-            tenant = await get_tenant_from_team_id(self.slack_team_id)
-            if tenant:
-                self.tenant = tenant.name
-                self.slack_app = await TenantSlackApp(
+            tenant_name = await TenantSlackAppRegistry.get_tenant_name(
+                self.slack_team_id
+            )
+            if tenant_name:
+                self.tenant = tenant_name
+                self.slack_app = await TenantSlackAppRegistry.get_slack_app(
                     self.tenant, self.enterprise_id, self.slack_team_id, self.app_id
-                ).get_slack_app()
-                # self.slack_app = await get_slack_app_for_tenant(
-                #     self.tenant, self.enterprise_id, self.slack_team_id, self.app_id
-                # )
+                )
         if self.slack_app:
             bolt_resp: BoltResponse = await self.slack_app.async_dispatch(
                 to_async_bolt_request(self.request)
@@ -179,6 +177,7 @@ class AsyncSlackHandler(BaseAdminHandler):
         tenant_install_rel = await SlackTenantInstallRelationship.get_by_tenant(tenant)
         if tenant_install_rel:
             await tenant_install_rel.delete()
+        TenantSlackAppRegistry.invalidate(tenant_name)
         self.write(WebResponse(success="success", status_code=200).dict())
 
     async def get(self, *args):
@@ -397,6 +396,7 @@ class AsyncSlackOAuthHandler(TornadoRequestHandler):
 
                 slack_bot = await get_slack_bot(team_id, app_id)
                 await SlackTenantInstallRelationship.create(tenant, slack_bot.id)
+                TenantSlackAppRegistry.invalidate(tenant.name)
                 return
         self.set_status(404)
 
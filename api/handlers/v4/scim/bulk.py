@@ -0,0 +1,87 @@
+import tornado.escape
+
+import common.lib.noq_json as json
+from common.config import config
+from common.handlers.base import ScimAuthHandler
+from common.lib.scim import ScimError, apply_bulk_operation, resolve_bulk_ids
+
+log = config.get_logger(__name__)
+
+# The routes of the SCIM resources, by the resourceType of the resource
+RESOURCE_ROUTES = {"User": "Users", "Group": "Group"}
+
+
+class ScimV2BulkHandler(ScimAuthHandler):
+    """Handler for the SCIM v2 Bulk API endpoint."""
+
+    async def post(self):
+        """Run the operations of a Bulk request in order."""
+        body = tornado.escape.json_decode(self.request.body)
+        operations = body.get("Operations", [])
+        max_operations = config.get("_global_.scim.bulk_max_operations", 1000)
+        if len(operations) > max_operations:
+            self.write_scim_error(
+                ScimError(413, f"The maximum number of operations is {max_operations}.")
+            )
+
+        fail_on_errors = body.get("failOnErrors")
+        bulk_ids = {}
+        error_count = 0
+        results = []
+        for operation in operations:
+            method = operation.get("method", "")
+            bulk_id = operation.get("bulkId")
+            result = {"method": method}
+            if bulk_id:
+                result["bulkId"] = bulk_id
+            try:
+                status, resource = await apply_bulk_operation(
+                    self.ctx.db_tenant,
+                    method,
+                    resolve_bulk_ids(operation.get("path", ""), bulk_ids),
+                    resolve_bulk_ids(operation.get("data"), bulk_ids),
+                )
+            except ScimError as err:
+                status = err.status
+                result["response"] = err.dict()
+            except Exception as err:
+                log.exception(
+                    {
+                        "message": "Error running SCIM bulk operation",
+                        "method": method,
+                        "path": operation.get("path"),
+                        "tenant": self.ctx.tenant,
+                        "error": str(err),
+                    }
+                )
+                status = 500
+                result["response"] = ScimError(
+                    500, "Unable to run the operation."
+                ).dict()
+            else:
+                if resource:
+                    resource_id = str(resource["id"])
+                    resource_route = RESOURCE_ROUTES[resource["meta"]["resourceType"]]
+                    result["location"] = (
+                        f"{self.request.protocol}://{self.request.host}"
+                        f"/api/v4/scim/v2/{resource_route}/{resource_id}"
+                    )
+                    if bulk_id:
+                        bulk_ids[bulk_id] = resource_id
+
+            result["status"] = str(status)
+            results.append(result)
+            if status >= 400:
+                error_count += 1
+                if fail_on_errors and error_count >= fail_on_errors:
+                    break
+
+        self.set_header("Content-Type", "application/json")
+        self.write(
+            json.dumps(
+                {
+                    "schemas": ["urn:ietf:params:scim:api:messages:2.0:BulkResponse"],
+                    "Operations": results,
+                }
+            )
+        )
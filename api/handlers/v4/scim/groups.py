@@ -5,8 +5,14 @@ import tornado.escape
 import common.lib.noq_json as json
 from common.groups.models import Group
 from common.handlers.base import ScimAuthHandler
+from common.lib.scim import (
+    ScimError,
+    create_group,
+    delete_group,
+    patch_group,
+    replace_group,
+)
 from common.models import WebResponse
-from common.users.models import User
 
 
 class ScimV2GroupsHandler(ScimAuthHandler):
@@ -54,37 +60,12 @@ class ScimV2GroupsHandler(ScimAuthHandler):
     async def post(self):
         """Create a new group."""
         body = tornado.escape.json_decode(self.request.body)
-        displayName = body["displayName"]
-        members = body.get("members", [])
-        users = []
-        for member in members:
-            user = await User.get_by_id(self.ctx.db_tenant, member["value"])
-            if not user:
-                self.set_status(404)
-                self.write(
-                    WebResponse(
-                        success="error",
-                        status_code=404,
-                        data={"message": "User not found"},
-                    ).dict(exclude_unset=True, exclude_none=True)
-                )
-                return
-            users.append(user)
-
         try:
-            group = Group(
-                name=displayName,
-                tenant=self.ctx.db_tenant,
-                users=users,
-                managed_by="SCIM",
-            )
-            await group.write()
-            group = await Group.get_by_id(self.ctx.db_tenant, group.id, get_users=True)
-            serialized_group = await group.serialize_for_scim()
-            self.set_header("Content-Type", "application/json")
-            self.write(json.dumps(serialized_group))
-        except Exception:
-            raise
+            serialized_group = await create_group(self.ctx.db_tenant, body)
+        except ScimError as err:
+            self.write_scim_error(err)
+        self.set_header("Content-Type", "application/json")
+        self.write(json.dumps(serialized_group))
 
 
 class ScimV2GroupHandler(ScimAuthHandler):
@@ -107,69 +88,29 @@ class ScimV2GroupHandler(ScimAuthHandler):
                 ).dict(exclude_unset=True, exclude_none=True)
             )
 
-    async def update(self, group_id):
-        """Update a group by ID."""
-        group = await Group.get_by_id(self.ctx.db_tenant, group_id, get_users=True)
-        if not group:
-            self.set_status(404)
-            self.write(
-                {
-                    "schemas": ["urn:ietf:params:scim:api:messages:2.0:Error"],
-                    "detail": "Group not found",
-                    "status": 404,
-                }
-            )
-            raise tornado.web.Finish()
-
+    async def put(self, group_id):
+        """Replace the members of a group by ID."""
         body = tornado.escape.json_decode(self.request.body)
-        displayName = body["displayName"]
-        group.name == displayName
-        members = body.get("members")
-        if not members:
-            members = body["Operations"][0]["value"]
-
-            if body["Operations"][0]["op"] == "replace":
-                raise tornado.web.Finish()
-
-        users = []
-        for member in members:
-            user = await User.get_by_id(self.ctx.db_tenant, member["value"])
-            if not user:
-                self.set_status(404)
-                self.write(
-                    {
-                        "schemas": ["urn:ietf:params:scim:api:messages:2.0:Error"],
-                        "detail": "User not found",
-                        "status": 404,
-                    }
-                )
-                raise tornado.web.Finish()
-            users.append(user)
-
-        group.users = users
-        group.managed_by = "SCIM"
-        await group.write()
-        serialized_group = await group.serialize_for_scim()
+        try:
+            serialized_group = await replace_group(self.ctx.db_tenant, group_id, body)
+        except ScimError as err:
+            self.write_scim_error(err)
         self.set_header("Content-Type", "application/json")
         self.write(json.dumps(serialized_group))
 
-    async def put(self, group_id):
-        await self.update(group_id)
-
     async def patch(self, group_id):
-        await self.update(group_id)
+        """Add, remove or replace the members of a group by ID."""
+        body = tornado.escape.json_decode(self.request.body)
+        try:
+            serialized_group = await patch_group(self.ctx.db_tenant, group_id, body)
+        except ScimError as err:
+            self.write_scim_error(err)
+        self.set_header("Content-Type", "application/json")
+        self.write(json.dumps(serialized_group))
 
     async def delete(self, group_id):
         """Delete a group by ID."""
-        group = await Group.get_by_id(self.ctx.db_tenant, group_id)
-        if not group:
-            self.set_status(404)
-            self.write(
-                {
-                    "schemas": ["urn:ietf:params:scim:api:messages:2.0:Error"],
-                    "detail": "Group not found",
-                    "status": 404,
-                }
-            )
-            raise tornado.web.Finish()
-        await group.delete()
+        try:
+            await delete_group(self.ctx.db_tenant, group_id)
+        except ScimError as err:
+            self.write_scim_error(err)
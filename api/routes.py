@@ -49,6 +49,7 @@ from api.handlers.v4.saml_settings.manage_saml_settings import (
     DownloadSAMLCertificateHandler,
     ManageSAMLSettingsCrudHandler,
 )
+from api.handlers.v4.scim.bulk import ScimV2BulkHandler
 from api.handlers.v4.scim.groups import ScimV2GroupHandler, ScimV2GroupsHandler
 from api.handlers.v4.scim.settings import ScimSettingsHandler
 from api.handlers.v4.scim.users import ScimV2UserHandler, ScimV2UsersHandler
@@ -614,6 +615,7 @@ def make_app(jwt_validator=None):
         (r"/api/v4/scim/v2/Users/(.*)", ScimV2UserHandler),
         (r"/api/v4/scim/v2/Groups/?", ScimV2GroupsHandler),
         (r"/api/v4/scim/v2/Group/(.*)", ScimV2GroupHandler),
+        (r"/api/v4/scim/v2/Bulk/?", ScimV2BulkHandler),
         (r"/api/v4/roles/access/?", ManageRoleAccessHandler),
         (r"/api/v4/roles", RolesHandlerV4),
         (r"/api/v4/resources/datatable/?", ResourcesDataTableHandler),
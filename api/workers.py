@@ -0,0 +1,324 @@
+"""Prefork mode for the API server.
+
+The master process forks `_global_.tornado.processes` workers. Each worker binds its own socket to the
+same port with SO_REUSEPORT so the kernel balances connections across them.
+
+Sending SIGHUP to the master performs a rolling restart, one worker at a time.
+The replacement worker binds and warms its caches before the worker it replaces is asked to drain and exit.
+Workers are forked from the master, which already imported the application, so a rolling restart only recycles
+the worker processes: it doesn't load new code or re-read settings the master loaded at startup.
+Deploying new code requires restarting the master.
+SIGTERM or SIGINT to the master drains and stops every worker.
+"""
+import asyncio
+import os
+import select
+import signal
+import sys
+import time
+from typing import Callable, Optional
+
+import tornado.web
+from tornado.ioloop import PeriodicCallback
+from tornado.log import access_log
+
+from common.config import config
+from common.lib.asyncio import NoqSemaphore, aio_wrapper
+
+log = config.get_logger(__name__)
+
+WORKER_READY_MESSAGE = b"1"
+
+
+def get_process_count() -> int:
+    """The number of API worker processes to run. 0 runs one per CPU."""
+    processes = int(config.get("_global_.tornado.processes", 1))
+    if processes <= 0:
+        processes = os.cpu_count() or 1
+    return processes
+
+
+class WorkerMetrics:
+    """Tracks the requests handled by a worker and periodically emits them.
+
+    Emitted with the worker id, process count and cpu count as tags,
+     so throughput can be compared as the number of workers is scaled against the available cores.
+    """
+
+    def __init__(self, worker_id: int, process_count: int, stats):
+        self.worker_id = worker_id
+        self.process_count = process_count
+        self.stats = stats
+        self.request_count = 0
+        self.request_time_ms = 0.0
+        self.last_emit = time.monotonic()
+        self._periodic_callback: Optional[PeriodicCallback] = None
+
+    @property
+    def tags(self) -> dict:
+        return {
+            "worker_id": str(self.worker_id),
+            "process_count": str(self.process_count),
+            "cpu_count": str(os.cpu_count()),
+        }
+
+    def install(self, app: tornado.web.Application):
+        """Wrap the application's request logging to record every completed request."""
+        log_function = app.settings.get("log_function")
+
+        def _log_request(handler: tornado.web.RequestHandler):
+            self.record(handler)
+            if log_function:
+                log_function(handler)
+                return
+
+            # Same as tornado.web.Application.log_request
+            if handler.get_status() < 400:
+                log_method = access_log.info
+            elif handler.get_status() < 500:
+                log_method = access_log.warning
+            else:
+                log_method = access_log.error
+            log_method(
+                "%d %s %.2fms",
+                handler.get_status(),
+                handler._request_summary(),
+                1000.0 * handler.request.request_time(),
+            )
+
+        app.settings["log_function"] = _log_request
+
+    def record(self, handler: tornado.web.RequestHandler):
+        self.request_count += 1
+        self.request_time_ms += 1000.0 * handler.request.request_time()
+
+    def emit(self):
+        now = time.monotonic()
+        elapsed = now - self.last_emit
+        request_count = self.request_count
+        request_time_ms = self.request_time_ms
+        self.request_count = 0
+        self.request_time_ms = 0.0
+        self.last_emit = now
+
+        self.stats.gauge(
+            "tornado.worker.requests_per_second",
+            request_count / elapsed if elapsed else 0,
+            tags=self.tags,
+        )
+        self.stats.gauge(
+            "tornado.worker.avg_request_ms",
+            request_time_ms / request_count if request_count else 0,
+            tags=self.tags,
+        )
+
+    def start(self):
+        interval = config.get("_global_.tornado.worker_metrics_interval", 60)
+        self._periodic_callback = PeriodicCallback(self.emit, interval * 1000)
+        self._periodic_callback.start()
+
+    def stop(self):
+        if self._periodic_callback:
+            self._periodic_callback.stop()
+            self.emit()
+
+
+async def _warm_tenant_caches(tenant: str):
+    from common.lib.account_indexers import get_account_id_to_name_mapping
+    from common.lib.cloud_credential_authorization_mapping import (
+        CredentialAuthorizationMapping,
+    )
+
+    try:
+        # Any tenant key loads the full tenant config into the worker's memory
+        await aio_wrapper(config.get_tenant_specific_key, "site_name", tenant)
+        await get_account_id_to_name_mapping(tenant)
+        await CredentialAuthorizationMapping().retrieve_credential_authorization_mapping(
+            tenant
+        )
+    except Exception as err:
+        log.warning(
+            {
+                "function": f"{__name__}.{sys._getframe().f_code.co_name}",
+                "message": "Unable to warm tenant caches",
+                "tenant": tenant,
+                "error": str(err),
+            }
+        )
+
+
+async def warm_worker_caches():
+    """Load the per-process caches used on most requests before the worker takes traffic.
+
+    Covers the tenant config, the account id to name mapping and the credential authorization mapping.
+    The tenants are read from `_global_.tornado.warm_cache_tenants`, defaulting to every tenant.
+    """
+    from common.tenants.models import Tenant
+
+    start = time.monotonic()
+    tenants = config.get("_global_.tornado.warm_cache_tenants")
+    if tenants is None:
+        tenants = [tenant.name for tenant in await Tenant.get_all()]
+
+    warm_semaphore = NoqSemaphore(_warm_tenant_caches, 10)
+    await warm_semaphore.process([{"tenant": tenant} for tenant in tenants])
+    log.info(
+        {
+            "message": "Warmed worker caches",
+            "tenant_count": len(tenants),
+            "pid": os.getpid(),
+            "duration": time.monotonic() - start,
+        }
+    )
+
+
+async def drain_server(server, timeout: Optional[int] = None):
+    """Stop accepting connections and give in-flight requests time to finish."""
+    if timeout is None:
+        timeout = config.get("_global_.tornado.graceful_shutdown_timeout", 30)
+
+    server.stop()
+    deadline = time.monotonic() + timeout
+    while server._connections and time.monotonic() < deadline:
+        await asyncio.sleep(0.5)
+
+    await server.close_all_connections()
+
+
+def signal_worker_ready(ready_fd: Optional[int]):
+    """Let the master know the worker is bound and warm."""
+    if ready_fd is None:
+        return
+
+    os.write(ready_fd, WORKER_READY_MESSAGE)
+    os.close(ready_fd)
+
+
+class WorkerSupervisor:
+    """Forks, restarts and stops the API worker processes.
+
+    :param process_count: The number of workers to keep running
+    :param serve: Called in the forked worker with the worker id and a file descriptor
+        to write to once the worker is ready. It must block until the worker exits.
+    """
+
+    def __init__(self, process_count: int, serve: Callable[[int, int], None]):
+        self.process_count = process_count
+        self.serve = serve
+        self.workers: dict[int, int] = {}
+        self.ready_timeout = config.get("_global_.tornado.worker_ready_timeout", 120)
+        self.shutdown_timeout = (
+            config.get("_global_.tornado.graceful_shutdown_timeout", 30) + 5
+        )
+        self._restart_requested = False
+        self._shutdown_requested = False
+
+    def _start_worker(self, worker_id: int, wait: bool = False) -> int:
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+                signal.signal(sig, signal.SIG_DFL)
+            exit_code = 0
+            try:
+                self.serve(worker_id, write_fd)
+            except Exception:
+                log.exception("API worker exited with an error", worker_id=worker_id)
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+
+        os.close(write_fd)
+        self.workers[worker_id] = pid
+        if wait:
+            readable, _, _ = select.select([read_fd], [], [], self.ready_timeout)
+            if not readable or os.read(read_fd, 1) != WORKER_READY_MESSAGE:
+                log.warning(
+                    "API worker did not report ready", worker_id=worker_id, pid=pid
+                )
+        os.close(read_fd)
+        log.info("Started API worker", worker_id=worker_id, pid=pid)
+        return pid
+
+    def _stop_workers(self, pids: list[int]):
+        """Ask the workers to drain and exit, killing the ones that haven't exited by the shutdown timeout."""
+        running_pids = set()
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                continue
+            running_pids.add(pid)
+
+        deadline = time.monotonic() + self.shutdown_timeout
+        while running_pids and time.monotonic() < deadline:
+            for pid in list(running_pids):
+                try:
+                    finished_pid, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    finished_pid = pid
+                if finished_pid:
+                    running_pids.discard(pid)
+            if running_pids:
+                time.sleep(0.2)
+
+        for pid in running_pids:
+            log.warning("API worker did not drain in time, killing it", pid=pid)
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+
+    def rolling_restart(self):
+        """Replace the workers one at a time, without loading new code. See the module docstring."""
+        for worker_id, old_pid in list(self.workers.items()):
+            # The replacement can bind alongside the old worker due to SO_REUSEPORT
+            self._start_worker(worker_id, wait=True)
+            self._stop_workers([old_pid])
+
+    def _reap_workers(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+
+            worker_id = next(
+                (wid for wid, wpid in self.workers.items() if wpid == pid), None
+            )
+            if worker_id is None:
+                continue
+
+            log.warning(
+                "API worker exited unexpectedly, restarting it",
+                worker_id=worker_id,
+                pid=pid,
+                exit_code=os.waitstatus_to_exitcode(status),
+            )
+            self._start_worker(worker_id)
+
+    def run(self):
+        def _request_restart(*_):
+            self._restart_requested = True
+
+        def _request_shutdown(*_):
+            self._shutdown_requested = True
+
+        signal.signal(signal.SIGHUP, _request_restart)
+        signal.signal(signal.SIGTERM, _request_shutdown)
+        signal.signal(signal.SIGINT, _request_shutdown)
+
+        for worker_id in range(self.process_count):
+            self._start_worker(worker_id)
+
+        while not self._shutdown_requested:
+            if self._restart_requested:
+                self._restart_requested = False
+                log.info("Rolling restart of API workers requested")
+                self.rolling_restart()
+            self._reap_workers()
+            time.sleep(0.5)
+
+        log.info("Stopping API workers")
+        self._stop_workers(list(self.workers.values()))
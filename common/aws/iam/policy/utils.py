@@ -1293,7 +1293,7 @@ async def calculate_unused_policy_for_identities(
             log.error(
                 "After policy is too large: {}".format(len(json.dumps(after_combined)))
             )
-            return
+            continue
 
         permission_removal_commands = await generate_permission_removal_commands(
             tenant, role_dict, effective_policy_unused_permissions_removed
@@ -1,11 +1,13 @@
+import hashlib
 import sys
 from datetime import datetime
 from typing import Dict, Iterable, Optional, Sequence, Type
 
 from botocore.exceptions import ClientError
 from pynamodax.attributes import ListAttribute, NumberAttribute, UnicodeAttribute
-from pynamodax.exceptions import DoesNotExist
+from pynamodax.exceptions import DoesNotExist, UpdateError
 from pynamodax.expressions.condition import Condition
+from pynamodax.indexes import GlobalSecondaryIndex, IncludeProjection
 from pynamodax.models import _T, _KeyType
 from pynamodax.pagination import ResultIterator
 from pynamodax.settings import OperationSettings
@@ -27,8 +29,10 @@ from common.config.config import (
     get_logger,
 )
 from common.config.models import ModelAdapter
+from common.lib.asyncio import aio_wrapper
 from common.lib.plugins import get_plugin_by_name
 from common.lib.pynamo import NoqMapAttribute, NoqModel
+from common.lib.redis import RedisHandler
 from common.lib.terraform.transformers.IAMRoleTransformer import IAMRoleTransformer
 from common.models import (
     CloneRoleRequestModel,
@@ -40,6 +44,31 @@ from common.user_request.models import IAMRequest
 
 stats = get_plugin_by_name(config.get("_global_.plugins.metrics", "cmsaas_metrics"))()
 log = get_logger(__name__)
+# Marks an account's role ARN set as complete, roles added outside of a sync don't make a set complete
+ACCOUNT_SYNCED_MEMBER = "__synced__"
+# The role attributes the rendered Terraform depends on.
+# Attributes like RoleLastUsed change as the role is used, they don't invalidate the stored Terraform.
+POLICY_HASH_ATTRIBUTES = (
+    "RoleName",
+    "Path",
+    "Description",
+    "AssumeRolePolicyDocument",
+    "RolePolicyList",
+    "AttachedManagedPolicies",
+    "InstanceProfileList",
+    "PermissionsBoundary",
+    "Tags",
+)
+
+
+class IAMRoleAccountIndex(GlobalSecondaryIndex):
+    """Roles keyed by tenant and account, so the roles in an account can be listed without querying the tenant."""
+
+    class Meta:
+        index_name = "tenant_account_id_index"
+        projection = IncludeProjection(["arn"])
+
+    tenant_account_id = UnicodeAttribute(hash_key=True)
 
 
 class IAMRole(NoqModel):
@@ -63,6 +92,12 @@ class IAMRole(NoqModel):
     permissions_boundary = NoqMapAttribute(null=True)
     tags = ListAttribute(of=TagMap, null=True)
     last_updated = NumberAttribute()
+    tenant_account_id = UnicodeAttribute(null=True)
+    # Terraform is rendered on request and stored with the hash of the policy it was rendered from
+    policy_hash = UnicodeAttribute(null=True)
+    terraform_hcl = UnicodeAttribute(null=True)
+    terraform_policy_hash = UnicodeAttribute(null=True)
+    account_index = IAMRoleAccountIndex()
 
     @property
     def role_id(self):
@@ -84,8 +119,27 @@ class IAMRole(NoqModel):
 
         return self._policy_dict
 
-    @property
-    def terraform(self) -> str:
+    def get_policy_hash(self) -> str:
+        policy = self.policy or {}
+        if isinstance(policy, str):
+            policy = json.loads(policy)
+        policy = self.dump_json_attr(
+            {attr: policy.get(attr) for attr in POLICY_HASH_ATTRIBUTES}
+        )
+        return hashlib.sha256(policy.encode()).hexdigest()
+
+    def keep_terraform(self, previous_role: Optional["IAMRole"]):
+        """Keep the Terraform stored with a previous version of the role if its policy is unchanged."""
+        if not previous_role:
+            return
+
+        policy_hash = self.get_policy_hash()
+        if previous_role.policy_hash == policy_hash:
+            self.policy_hash = policy_hash
+            self.terraform_hcl = previous_role.terraform_hcl
+            self.terraform_policy_hash = previous_role.terraform_policy_hash
+
+    def _render_terraform(self) -> str:
         if not self.policy_dict:
             return ""
 
@@ -102,15 +156,129 @@ class IAMRole(NoqModel):
             )
             return ""
 
+    @property
+    def terraform(self) -> Optional[str]:
+        """The Terraform stored with the role, if it was rendered from the role's current policy."""
+        if self.terraform_policy_hash and self.terraform_policy_hash == (
+            self.policy_hash or self.get_policy_hash()
+        ):
+            return self.terraform_hcl
+
+    async def get_terraform(self) -> str:
+        """Get the role as Terraform HCL.
+
+        The HCL is only rendered if it hasn't been rendered for the role's current policy.
+        It's then stored with the role so it's available to later reads,
+        unless the stored policy changed since the role was loaded.
+        """
+        if self.terraform is not None:
+            return self.terraform
+
+        policy_hash = self.policy_hash or self.get_policy_hash()
+        terraform = await aio_wrapper(self._render_terraform)
+        if not terraform:
+            return terraform
+
+        if self.policy_hash:
+            condition = IAMRole.policy_hash == self.policy_hash
+        else:
+            # Saved before policy hashes were stored, the next save stores the hash
+            condition = IAMRole.policy_hash.does_not_exist()
+        try:
+            await self.update(
+                actions=[
+                    IAMRole.terraform_hcl.set(terraform),
+                    IAMRole.terraform_policy_hash.set(policy_hash),
+                ],
+                condition=condition,
+            )
+            # The update refreshes the attributes from the stored item
+            self._normalize_object()
+        except UpdateError as err:
+            if err.cause_response_code == "ConditionalCheckFailedException":
+                log.debug(
+                    {
+                        "message": "Role policy changed since it was loaded, not storing rendered Terraform",
+                        "IAMRole": self.role_id,
+                    }
+                )
+            else:
+                log.warning(
+                    {
+                        "message": "Unable to store rendered Terraform",
+                        "IAMRole": self.role_id,
+                        "error": str(err),
+                    }
+                )
+
+        return terraform
+
+    @staticmethod
+    def get_tenant_account_id(tenant: str, account_id: str) -> str:
+        return f"{tenant}#{account_id}"
+
+    @staticmethod
+    def get_account_role_arns_redis_key(tenant: str, account_id: str) -> str:
+        return f"{tenant}_IAM_ROLE_ARNS:{account_id}"
+
+    @classmethod
+    async def add_account_role_arn(cls, tenant: str, account_id: str, arn: str):
+        red = await RedisHandler().redis(tenant)
+        await aio_wrapper(
+            red.sadd, cls.get_account_role_arns_redis_key(tenant, account_id), arn
+        )
+
+    @classmethod
+    async def get_account_role_arns(cls, tenant: str, account_id: str) -> set[str]:
+        """Get the ARNs of the cached roles in an account.
+
+        Reads the Redis set written by `sync_account_roles` and updated as roles are fetched or deleted.
+        The set only has every role of the account if it has the ACCOUNT_SYNCED_MEMBER written by
+        `sync_account_roles`, otherwise the account index is queried.
+        Roles written before the account index are added to it by the iam_role_add_tenant_account_id data migration.
+        """
+        red = await RedisHandler().redis(tenant)
+        role_arns = await aio_wrapper(
+            red.smembers, cls.get_account_role_arns_redis_key(tenant, account_id)
+        )
+        if ACCOUNT_SYNCED_MEMBER in role_arns:
+            return set(role_arns) - {ACCOUNT_SYNCED_MEMBER}
+
+        # Paginate in the thread, the results are fetched lazily
+        results = await aio_wrapper(
+            lambda: list(
+                cls.account_index.query(
+                    cls.get_tenant_account_id(tenant, account_id),
+                    attributes_to_get=["arn"],
+                )
+            )
+        )
+        return {iam_role.arn for iam_role in results}
+
     def _normalize_object(self):
         if self.policy and isinstance(self.policy, str):
             self.policy = json.loads(self.policy)
 
     def dict(self) -> dict:
         as_dict = super(IAMRole, self).dict()
+        for attr in ("policy_hash", "terraform_hcl", "terraform_policy_hash"):
+            as_dict.pop(attr, None)
         as_dict["terraform"] = self.terraform
         return as_dict
 
+    async def save(
+        self,
+        condition: Optional[Condition] = None,
+        settings: OperationSettings = OperationSettings.default,
+    ) -> Dict[str, any]:
+        new_policy_hash = self.get_policy_hash()
+        if new_policy_hash != self.policy_hash:
+            # Stored Terraform is re-rendered on the next request
+            self.policy_hash = new_policy_hash
+            self.terraform_hcl = None
+            self.terraform_policy_hash = None
+        return await super(IAMRole, self).save(condition, settings)
+
     @classmethod
     async def get(
         cls,
@@ -136,15 +304,21 @@ class IAMRole(NoqModel):
             "tenant": tenant,
         }
         iam_role = None
+        previous_iam_role = None
         entity_id = f"{arn}||{tenant}"
 
-        if not force_refresh:
-            try:
-                iam_role: IAMRole = await super(IAMRole, cls).get(tenant, entity_id)
-            except DoesNotExist:
+        try:
+            previous_iam_role: IAMRole = await super(IAMRole, cls).get(
+                tenant, entity_id
+            )
+        except DoesNotExist:
+            if not force_refresh:
                 log_data["message"] = "Role is missing in DDB. Going out to AWS."
                 stats.count("aws.fetch_iam_role.missing_dynamo", tags=stat_tags)
 
+        if not force_refresh:
+            iam_role = previous_iam_role
+
         if not iam_role:
             if force_refresh:
                 log_data["message"] = "Force refresh is enabled. Going out to AWS."
@@ -198,13 +372,16 @@ class IAMRole(NoqModel):
                 name=role.get("RoleName"),
                 resourceId=role.get("RoleId"),
                 accountId=account_id,
+                tenant_account_id=cls.get_tenant_account_id(tenant, account_id),
                 tags=[TagMap(**tag) for tag in role.get("Tags", [])],
                 policy=cls().dump_json_attr(role),
                 permissions_boundary=role.get("PermissionsBoundary", {}),
                 owner=get_aws_principal_owner(role, tenant),
                 last_updated=last_updated,
             )
+            iam_role.keep_terraform(previous_iam_role)
             await iam_role.save()
+            await cls.add_account_role_arn(tenant, account_id, iam_role.arn)
 
             log_data["message"] = "Role fetched from AWS, and synced with DDB."
             stats.count(
@@ -268,6 +445,10 @@ class IAMRole(NoqModel):
         arn = f"arn:aws:iam::{account_id}:role/{role_name}"
         iam_role = await cls.get(tenant, account_id, arn)
         await _delete_iam_role(account_id, role_name, username, tenant)
+        red = await RedisHandler().redis(tenant)
+        await aio_wrapper(
+            red.srem, cls.get_account_role_arns_redis_key(tenant, account_id), arn
+        )
         return await iam_role.delete()
 
     @classmethod
@@ -302,6 +483,7 @@ class IAMRole(NoqModel):
                         name=role.get("RoleName"),
                         resourceId=role.get("RoleId"),
                         accountId=account_id,
+                        tenant_account_id=cls.get_tenant_account_id(tenant, account_id),
                         tags=[TagMap(**tag) for tag in role.get("Tags", [])],
                         policy=cls().dump_json_attr(role),
                         permissions_boundary=role.get("PermissionsBoundary", {}),
@@ -328,6 +510,9 @@ class IAMRole(NoqModel):
         cached_roles: list[IAMRole] = await cls.query(
             tenant, filter_condition=IAMRole.accountId == account_id
         )
+        cached_roles_by_arn = {
+            cached_role.arn: cached_role for cached_role in cached_roles
+        }
         for cached_role in cached_roles:
             if cached_role.arn not in iam_role_arns:
                 cache_refresh_required = True
@@ -341,19 +526,34 @@ class IAMRole(NoqModel):
 
         for role in filtered_iam_roles:
             entity_id = f"{role.get('Arn')}||{tenant}"
-            await cls(
+            iam_role = cls(
                 arn=role.get("Arn"),
                 entity_id=entity_id,
                 tenant=tenant,
                 name=role.get("RoleName"),
                 resourceId=role.get("RoleId"),
                 accountId=account_id,
+                tenant_account_id=cls.get_tenant_account_id(tenant, account_id),
                 tags=[TagMap(**tag) for tag in role.get("Tags", [])],
                 policy=cls().dump_json_attr(role),
                 permissions_boundary=role.get("PermissionsBoundary", {}),
                 owner=get_aws_principal_owner(role, tenant),
                 last_updated=last_updated,
-            ).save()
+            )
+            iam_role.keep_terraform(cached_roles_by_arn.get(iam_role.arn))
+            await iam_role.save()
+
+        # Mirror the account's roles to Redis for get_account_role_arns
+        red = await RedisHandler().redis(tenant)
+        account_role_arns_key = cls.get_account_role_arns_redis_key(tenant, account_id)
+        pipeline = red.pipeline(transaction=False)
+        pipeline.delete(account_role_arns_key)
+        pipeline.sadd(
+            account_role_arns_key,
+            ACCOUNT_SYNCED_MEMBER,
+            *[role.get("Arn") for role in filtered_iam_roles],
+        )
+        await aio_wrapper(pipeline.execute)
 
         for role in iam_roles:
             # Run internal function on role. This can be used to inspect roles, add managed policies, or other actions
@@ -1,5 +1,4 @@
 import sys
-from collections import defaultdict
 
 from iambic.core.utils import evaluate_on_provider
 from iambic.plugins.v0_1_0.aws.iam.role.models import (
@@ -16,7 +15,6 @@ from common.iambic.interface import IambicConfigInterface
 from common.iambic.templates.utils import get_template_str_value_for_provider_definition
 from common.iambic_request.models import IambicRepo
 from common.identity.models import AwsIdentityRole
-from common.pg_core.utils import bulk_delete
 from common.tenants.models import Tenant
 from common.users.models import User
 
@@ -124,26 +122,13 @@ async def sync_role_access(
     iambic_config = await iambic_config_interface.get_iambic_config()
     all_aws_identity_roles = await AwsIdentityRole.get_all(tenant)
     log_data["num_identity_roles"] = len(all_aws_identity_roles)
-    existing_role_access_response = await AWSRoleAccess.list(tenant)
-    existing_user_role_access_map = defaultdict(dict)
-    existing_group_role_access_map = defaultdict(dict)
-    for role_access in existing_role_access_response:
-        if role_access.user:
-            existing_user_role_access_map[role_access.identity_role_id][
-                role_access.user_id
-            ] = role_access
-        elif role_access.group:
-            existing_group_role_access_map[role_access.identity_role_id][
-                role_access.group_id
-            ] = role_access
-
     aws_identity_role_map = {
         aws_identity_role.role_arn: aws_identity_role
         for aws_identity_role in all_aws_identity_roles
     }
 
+    upserts = []
     for role_template in iambic_templates:
-        upserts = []
         template_aws_accounts = [
             account
             for account in iambic_config.aws.accounts
@@ -164,7 +149,16 @@ async def sync_role_access(
                     if identity_role := aws_identity_role_map.get(role_arn):
                         access_rule_users = []
                         if access_rule.users == "*":
-                            access_rule_users = list(users.values())
+                            upserts.append(
+                                {
+                                    "tenant": tenant,
+                                    "type": RoleAccessTypes.credential_access,
+                                    "identity_role": identity_role,
+                                    "cli_only": False,
+                                    "expiration": access_rule.expires_at,
+                                    "all_users": True,
+                                }
+                            )
                         elif access_rule.users:
                             for user_rule in access_rule.users:
                                 if not user_rule:
@@ -186,9 +180,6 @@ async def sync_role_access(
                                         }
                                     )
                         for user in access_rule_users:
-                            existing_user_role_access_map[identity_role.id].pop(
-                                user.id, None
-                            )
                             upserts.append(
                                 {
                                     "tenant": tenant,
@@ -202,7 +193,16 @@ async def sync_role_access(
 
                         access_rule_groups = []
                         if access_rule.groups == "*":
-                            access_rule_groups = list(groups.values())
+                            upserts.append(
+                                {
+                                    "tenant": tenant,
+                                    "type": RoleAccessTypes.credential_access,
+                                    "identity_role": identity_role,
+                                    "cli_only": False,
+                                    "expiration": access_rule.expires_at,
+                                    "all_groups": True,
+                                }
+                            )
                         elif access_rule.groups:
                             for group_rule in access_rule.groups:
                                 if not group_rule:
@@ -241,9 +241,6 @@ async def sync_role_access(
                                 #     access_rule_groups.append(group)
 
                         for group in access_rule_groups:
-                            existing_group_role_access_map[identity_role.id].pop(
-                                group.id, None
-                            )
                             upserts.append(
                                 {
                                     "tenant": tenant,
@@ -262,19 +259,11 @@ async def sync_role_access(
                                 "tenant": tenant.name,
                             }
                         )
-        log_data["num_upserts"] = len(upserts)
-        if upserts:
-            await AWSRoleAccess.bulk_create(tenant, upserts)
-
-    deleted_access = []
-    for _, user_role_access_map in existing_user_role_access_map.items():
-        deleted_access.extend(list(user_role_access_map.values()))
-    for _, group_role_access_map in existing_group_role_access_map.items():
-        deleted_access.extend(list(group_role_access_map.values()))
 
-    log_data["num_deleted_access"] = len(deleted_access)
-    if deleted_access:
-        await bulk_delete(deleted_access)
+    log_data["num_grants"] = len(upserts)
+    # Stale grants are deleted in the same transaction as the upserts
+    counts = await AWSRoleAccess.bulk_create(tenant, upserts, delete_stale=True)
+    log_data.update({f"num_{action}_access": count for action, count in counts.items()})
     log.debug("sync_role_access results", **log_data)
 
 
@@ -1,6 +1,6 @@
 import enum
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional, Union
 
 from asyncache import cached
@@ -12,10 +12,13 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     String,
     UniqueConstraint,
     and_,
+    delete,
+    false,
     or_,
     select,
     update,
@@ -28,6 +31,7 @@ from common.exceptions.exceptions import NoMatchingRequest
 from common.groups.models import Group
 from common.identity.models import AwsIdentityRole
 from common.pg_core.models import Base, SoftDeleteMixin
+from common.pg_core.utils import batch
 from common.tenants.models import Tenant
 from common.users.models import User
 
@@ -49,6 +53,9 @@ class AWSRoleAccess(SoftDeleteMixin, Base):
     identity_role_id = Column(
         Integer(), ForeignKey("identity_role.id", ondelete="CASCADE")
     )
+    # Symbolic grants to every user or every group of the tenant, resolved when the roles are queried
+    all_users = Column(Boolean, default=False, server_default=false(), nullable=False)
+    all_groups = Column(Boolean, default=False, server_default=false(), nullable=False)
     cli_only = Column(Boolean, default=False)
     expiration = Column(DateTime, nullable=True)
     request_id = Column(String)
@@ -77,6 +84,20 @@ class AWSRoleAccess(SoftDeleteMixin, Base):
         UniqueConstraint(
             "tenant_id", "group_id", "identity_role_id", name="uq_tenant_group_role"
         ),
+        Index(
+            "uq_tenant_all_users_role",
+            "tenant_id",
+            "identity_role_id",
+            unique=True,
+            postgresql_where=all_users,
+        ),
+        Index(
+            "uq_tenant_all_groups_role",
+            "tenant_id",
+            "identity_role_id",
+            unique=True,
+            postgresql_where=all_groups,
+        ),
     )
 
     def dict(self):
@@ -85,6 +106,8 @@ class AWSRoleAccess(SoftDeleteMixin, Base):
             type=self.type.value,
             user=self.user.dict() if self.user else {},
             group=self.group.dict() if self.group else {},
+            all_users=self.all_users,
+            all_groups=self.all_groups,
             identity_role=self.identity_role.dict() if self.identity_role else {},
             cli_only=self.cli_only,
             expiration=str(self.expiration),
@@ -165,41 +188,114 @@ class AWSRoleAccess(SoftDeleteMixin, Base):
                     raise ValueError("Must provide either user or group")
                 await session.execute(insert_stmt)
 
+    @staticmethod
+    def _grant_key(role_access: dict) -> tuple:
+        return (
+            role_access["identity_role_id"],
+            role_access["user_id"],
+            role_access["group_id"],
+            role_access["all_users"],
+            role_access["all_groups"],
+        )
+
     @classmethod
-    async def bulk_create(cls, tenant: Tenant, role_access_data: list[dict]):
+    async def bulk_create(
+        cls, tenant: Tenant, role_access_data: list[dict], delete_stale: bool = False
+    ) -> dict[str, int]:
+        """Reconcile the tenant's role access with role_access_data in a single transaction.
+
+        The tenant's rows are read once and diffed against role_access_data,
+        so only new rows and rows whose type, cli_only or expiration changed are written.
+
+        :param delete_stale: Delete the tenant's rows that are not in role_access_data
+        :return: The number of rows created, updated, unchanged and deleted
+        """
+        desired_role_access = {}
+        for role_access in role_access_data:
+            expiration = role_access["expiration"]
+            if isinstance(expiration, datetime) and expiration.tzinfo:
+                # The column is stored without a time zone
+                expiration = expiration.astimezone(timezone.utc).replace(tzinfo=None)
+            row = {
+                "tenant_id": tenant.id,
+                "type": role_access["type"],
+                "identity_role_id": role_access["identity_role"].id,
+                "cli_only": role_access["cli_only"],
+                "expiration": expiration,
+                "user_id": None,
+                "group_id": None,
+                "all_users": False,
+                "all_groups": False,
+            }
+            if role_access.get("user"):
+                row["user_id"] = role_access["user"].id
+            elif role_access.get("group"):
+                row["group_id"] = role_access["group"].id
+            elif role_access.get("all_users"):
+                row["all_users"] = True
+            elif role_access.get("all_groups"):
+                row["all_groups"] = True
+            else:
+                raise ValueError(
+                    "Must provide either user, group, all_users or all_groups"
+                )
+            # The last grant wins, the same as upserting them in order
+            desired_role_access[cls._grant_key(row)] = row
+
+        counts = {"created": 0, "updated": 0, "unchanged": 0, "deleted": 0}
         async with ASYNC_PG_SESSION() as session:
             async with session.begin():
-                for role_access in role_access_data:
-                    insert_stmt_data = {
-                        "tenant_id": tenant.id,
-                        "type": role_access["type"],
-                        "identity_role_id": role_access["identity_role"].id,
-                        "cli_only": role_access["cli_only"],
-                        "expiration": role_access["expiration"],
-                    }
-                    if "user" in role_access.keys():
-                        insert_stmt_data["user_id"] = role_access["user"].id
-                    elif "group" in role_access.keys():
-                        insert_stmt_data["group_id"] = role_access["group"].id
-                    upsert_stmt_data = insert_stmt_data.copy()
-                    insert_stmt = insert(cls).values(insert_stmt_data)
-                    if role_access.get("user"):
-                        insert_stmt = insert_stmt.on_conflict_do_update(
-                            index_elements=["tenant_id", "user_id", "identity_role_id"],
-                            set_=upsert_stmt_data,
-                        )
-                    elif role_access.get("group"):
-                        insert_stmt = insert_stmt.on_conflict_do_update(
-                            index_elements=[
-                                "tenant_id",
-                                "group_id",
-                                "identity_role_id",
-                            ],
-                            set_=upsert_stmt_data,
+                existing_role_access = await session.execute(
+                    select(
+                        cls.id,
+                        cls.identity_role_id,
+                        cls.user_id,
+                        cls.group_id,
+                        cls.all_users,
+                        cls.all_groups,
+                        cls.type,
+                        cls.cli_only,
+                        cls.expiration,
+                    ).where(cls.tenant_id == tenant.id)
+                )
+                updates = []
+                stale_ids = []
+                for existing_row in existing_role_access.mappings():
+                    row = desired_role_access.pop(cls._grant_key(existing_row), None)
+                    if row is None:
+                        stale_ids.append(existing_row["id"])
+                    elif (row["type"], row["cli_only"], row["expiration"]) != (
+                        existing_row["type"],
+                        existing_row["cli_only"],
+                        existing_row["expiration"],
+                    ):
+                        updates.append(
+                            {
+                                "id": existing_row["id"],
+                                "type": row["type"],
+                                "cli_only": row["cli_only"],
+                                "expiration": row["expiration"],
+                            }
                         )
                     else:
-                        raise ValueError("Must provide either user or group")
-                    await session.execute(insert_stmt)
+                        counts["unchanged"] += 1
+
+                for insert_batch in batch(desired_role_access.values(), 1000):
+                    # A concurrent sync may have created the row since it was read
+                    res = await session.execute(
+                        insert(cls).values(insert_batch).on_conflict_do_nothing()
+                    )
+                    counts["created"] += res.rowcount
+                if updates:
+                    await session.execute(update(cls), updates)
+                    counts["updated"] = len(updates)
+                if delete_stale:
+                    for delete_batch in batch(stale_ids, 1000):
+                        res = await session.execute(
+                            delete(cls).where(cls.id.in_(delete_batch))
+                        )
+                        counts["deleted"] += res.rowcount
+        return counts
 
     async def delete(self):
         async with ASYNC_PG_SESSION() as session:
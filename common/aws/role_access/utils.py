@@ -1,5 +1,6 @@
 from cachetools import TTLCache
-from sqlalchemy import or_, select
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import aliased
 
 from common import AWSRoleAccess, Group, Tenant, User
 from common.config.globals import ASYNC_PG_SESSION
@@ -13,6 +14,13 @@ async def get_user_eligible_roles(
     user: User,
     groups: list[str],
 ):
+    # A grant to all groups applies to members of any group known to the tenant
+    tenant_group = aliased(Group)
+    in_tenant_group = (
+        select(tenant_group.id)
+        .where(tenant_group.tenant_id == tenant.id, tenant_group.name.in_(groups))
+        .exists()
+    )
     async with ASYNC_PG_SESSION() as session:
         stmt = (
             select(AwsIdentityRole.role_arn)
@@ -24,7 +32,12 @@ async def get_user_eligible_roles(
             .outerjoin(Group, AWSRoleAccess.group_id == Group.id)
             .filter(
                 AwsIdentityRole.tenant_id == tenant.id,
-                or_(User.id == user.id, Group.name.in_(groups)),
+                or_(
+                    User.id == user.id,
+                    Group.name.in_(groups),
+                    AWSRoleAccess.all_users.is_(True),
+                    and_(AWSRoleAccess.all_groups.is_(True), in_tenant_group),
+                ),
             )
             .order_by(AwsIdentityRole.role_arn)
         )
@@ -85,10 +85,18 @@ from common.lib.aws.marketplace import (
     handle_aws_marketplace_queue,
     meter_aws_customer,
 )
+from common.lib.aws.resource_errors import (
+    get_all_cloudtrail_error_counts,
+    get_all_s3_errors,
+    store_cloudtrail_error_counts_by_arn,
+)
 from common.lib.aws.s3 import list_buckets
 from common.lib.aws.sanitize import sanitize_session_name
 from common.lib.aws.sns import list_topics
-from common.lib.aws.typeahead_cache import cache_aws_resource_details
+from common.lib.aws.typeahead_cache import (
+    cache_aws_resource_details,
+    sweep_stale_aws_resource_details,
+)
 from common.lib.aws.utils import (
     allowed_to_sync_role,
     cache_all_scps,
@@ -634,7 +642,6 @@ def cache_cloudtrail_errors_by_arn(tenant=None) -> dict[str, Any]:
     if not tenant:
         raise Exception("`tenant` must be passed to this task.")
     function: str = f"{__name__}.{sys._getframe().f_code.co_name}"
-    red = RedisHandler().redis_sync(tenant)
     log_data: dict = {"function": function}
     if is_task_already_running(function, [tenant]):
         log_data["message"] = "Skipping task: An identical task is currently running"
@@ -645,15 +652,7 @@ def cache_cloudtrail_errors_by_arn(tenant=None) -> dict[str, Any]:
         tenant, None
     )
     cloudtrail_errors = process_cloudtrail_errors_res["error_count_by_role"]
-    red.setex(
-        config.get_tenant_specific_key(
-            "celery.cache_cloudtrail_errors_by_arn.redis_key",
-            tenant,
-            f"{tenant}_CLOUDTRAIL_ERRORS_BY_ARN",
-        ),
-        86400,
-        json.dumps(cloudtrail_errors),
-    )
+    store_cloudtrail_error_counts_by_arn(tenant, cloudtrail_errors)
     if process_cloudtrail_errors_res["num_new_or_changed_notifications"] > 0:
         cache_notifications.apply_async((tenant,))
     log_data["number_of_roles_with_errors"] = len(cloudtrail_errors.keys())
@@ -686,25 +685,8 @@ def cache_policies_table_details(tenant=None) -> bool:
     items = []
     accounts_d = async_to_sync(get_account_id_to_name_mapping)(tenant)
     red = RedisHandler().redis_sync(tenant)
-    cloudtrail_errors = {}
-    cloudtrail_errors_j = red.get(
-        config.get_tenant_specific_key(
-            "celery.cache_cloudtrail_errors_by_arn.redis_key",
-            tenant,
-            f"{tenant}_CLOUDTRAIL_ERRORS_BY_ARN",
-        )
-    )
-
-    if cloudtrail_errors_j:
-        cloudtrail_errors = json.loads(cloudtrail_errors_j)
-
-    s3_error_topic = config.get_tenant_specific_key(
-        "redis.s3_errors", tenant, f"{tenant}_S3_ERRORS"
-    )
-    all_s3_errors = red.get(s3_error_topic)
-    s3_errors = {}
-    if all_s3_errors:
-        s3_errors = json.loads(all_s3_errors)
+    cloudtrail_errors = get_all_cloudtrail_error_counts(tenant)
+    s3_errors = get_all_s3_errors(tenant)
 
     # IAM Roles
     all_iam_roles = []
@@ -762,7 +744,7 @@ def cache_policies_table_details(tenant=None) -> bool:
             s3_key=config.get_tenant_specific_key(
                 "cache_iam_resources_across_accounts.all_users_combined.s3.file",
                 tenant,
-                "account_resource_cache/cache_all_users_v1.json.gz",
+                "account_resource_cache/cache_all_users_v2.msgpack.zst",
             ),
             default={},
             tenant=tenant,
@@ -1090,7 +1072,7 @@ def cache_iam_resources_for_account(
                 s3_key=config.get_tenant_specific_key(
                     "cache_iam_resources_for_account.s3.file",
                     tenant,
-                    "get_account_authorization_details/get_account_authorization_details_{account_id}_v1.json.gz",
+                    "get_account_authorization_details/get_account_authorization_details_{account_id}_v2.msgpack.zst",
                 ).format(account_id=account_id),
                 tenant=tenant,
             )
@@ -1121,6 +1103,10 @@ def cache_iam_resources_for_account(
                 # Redis:
                 _add_role_to_redis(iam_user_cache_key, user_entry, tenant)
 
+            cache_aws_resource_details(
+                {user["Arn"]: user for user in iam_users if user.get("Arn")}, tenant
+            )
+
             # Maybe store all resources in git
             if config.get_tenant_specific_key(
                 "cache_iam_resources_for_account.store_in_git.enabled",
@@ -1353,11 +1339,16 @@ def cache_iam_resources_across_accounts(
             s3_key=config.get_tenant_specific_key(
                 "cache_iam_resources_across_accounts.all_users_combined.s3.file",
                 tenant,
-                "account_resource_cache/cache_all_users_v1.json.gz",
+                "account_resource_cache/cache_all_users_v2.msgpack.zst",
             ),
             tenant=tenant,
         )
-        cache_aws_resource_details(all_users, tenant)
+
+    if config.region == config.get_tenant_specific_key(
+        "celery.active_region", tenant, config.region
+    ) or config.get("_global_.environment") in ["dev"]:
+        # The resource ARNs are added by cache_iam_resources_for_account
+        log_data["num_stale_resource_arns"] = sweep_stale_aws_resource_details(tenant)
 
     log_data["num_iam_users"] = len(all_users)
     stats.count(f"{function}.success")
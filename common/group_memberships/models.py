@@ -3,16 +3,16 @@ from __future__ import annotations
 import uuid
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import Column, ForeignKey, and_, column
+from sqlalchemy import Column, ForeignKey, and_, column, delete, func, insert
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import aliased, relationship
 from sqlalchemy.orm.base import Mapped
 from sqlalchemy.sql import Values, select
 
 from common.config.globals import ASYNC_PG_SESSION
 from common.lib.auth import is_tenant_admin
 from common.pg_core.models import Base, SoftDeleteMixin
-from common.pg_core.utils import bulk_add, bulk_delete
+from common.pg_core.utils import batch, bulk_add, bulk_delete
 
 if TYPE_CHECKING:
     from common.groups.models import Group
@@ -166,8 +166,8 @@ async def upsert_and_remove_group_memberships(
     memberships = []
     memberships_to_remove = []
     for user in users:
+        existing_memberships = await GroupMembership.get_by_user(user)
         if remove_other_group_memberships:
-            existing_memberships = await GroupMembership.get_by_user(user)
             for membership in existing_memberships:
                 # If user signs in by SSO and group is the admin group, do not remove the membership
                 # It could remove other MANUAL groups that the user is a member of
@@ -182,10 +182,81 @@ async def upsert_and_remove_group_memberships(
 
                 if membership_not_in:
                     memberships_to_remove.append(membership)
+        # Only add the memberships the user doesn't already have
+        existing_group_ids = {
+            membership.group_id for membership in existing_memberships
+        }
         for group in groups:
-            memberships.append(GroupMembership(user_id=user.id, group_id=group.id))
+            if group.id not in existing_group_ids:
+                memberships.append(GroupMembership(user_id=user.id, group_id=group.id))
     if memberships_to_remove:
         await bulk_delete(memberships_to_remove)
     if memberships:
         return await bulk_add(memberships)
     return memberships
+
+
+async def apply_group_membership_operations(
+    group_ids: list[uuid.UUID],
+    operations: list[tuple[str, list[uuid.UUID]]],
+):
+    """Apply add, remove and replace operations to the members of groups in a single transaction.
+
+    The diff against the current memberships is computed in SQL,
+    so only missing memberships are inserted and only removed memberships are deleted.
+    The user and group IDs must already be resolved to the tenant's users and groups.
+
+    Args:
+        group_ids (list[uuid.UUID]): The groups the operations apply to.
+        operations (list[tuple[str, list[uuid.UUID]]]): Pairs of "add", "remove" or "replace" and user IDs,
+            applied in order. Replace removes the groups' other members.
+    """
+    async with ASYNC_PG_SESSION() as session:
+        async with session.begin():
+            for op, user_ids in operations:
+                if op == "remove":
+                    if user_ids:
+                        await session.execute(
+                            delete(GroupMembership).where(
+                                GroupMembership.group_id.in_(group_ids),
+                                GroupMembership.user_id.in_(user_ids),
+                            )
+                        )
+                    continue
+                elif op == "replace":
+                    await session.execute(
+                        delete(GroupMembership).where(
+                            GroupMembership.group_id.in_(group_ids),
+                            GroupMembership.user_id.not_in(user_ids),
+                        )
+                    )
+                elif op != "add":
+                    raise ValueError(f"Unsupported group membership operation: {op}")
+
+                memberships = [
+                    (user_id, group_id)
+                    for user_id in user_ids
+                    for group_id in group_ids
+                ]
+                for membership_batch in batch(memberships, 5000):
+                    data = Values(
+                        column("user_id", UUID(as_uuid=True)),
+                        column("group_id", UUID(as_uuid=True)),
+                        name="data",
+                    ).data(membership_batch)
+                    existing_membership = aliased(GroupMembership)
+                    await session.execute(
+                        insert(GroupMembership).from_select(
+                            ["id", "user_id", "group_id"],
+                            select(
+                                func.gen_random_uuid(), data.c.user_id, data.c.group_id
+                            ).where(
+                                ~select(existing_membership.id)
+                                .where(
+                                    existing_membership.user_id == data.c.user_id,
+                                    existing_membership.group_id == data.c.group_id,
+                                )
+                                .exists()
+                            ),
+                        )
+                    )
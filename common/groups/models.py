@@ -110,6 +110,21 @@ class Group(SoftDeleteMixin, Base):
                 result = await session.scalars(stmt)
                 return result.unique().all()
 
+    @classmethod
+    async def get_existing_ids(cls, tenant, group_ids: list) -> set[uuid.UUID]:
+        """The IDs of the tenant's groups in group_ids, without loading the groups or their users."""
+        async with ASYNC_PG_SESSION() as session:
+            async with session.begin():
+                stmt = select(Group.id).where(
+                    and_(
+                        Group.tenant == tenant,
+                        Group.id.in_(group_ids),
+                        Group.deleted == False,  # noqa
+                    ),
+                )
+                result = await session.scalars(stmt)
+                return set(result.all())
+
     @classmethod
     async def get_by_email(cls, tenant, email):
         async with ASYNC_PG_SESSION() as session:
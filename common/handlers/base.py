@@ -1414,3 +1414,9 @@ class ScimAuthHandler(TornadoRequestHandler):
 
         if authorization_token != tenant_config.scim_bearer_token:
             raise tornado.web.HTTPError(403, "Invalid bearer token.")
+
+    def write_scim_error(self, err) -> None:
+        """Write a common.lib.scim.ScimError as a SCIM error response and finish the request."""
+        self.set_status(err.status)
+        self.write(err.dict())
+        raise tornado.web.Finish()
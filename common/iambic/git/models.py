@@ -1,6 +1,5 @@
 import asyncio
 import os
-import shutil
 import sys
 from datetime import datetime
 from typing import Literal, Optional
@@ -15,7 +14,13 @@ from git.exc import GitCommandError, InvalidGitRepositoryError
 from common.config import config
 from common.config.tenant_config import TenantConfig
 from common.github.models import GitHubInstall
-from common.iambic.git.utils import get_repo_access_token, list_tenant_repo_details
+from common.iambic.git.utils import (
+    RepoSyncCoordinator,
+    clone_repo_mirror,
+    fetch_repo_mirror,
+    get_repo_access_token,
+    list_tenant_repo_details,
+)
 from common.lib.asyncio import aio_wrapper, run_command
 from common.lib.storage import TenantFileStorageHandler
 from common.models import IambicRepoDetails, IambicTemplateChange
@@ -112,62 +117,70 @@ class IambicRepo:
                 with remote.config_writer as cw:
                     cw.set("url", await self.get_repo_uri())
 
-    async def clone_or_pull_git_repo(self):
+    async def clone_or_pull_git_repo(self, force: bool = False):
         """
-        Assumption is we will start with a blobless clone. Such that subsequent runs can use pull naturally.
-        Now if upstream break (like rewrite history), we will fallback to replace the clone.
+        Sync the tenant's local mirror of the repo's default branch.
+
+        The first sync is a blobless clone with the full history. Later syncs only fetch the objects added since
+        the last one, unshallowing mirrors that were cloned shallow.
+        Git runs in a subprocess so syncing repos concurrently doesn't block the event loop.
+
+        Concurrent syncs of the mirror share one fetch and a sync within
+        `_global_.iambic.git_fetch_freshness_seconds` of the last one is skipped.
+        Set force when the caller needs a change that was just pushed, like a merge commit.
         """
+        await RepoSyncCoordinator.get().sync(
+            self.default_file_path, self._sync_repo_mirror, force=force
+        )
+        self.repo = Repo(self.default_file_path)
+
+    async def _sync_repo_mirror(self):
         if os.path.exists(self.default_file_path):
-            self.repo = Repo(self.default_file_path)
-            await self.set_repo_auth()
-            try:
-                self.repo.git.checkout(self.default_branch_name)
-            except Exception as err:
-                # The main branch is already checked out
-                if "already exists and is not an empty directory" not in err.stderr:
-                    raise
-            self.repo.git.reset("--hard", self.get_default_branch())
             try:
-                self.repo.git.pull()
-            except Exception as err:
-                if "refusing to merge unrelated histories" not in err.stderr:
-                    # we have to be specific; otherwise, a transient network error
-                    # may cause us to blow away the directory.
+                self.repo = Repo(self.default_file_path)
+            except InvalidGitRepositoryError:
+                log.warning(
+                    "Replacing invalid git repo",
+                    repo=self.repo_name,
+                    tenant=self.tenant.name,
+                    default_file_path=self.default_file_path,
+                )
+            else:
+                try:
+                    await fetch_repo_mirror(
+                        self.default_file_path,
+                        await self.get_repo_uri(),
+                        self.default_branch_name,
+                        self.remote_name,
+                    )
+                except Exception:
                     await log.aexception(
-                        "Git Pull failed",
+                        "Git fetch failed",
                         repo=self.repo_name,
                         tenant=self.tenant.name,
                         request_id=self.request_id,
-                        file_path=self.file_path,
                         default_file_path=self.default_file_path,
                         default_branch_name=self.default_branch_name,
                     )
                     raise
-                # an upstream may have re-written history, fall back to a fresh blobless clone
-                shutil.rmtree(self.default_file_path)
-                await self._clone_blobless_repo()
-        else:
-            await self._clone_blobless_repo()
-
-    async def _clone_blobless_repo(self):
-        repo = Repo.clone_from(
-            await self.get_repo_uri(),
-            self.default_file_path,
-            config="core.symlinks=false",
-            filter="blob:none",  # also known as blobless clone
-            single_branch=True,  # minimize network operation to track HEAD
-        )
-        self.repo = repo
-        await self.set_repo_auth()
+                return
+
+        await clone_repo_mirror(await self.get_repo_uri(), self.default_file_path)
 
     async def set_request_branch(self, reuse_branch_repo: bool = False):
         """THIS IS A DESTRUCTIVE OPERATION.
         deletes whatever is in request_file_path and sets a new worktree for the request branch in the path
+
+        Serialized per request branch so concurrent actions on a request don't replace each other's worktree.
         """
         if not isinstance(self.request_file_path, str):
             raise ValueError(
                 f"request_file_path must be a string, got {self.request_file_path}"
             )
+        async with RepoSyncCoordinator.get().lock(self.request_file_path):
+            await self._set_request_branch(reuse_branch_repo)
+
+    async def _set_request_branch(self, reuse_branch_repo: bool):
         if reuse_branch_repo:
             if os.path.exists(self.request_file_path):
                 self.repo = Repo(self.request_file_path)
@@ -238,9 +251,9 @@ class IambicRepo:
                     self.request_file_path,
                     cwd=self.repo.working_dir,
                 )
-            except GitCommandError as err:
+            except Exception as err:
                 # The branch already exists so create the worktree for it
-                if "already exists" not in err.stderr:
+                if "already exists" not in str(err):
                     raise
                 await run_command(
                     "git",
@@ -262,7 +275,7 @@ class IambicRepo:
             if not isinstance(err, InvalidGitRepositoryError):
                 raise
             # Reset the repo
-            shutil.rmtree(self.file_path)
+            await aioshutil.rmtree(self.file_path)
             # The repo is on disk but it's not a git repo so we need to clone it
             log.debug({"message": "Cloning repo", **log_data})
             await self.clone_or_pull_git_repo()  # Ensure we have the latest changes on main
@@ -289,7 +302,9 @@ class IambicRepo:
                     desired_branch=self.request_branch_name,
                     **log_data,
                 )
-                self.repo.git.checkout(self.request_branch_name)
+                await run_command(
+                    "git", "checkout", self.request_branch_name, cwd=self.file_path
+                )
             await self.set_repo_auth()
         elif not os.path.exists(self.default_file_path):
             # The repo isn't on disk so we need to clone it before proceeding
@@ -300,7 +315,9 @@ class IambicRepo:
             # So, we want to pull the latest changes before we create the worktree
             log.debug({"message": "Adding tree to repo", **log_data})
             await self.clone_or_pull_git_repo()  # Ensure we have the latest changes on main
-            await self.set_request_branch()  # Create the worktree or sparse-checkout and set self.repo
+            # Create the worktree or sparse-checkout and set self.repo
+            # Reused if a concurrent call for the request created it while this one waited on the lock
+            await self.set_request_branch(reuse_branch_repo=True)
 
     async def _commit_and_push_changes(
         self,
@@ -494,13 +511,18 @@ class IambicRepo:
                 raise
 
     async def pull_current_branch(self):
-        branch_name = (
-            self.request_branch_name
-            if self.use_request_branch
-            else self.default_branch_name
-        )
-        remote = self.repo.remote(name=self.remote_name)
-        await aio_wrapper(remote.pull, refspec=f"{branch_name}")
+        if not self.use_request_branch:
+            await self.clone_or_pull_git_repo()
+            return
+
+        async with RepoSyncCoordinator.get().lock(self.request_file_path):
+            await run_command(
+                "git",
+                "pull",
+                self.remote_name,
+                self.request_branch_name,
+                cwd=self.repo.working_dir,
+            )
 
     async def get_main_sha(self, exclude_shas: list[str], until: datetime = None):
         until = until or datetime.utcnow()
@@ -1,13 +1,22 @@
+import asyncio
+import contextlib
+import fcntl
 import hashlib
+import os
 import time
-from typing import Optional
+import uuid
+import weakref
+from typing import Awaitable, Callable, Optional
 
+import aiofiles.os
+import aioshutil
 import httpx
 import jwt
 from sqlalchemy.dialects.postgresql import ENUM
 
 from common.config import config, models
 from common.config.globals import GITHUB_APP_ID, GITHUB_APP_PRIVATE_KEY
+from common.lib.asyncio import run_command
 from common.lib.redis import RedisHandler
 from common.models import IambicRepoDetails
 from common.tenants.models import Tenant  # noqa: F401
@@ -27,6 +36,178 @@ RequestStatus = ENUM(
 IAMBIC_REPOS_BASE_KEY = "iambic_repos"
 
 
+async def clone_repo_mirror(repo_uri: str, repo_path: str):
+    """
+    Blobless clone of a repo's default branch to be kept as a local mirror.
+
+    Blobs are fetched on demand when files are read so the clone only downloads commits and trees.
+    The full history is kept because the last updated date of a file is read from its latest commit.
+    The clone is made in a temporary directory and moved into place so an interrupted clone
+    never leaves a partial mirror behind.
+    """
+    tmp_repo_path = f"{repo_path}.clone-{uuid.uuid4().hex}"
+    await aiofiles.os.makedirs(os.path.dirname(repo_path), exist_ok=True)
+    try:
+        await run_command(
+            "git",
+            "clone",
+            "--config",
+            "core.symlinks=false",
+            "--filter=blob:none",
+            "--single-branch",
+            "--no-tags",
+            repo_uri,
+            tmp_repo_path,
+        )
+        if os.path.exists(repo_path):
+            await aioshutil.rmtree(repo_path)
+        await aiofiles.os.rename(tmp_repo_path, repo_path)
+    finally:
+        if os.path.exists(tmp_repo_path):
+            await aioshutil.rmtree(tmp_repo_path)
+
+
+async def fetch_repo_mirror(
+    repo_path: str, repo_uri: str, branch_name: str, remote_name: str = "origin"
+):
+    """
+    Update a mirror created by clone_repo_mirror to the latest commit on the branch.
+
+    Only the commits and trees added since the last fetch are downloaded.
+    The branch is force updated so a rewritten upstream history replaces the local one.
+    """
+    remote_ref = f"{remote_name}/{branch_name}"
+    # The access token in the URI expires so it's set on every fetch
+    await run_command("git", "remote", "set-url", remote_name, repo_uri, cwd=repo_path)
+    # Mirrors that were cloned shallow fetch the rest of their history once
+    unshallow = (
+        ["--unshallow"]
+        if os.path.exists(os.path.join(repo_path, ".git", "shallow"))
+        else []
+    )
+    await run_command(
+        "git",
+        "fetch",
+        "--filter=blob:none",
+        "--no-tags",
+        *unshallow,
+        remote_name,
+        f"+refs/heads/{branch_name}:refs/remotes/{remote_ref}",
+        cwd=repo_path,
+    )
+    await run_command(
+        "git", "checkout", "--force", "-B", branch_name, remote_ref, cwd=repo_path
+    )
+
+
+@contextlib.asynccontextmanager
+async def file_lock(lock_file_path: str, poll_interval: float = 0.1):
+    """
+    An exclusive flock on lock_file_path, polled so waiting doesn't block the event loop.
+
+    The lock is released when the file is closed, including when the process dies.
+    """
+    await aiofiles.os.makedirs(os.path.dirname(lock_file_path), exist_ok=True)
+    fd = os.open(lock_file_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                await asyncio.sleep(poll_interval)
+        yield
+    finally:
+        os.close(fd)
+
+
+class RepoSyncCoordinator:
+    """
+    Coordinates the git operations on a tenant's repos on disk across every IambicRepo instance in the process.
+
+    - Concurrent syncs of the same mirror share a single fetch
+    - A sync within `_global_.iambic.git_fetch_freshness_seconds` of the last one is skipped
+    - Syncs of the same mirror and operations on the same path, like creating a request branch's worktree,
+      are serialized across processes with `lock`
+
+    The state is per event loop because the celery tasks each run their own loop.
+    """
+
+    _coordinators: dict[asyncio.AbstractEventLoop, "RepoSyncCoordinator"] = {}
+
+    def __init__(self):
+        self._syncs: dict[str, asyncio.Task] = {}
+        self._last_synced: dict[str, float] = {}
+        self._locks: weakref.WeakValueDictionary[
+            str, asyncio.Lock
+        ] = weakref.WeakValueDictionary()
+
+    @classmethod
+    def get(cls) -> "RepoSyncCoordinator":
+        loop = asyncio.get_running_loop()
+        if loop not in cls._coordinators:
+            for closed_loop in [
+                other_loop for other_loop in cls._coordinators if other_loop.is_closed()
+            ]:
+                del cls._coordinators[closed_loop]
+            cls._coordinators[loop] = cls()
+        return cls._coordinators[loop]
+
+    @contextlib.asynccontextmanager
+    async def lock(self, repo_path: str):
+        """
+        Serialize operations on repo_path across every process using the tenant storage.
+
+        Waiters in this process queue on an asyncio.Lock, the holder then takes a file lock next to repo_path
+        which serializes it with the API workers and celery workers of every host mounting the storage.
+        """
+        if (lock := self._locks.get(repo_path)) is None:
+            lock = self._locks[repo_path] = asyncio.Lock()
+        async with lock:
+            async with file_lock(f"{repo_path.rstrip(os.sep)}.lock"):
+                yield
+
+    async def sync(
+        self,
+        repo_path: str,
+        sync_fn: Callable[[], Awaitable[None]],
+        force: bool = False,
+    ):
+        """
+        Run sync_fn unless the repo was synced within the freshness window.
+
+        If a sync of the repo is already running, waits for it instead of starting another.
+        A forced sync waits for the running one and then starts its own,
+        since the running one may have started before the change the caller needs.
+        """
+        if force and (task := self._syncs.get(repo_path)):
+            # Its failure is the other callers' to handle, this caller starts a new sync regardless
+            with contextlib.suppress(Exception):
+                await asyncio.shield(task)
+        elif not force:
+            freshness_seconds = config.get(
+                "_global_.iambic.git_fetch_freshness_seconds", 10
+            )
+            if time.time() - self._last_synced.get(repo_path, 0) < freshness_seconds:
+                return
+
+        if not (task := self._syncs.get(repo_path)):
+            task = asyncio.create_task(self._run_sync(repo_path, sync_fn))
+            self._syncs[repo_path] = task
+        # Shielded so a cancelled caller doesn't cancel the sync the other callers are waiting on
+        await asyncio.shield(task)
+
+    async def _run_sync(self, repo_path: str, sync_fn: Callable[[], Awaitable[None]]):
+        try:
+            # Other processes on the host, or on other hosts mounting the storage, may sync the same mirror
+            async with self.lock(repo_path):
+                started_at = time.time()
+                await sync_fn()
+            self._last_synced[repo_path] = started_at
+        finally:
+            self._syncs.pop(repo_path, None)
+
+
 def list_tenant_repo_details(tenant_name: str) -> list[IambicRepoDetails]:
     return (
         models.ModelAdapter(IambicRepoDetails)
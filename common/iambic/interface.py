@@ -1,9 +1,11 @@
 import hashlib
 import os
+from collections import defaultdict
 from pathlib import Path
 from typing import Any, Optional
 
 import ujson as json
+from cachetools import LRUCache
 from iambic.config.dynamic_config import load_config as load_config_template
 from iambic.config.utils import resolve_config_template_path
 from iambic.core.git import GitDiff
@@ -22,6 +24,79 @@ from common.lib.cache import store_json_results_in_redis_and_s3
 
 log = config.get_logger(__name__)
 
+# Parsed templates keyed by the template's full path, shared by every IambicConfigInterface in the process
+_PARSED_TEMPLATE_CACHE = LRUCache(
+    maxsize=config.get("_global_.iambic.parsed_template_cache_size", 20000)
+)
+
+
+def _load_templates_with_cache(template_paths, template_map: dict) -> list:
+    """
+    Load the templates, only parsing the files that changed since they were last parsed.
+
+    A file's entry is keyed by its modification time and size so a fetch or checkout that rewrites it,
+    or an uncommitted edit in a request branch's worktree, invalidates it.
+    The templates are shared between callers so they must be treated as read-only.
+    """
+    template_types = tuple(sorted(template_map))
+    cache_keys = {}
+    templates = {}
+    uncached_paths = []
+    for template_path in template_paths:
+        template_path = str(template_path)
+        try:
+            stat = os.stat(template_path)
+        except FileNotFoundError:
+            uncached_paths.append(template_path)
+            continue
+        cache_keys[template_path] = (stat.st_mtime_ns, stat.st_size, template_types)
+        cached = _PARSED_TEMPLATE_CACHE.get(template_path)
+        if cached and cached[0] == cache_keys[template_path]:
+            templates[template_path] = cached[1]
+        else:
+            uncached_paths.append(template_path)
+
+    if uncached_paths:
+        parsed_templates = defaultdict(list)
+        for template in iambic_load_templates(
+            uncached_paths, template_map, use_multiprocessing=False
+        ):
+            parsed_templates[str(template.file_path)].append(template)
+
+        if set(parsed_templates).issubset(uncached_paths):
+            for template_path in uncached_paths:
+                templates[template_path] = parsed_templates.get(template_path, [])
+                if cache_key := cache_keys.get(template_path):
+                    _PARSED_TEMPLATE_CACHE[template_path] = (
+                        cache_key,
+                        templates[template_path],
+                    )
+        else:
+            # Can't tell which file each template came from so none of them are cached
+            log.warning(
+                {
+                    "message": "Parsed templates don't match the requested paths",
+                    "template_paths": list(
+                        set(parsed_templates).difference(uncached_paths)
+                    )[:10],
+                }
+            )
+            return [
+                template
+                for template_path in template_paths
+                for template in templates.get(str(template_path), [])
+            ] + [
+                template
+                for path_templates in parsed_templates.values()
+                for template in path_templates
+            ]
+
+    return [
+        template
+        for template_path in template_paths
+        for template in templates[str(template_path)]
+    ]
+
 
 class IambicConfigInterface:
     def __init__(self, iambic_repo: IambicRepo) -> None:
@@ -88,13 +163,15 @@ class IambicConfigInterface:
         if not template_map:
             iambic_config = await self.get_iambic_config()
             template_map = iambic_config.template_map
-        return iambic_load_templates(
-            template_paths,
-            template_map,
-            use_multiprocessing=False,
-            *args,
-            **kwargs,
-        )
+        if args or kwargs:
+            return iambic_load_templates(
+                template_paths,
+                template_map,
+                use_multiprocessing=False,
+                *args,
+                **kwargs,
+            )
+        return _load_templates_with_cache(template_paths, template_map)
 
     async def retrieve_git_changes(
         self, template_map: dict[str, Any] = None, from_sha=None, to_sha=None
@@ -122,9 +199,7 @@ class IambicConfigInterface:
             raise Exception("Template not found")
 
         iambic_config = await self.get_iambic_config()
-        return iambic_load_templates(
-            [template_path], iambic_config.template_map, use_multiprocessing=False
-        )
+        return _load_templates_with_cache([template_path], iambic_config.template_map)
 
     async def cache_aws_templates(self):
         from iambic.core.utils import evaluate_on_provider
@@ -157,9 +232,7 @@ class IambicConfigInterface:
         config_template = await self.get_iambic_config()
         template_paths = await iambic_gather_templates(repo_path)
         tenant_templates.extend(
-            iambic_load_templates(
-                template_paths, config_template.template_map, use_multiprocessing=False
-            )
+            await self.load_templates(template_paths, config_template.template_map)
         )
         aws_accounts = config_template.aws.accounts
         for aws_account in aws_accounts:
@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import JSON, Column, ForeignKey, Index, Integer, String
+from sqlalchemy import JSON, Column, Computed, ForeignKey, Index, Integer, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -71,6 +71,18 @@ class IambicTemplate(Base):
         Index(
             "iambic_tmplt_tenant_repo_file_idx", "tenant_id", "repo_name", "file_path"
         ),
+        Index(
+            "iambic_tmplt_resource_id_trgm_idx",
+            "resource_id",
+            postgresql_using="gin",
+            postgresql_ops={"resource_id": "gin_trgm_ops"},
+        ),
+        Index(
+            "iambic_tmplt_friendly_name_trgm_idx",
+            "friendly_name",
+            postgresql_using="gin",
+            postgresql_ops={"friendly_name": "gin_trgm_ops"},
+        ),
         Index(
             "uix_iambic_tmplt_idx",
             "tenant_id",
@@ -101,11 +113,20 @@ class IambicTemplateContent(Base):
     tenant_id = Column(Integer, ForeignKey("tenant.id"))
     iambic_template_id = Column(UUID, ForeignKey("iambic_template.id"))
     content = Column(JSON)
+    # Hot JSON fields are extracted into generated columns so filters don't have to parse the content
+    iambic_managed = Column(
+        String, Computed("content ->> 'iambic_managed'", persisted=True)
+    )
 
     tenant = relationship("Tenant")
     iambic_template = relationship("IambicTemplate", back_populates="content")
 
     __table_args__ = (
+        Index(
+            "iambic_tmplt_content_managed_idx",
+            "tenant_id",
+            "iambic_managed",
+        ),
         Index(
             "uix_tenant_template_content_idx",
             "tenant_id",
@@ -148,6 +169,12 @@ class IambicTemplateProviderDefinition(Base):
         Index("itpd_template_id_idx", "iambic_template_id"),
         Index("itpd_template_resource_id_idx", "iambic_template_id", "resource_id"),
         Index("itpd_tenant_resource_idx", "tenant_id", "resource_id"),
+        Index(
+            "itpd_resource_id_trgm_idx",
+            "resource_id",
+            postgresql_using="gin",
+            postgresql_ops={"resource_id": "gin_trgm_ops"},
+        ),
         Index(
             "itpd_tenant_secondary_resource_idx", "tenant_id", "secondary_resource_id"
         ),
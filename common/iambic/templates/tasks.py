@@ -1,5 +1,7 @@
 import asyncio
+import json
 import sys
+import uuid
 from collections import defaultdict
 from datetime import datetime
 from itertools import chain
@@ -36,11 +38,65 @@ from common.iambic.templates.models import (
 )
 from common.iambic.templates.utils import get_template_str_value_for_provider_definition
 from common.lib.asyncio import NoqSemaphore
-from common.pg_core.utils import bulk_add, bulk_delete
+from common.pg_core.utils import bulk_add, bulk_copy, bulk_delete
 from common.tenants.models import Tenant
 
 log = saas_config.get_logger(__name__)
 
+# Column order of the rows built for the COPY based template load
+TEMPLATE_COPY_COLUMNS = (
+    "id",
+    "tenant_id",
+    "repo_name",
+    "file_path",
+    "template_type",
+    "provider",
+    "resource_type",
+    "resource_id",
+    "friendly_name",
+)
+TEMPLATE_CONTENT_COPY_COLUMNS = ("id", "tenant_id", "iambic_template_id", "content")
+TEMPLATE_PROVIDER_DEFINITION_COPY_COLUMNS = (
+    "id",
+    "tenant_id",
+    "iambic_template_id",
+    "resource_id",
+    "secondary_resource_id",
+    "tenant_provider_definition_id",
+)
+
+
+async def _copy_template_rows(
+    template_rows: list[tuple],
+    template_content_rows: list[tuple],
+    template_provider_definition_rows: list[tuple],
+):
+    """
+    Load the rows for a template create into the DB in a single transaction.
+
+    Templates are written first so the content and provider definition rows can reference them.
+    """
+    async with ASYNC_PG_SESSION() as session:
+        async with session.begin():
+            if template_rows:
+                await bulk_copy(
+                    IambicTemplate, TEMPLATE_COPY_COLUMNS, template_rows, session
+                )
+            if template_content_rows:
+                await bulk_copy(
+                    IambicTemplateContent,
+                    TEMPLATE_CONTENT_COPY_COLUMNS,
+                    template_content_rows,
+                    session,
+                )
+            if template_provider_definition_rows:
+                await bulk_copy(
+                    IambicTemplateProviderDefinition,
+                    TEMPLATE_PROVIDER_DEFINITION_COPY_COLUMNS,
+                    template_provider_definition_rows,
+                    session,
+                )
+
 
 async def create_tenant_templates_and_definitions(
     tenant: Tenant,
@@ -51,6 +107,9 @@ async def create_tenant_templates_and_definitions(
     """
     Create templates and template provider definitions for a tenant.
 
+    Rows are built as plain tuples with their keys assigned up front and loaded using COPY.
+    This avoids creating and flushing an ORM instance for every template, content and provider definition.
+
     Args:
         tenant (Tenant): The Tenant object for which templates and definitions are to be created.
         iambic_config_interface: The class used to interface with the tenant repo's IAMbic config instance.
@@ -58,9 +117,9 @@ async def create_tenant_templates_and_definitions(
         template_paths (list[str], optional): A list of template paths. Defaults to None.
     """
     template_type_provider_map = {}
-    iambic_templates = []
-    iambic_template_content_list = []
-    iambic_template_provider_definitions = []
+    iambic_template_rows = []
+    iambic_template_content_rows = []
+    iambic_template_provider_definition_rows = []
     is_full_create = not bool(template_paths)
     iambic_config = await iambic_config_interface.get_iambic_config()
     repo_name = iambic_config_interface.iambic_repo.repo_name
@@ -114,40 +173,47 @@ async def create_tenant_templates_and_definitions(
             )
             continue
 
-        # Create a new IambicTemplate instance and append to list
+        # Create the IambicTemplate row with its key assigned up front
+        # so the dependent rows can reference it without a round trip
+        iambic_template_id = uuid.uuid4()
         file_path = str(raw_iambic_template.file_path).replace(repo_dir, "")
         if file_path.startswith("/"):
             file_path = file_path[1:]
-        iambic_template = IambicTemplate(
-            tenant=tenant,
-            repo_name=repo_name,
-            file_path=file_path,
-            template_type=raw_iambic_template.template_type,
-            provider=provider,
-            resource_type=raw_iambic_template.resource_type,
-            resource_id=raw_iambic_template.resource_id,
-            friendly_name=raw_iambic_template.resource_id,
-        )
+        friendly_name = raw_iambic_template.resource_id
         # Friendly name to display on the frontend for group and app templates, since
         # the names aren't unique and the ID is not user friendly
         # TODO: duplicated logic
-        if iambic_template.template_type in [
+        if raw_iambic_template.template_type in [
             OKTA_GROUP_TEMPLATE_TYPE,
             OKTA_APP_TEMPLATE_TYPE,
         ]:
-            iambic_template.friendly_name = raw_iambic_template.properties.name
-        elif iambic_template.template_type == OKTA_USER_TEMPLATE_TYPE:  # type: ignore
-            iambic_template.friendly_name = raw_iambic_template.properties.username
-
-        iambic_templates.append(iambic_template)
+            friendly_name = raw_iambic_template.properties.name
+        elif raw_iambic_template.template_type == OKTA_USER_TEMPLATE_TYPE:  # type: ignore
+            friendly_name = raw_iambic_template.properties.username
+
+        iambic_template_rows.append(
+            (
+                iambic_template_id,
+                tenant_id,
+                repo_name,
+                file_path,
+                raw_iambic_template.template_type,
+                provider,
+                raw_iambic_template.resource_type,
+                raw_iambic_template.resource_id,
+                friendly_name,
+            )
+        )
 
-        # Create a new IambicTemplateContent instance and append to list
-        iambic_template_content = IambicTemplateContent(
-            tenant=tenant,
-            iambic_template=iambic_template,
-            content=raw_iambic_template.dict(exclude_unset=False),
+        # Serialize the content now so only the JSON string is held until the load
+        iambic_template_content_rows.append(
+            (
+                uuid.uuid4(),
+                tenant_id,
+                iambic_template_id,
+                json.dumps(raw_iambic_template.dict(exclude_unset=False)),
+            )
         )
-        iambic_template_content_list.append(iambic_template_content)
 
         provider_resolver = TRUSTED_PROVIDER_RESOLVER_MAP.get(provider)
         if provider_resolver.provider_defined_in_template:
@@ -169,12 +235,14 @@ async def create_tenant_templates_and_definitions(
                 )
                 raise KeyError("Unknown provider definition")
 
-            iambic_template_provider_definitions.append(
-                IambicTemplateProviderDefinition(
-                    tenant=tenant,
-                    iambic_template=iambic_template,
-                    resource_id=raw_iambic_template.resource_id,
-                    tenant_provider_definition=tpd,
+            iambic_template_provider_definition_rows.append(
+                (
+                    uuid.uuid4(),
+                    tenant_id,
+                    iambic_template_id,
+                    raw_iambic_template.resource_id,
+                    None,
+                    tpd.id,
                 )
             )
         else:
@@ -207,21 +275,25 @@ async def create_tenant_templates_and_definitions(
                         secondary_resource_id = await get_resource_arn(
                             tpd, raw_iambic_template
                         )
-                    iambic_template_provider_definitions.append(
-                        IambicTemplateProviderDefinition(
-                            tenant=tenant,
-                            iambic_template=iambic_template,
-                            tenant_provider_definition=tpd,
-                            secondary_resource_id=secondary_resource_id,
-                            resource_id=get_template_str_value_for_provider_definition(
+                    iambic_template_provider_definition_rows.append(
+                        (
+                            uuid.uuid4(),
+                            tenant_id,
+                            iambic_template_id,
+                            get_template_str_value_for_provider_definition(
                                 raw_iambic_template.resource_id, provider_def
                             ),
+                            secondary_resource_id,
+                            tpd.id,
                         )
                     )
 
     try:
-        if iambic_templates:
-            await bulk_add(iambic_templates)
+        await _copy_template_rows(
+            iambic_template_rows,
+            iambic_template_content_rows,
+            iambic_template_provider_definition_rows,
+        )
     except IntegrityError:
         log.error(
             {
@@ -244,7 +316,7 @@ async def create_tenant_templates_and_definitions(
                         IambicTemplate.tenant_id == tenant_id,
                         IambicTemplate.repo_name == repo_name,
                         IambicTemplate.file_path.in_(
-                            [t.file_path for t in iambic_templates]
+                            [row[3] for row in iambic_template_rows]
                         ),
                     )
                     .join(
@@ -274,13 +346,11 @@ async def create_tenant_templates_and_definitions(
             # Deletes templates, their content, and their definitions
             await bulk_delete(existing_templates, False)
 
-        if iambic_templates:
-            await bulk_add(iambic_templates)
-
-    if iambic_template_content_list:
-        await bulk_add(iambic_template_content_list)
-    if iambic_template_provider_definitions:
-        await bulk_add(iambic_template_provider_definitions)
+        await _copy_template_rows(
+            iambic_template_rows,
+            iambic_template_content_rows,
+            iambic_template_provider_definition_rows,
+        )
 
 
 async def update_tenant_template(
@@ -714,8 +784,12 @@ async def sync_tenant_templates_and_definitions(tenant_name: str):
             }
         )
 
-    for iambic_repo in iambic_repos:
-        await iambic_repo.clone_or_pull_git_repo()
+    await asyncio.gather(
+        *[
+            iambic_repo.clone_or_pull_git_repo(force=True)
+            for iambic_repo in iambic_repos
+        ]
+    )
 
     # TODO: Remove this legacy caching call
     iambic_repo = iambic_repos[0]
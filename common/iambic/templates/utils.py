@@ -7,7 +7,7 @@ from iambic.plugins.v0_1_0.okta.group.models import OKTA_GROUP_TEMPLATE_TYPE
 from iambic.plugins.v0_1_0.okta.user.models import OKTA_USER_TEMPLATE_TYPE
 from jinja2 import BaseLoader
 from jinja2.sandbox import ImmutableSandboxedEnvironment
-from sqlalchemy import String, or_, select
+from sqlalchemy import or_, select, union
 from sqlalchemy.orm import contains_eager, joinedload
 
 from common.config.globals import ASYNC_PG_SESSION
@@ -23,6 +23,7 @@ from common.lib.filter import (
     enrich_sqlalchemy_stmt_with_filter_obj,
     generate_paginated_response,
 )
+from common.pg_core.search import ilike_contains, ilike_startswith
 
 
 async def get_template_by_id(tenant_id: int, template_id: str) -> IambicTemplate:
@@ -44,6 +45,36 @@ async def get_template_by_id(tenant_id: int, template_id: str) -> IambicTemplate
         return items.scalars().one()
 
 
+def _template_ids_matching_resource_id(
+    tenant_id: int, template_type: str, resource_id: str
+):
+    """Select the IDs of templates where the template or one of its provider definitions matches the resource_id.
+
+    Each table is searched in its own branch of a UNION so each branch can use its trigram index.
+    """
+    template_filters = [ilike_contains(IambicTemplate.resource_id, resource_id)]
+    if template_type in [
+        OKTA_GROUP_TEMPLATE_TYPE,
+        OKTA_APP_TEMPLATE_TYPE,
+        OKTA_USER_TEMPLATE_TYPE,
+    ]:
+        template_filters.append(
+            ilike_startswith(IambicTemplate.friendly_name, resource_id)
+        )
+
+    return union(
+        select(IambicTemplate.id).filter(
+            IambicTemplate.tenant_id == tenant_id,
+            IambicTemplate.template_type == template_type,
+            or_(*template_filters),
+        ),
+        select(IambicTemplateProviderDefinition.iambic_template_id).filter(
+            IambicTemplateProviderDefinition.tenant_id == tenant_id,
+            ilike_contains(IambicTemplateProviderDefinition.resource_id, resource_id),
+        ),
+    )
+
+
 async def list_tenant_templates(
     tenant_id: int,
     template_ids: Optional[list[str]] = None,
@@ -72,7 +103,7 @@ async def list_tenant_templates(
         if template_type:
             stmt = stmt.filter(IambicTemplate.template_type == template_type)
 
-        if resource_id or provider_definition_ids or not exclude_template_provider_def:
+        if provider_definition_ids or not exclude_template_provider_def:
             stmt = stmt.join(
                 IambicTemplateProviderDefinition,
                 IambicTemplateProviderDefinition.iambic_template_id
@@ -80,18 +111,13 @@ async def list_tenant_templates(
             )
 
         if resource_id:
-            or_filters = [
-                IambicTemplate.resource_id.ilike(f"%{resource_id}%"),
-                IambicTemplateProviderDefinition.resource_id.ilike(f"%{resource_id}%"),
-            ]
-
-            if template_type in [
-                OKTA_GROUP_TEMPLATE_TYPE,
-                OKTA_APP_TEMPLATE_TYPE,
-                OKTA_USER_TEMPLATE_TYPE,
-            ]:
-                or_filters.append(IambicTemplate.friendly_name.ilike(f"{resource_id}%"))
-            stmt = stmt.filter(or_(*or_filters))
+            stmt = stmt.filter(
+                IambicTemplate.id.in_(
+                    _template_ids_matching_resource_id(
+                        tenant_id, template_type, resource_id
+                    )
+                )
+            )
 
         if not exclude_template_provider_def:
             options.append(contains_eager(IambicTemplate.provider_definition_refs))
@@ -109,10 +135,7 @@ async def list_tenant_templates(
         )
 
         if not include_import_only:
-            stmt = stmt.filter(
-                IambicTemplateContent.content.op("->>")("iambic_managed").cast(String)
-                != "import_only"
-            )
+            stmt = stmt.filter(IambicTemplateContent.iambic_managed != "import_only")
 
         if not exclude_template_content:
             options.append(contains_eager(IambicTemplate.content))
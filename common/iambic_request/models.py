@@ -8,6 +8,7 @@ from typing import Optional, Union
 from cryptography.hazmat.primitives import serialization
 from github import Github
 from github.File import File
+from github.PullRequest import PullRequest
 from iambic.core.utils import jws_encode_with_past_time
 from pydantic import BaseModel as PydanticBaseModel
 from pydantic.fields import Any
@@ -20,6 +21,7 @@ from common.config.globals import ASYNC_PG_SESSION, GITHUB_APP_APPROVE_PRIVATE_P
 from common.iambic.git.models import IambicRepo
 from common.lib import noq_json as json
 from common.lib.asyncio import aio_wrapper
+from common.lib.redis import RedisHandler
 from common.models import IambicTemplateChange, SelfServiceRequestData
 from common.pg_core.models import Base, SoftDeleteMixin
 from common.tenants.models import Tenant  # noqa: F401
@@ -94,6 +96,7 @@ class BasePullRequest(PydanticBaseModel):
     merge_on_approval: bool
     merged_at: datetime = None
     closed_at: datetime = None
+    pr_client: Any = None
     pr_provider: Any = None
     pr_obj: Any = None
     merge_commit_sha: Optional[str] = None
@@ -215,8 +218,8 @@ class BasePullRequest(PydanticBaseModel):
             self.tenant,
             self.iambic_repo.repo_name,
         )
-        # Ensure we have the latest refs
-        await base_iambic_repo.clone_or_pull_git_repo()
+        # Ensure we have the latest refs, including the merge commit
+        await base_iambic_repo.clone_or_pull_git_repo(force=True)
         merge_commit = base_iambic_repo.repo.commit(self.pr_obj.merge_commit_sha)
         parent_commit = merge_commit.parents[0]
         default_branch_commit = base_iambic_repo.repo.commit(
@@ -297,7 +300,7 @@ class BasePullRequest(PydanticBaseModel):
         # TODO: Delete the branch when we have a way to retrieve changes from the PR
         # await self.iambic_repo.delete_branch()
         if pull_default:
-            await self.iambic_repo.clone_or_pull_git_repo()
+            await self.iambic_repo.clone_or_pull_git_repo(force=True)
 
     async def _reject_request(self):
         """
@@ -332,6 +335,7 @@ class BasePullRequest(PydanticBaseModel):
         required_keys_to_exclude = {
             "tenant",
             "iambic_repo",
+            "pr_client",
             "pr_provider",
             "pr_obj",
         }
@@ -356,9 +360,11 @@ class GitHubPullRequest(BasePullRequest):
         if self.pr_provider:
             return self.pr_provider
 
-        self.pr_provider = Github(
-            await self.iambic_repo.get_repo_access_token()
-        ).get_repo(self.iambic_repo.repo_name)
+        self.pr_client = Github(await self.iambic_repo.get_repo_access_token())
+        # Lazy so building the provider doesn't cost a request, the repo's details are never read
+        self.pr_provider = self.pr_client.get_repo(
+            self.iambic_repo.repo_name, lazy=True
+        )
         return self.pr_provider
 
     async def _get_file_as_pr_file(
@@ -405,13 +411,56 @@ class GitHubPullRequest(BasePullRequest):
             **getattr(file, "_rawData"),
         )
 
+    @property
+    def snapshot_cache_key(self) -> str:
+        return f"{self.tenant.name}:iambic_request:{self.request_id}:pr_snapshot"
+
+    async def _get_pr_snapshot(self) -> Optional[dict]:
+        red = await RedisHandler().redis(self.tenant.name)
+        if snapshot := await aio_wrapper(red.get, self.snapshot_cache_key):
+            return json.loads(snapshot)
+
+    async def _store_pr_snapshot(self, files_sha: str):
+        red = await RedisHandler().redis(self.tenant.name)
+        snapshot = {
+            "etag": self.pr_obj.etag,
+            "pr_data": self.pr_obj.raw_data,
+            "files_sha": files_sha,
+            "is_closed": bool(self.merged_at or self.closed_at),
+            "review_state": self.review_state,
+            "approved_by": self.approved_by,
+            "comments": [comment.dict() for comment in self.comments],
+            "files": [file.dict() for file in self.files],
+        }
+        await aio_wrapper(
+            red.set,
+            self.snapshot_cache_key,
+            json.dumps(snapshot),
+            ex=config.get("_global_.iambic.pr_snapshot_ttl_seconds", 604800),
+        )
+
+    async def _load_pr_obj(self, snapshot: Optional[dict]) -> bool:
+        """Sets pr_obj and returns whether the PR changed since the snapshot was taken."""
+        pr_provider = await self.get_pr_provider()
+        if snapshot:
+            self.pr_obj = self.pr_client.create_from_raw_data(
+                PullRequest, snapshot["pr_data"], {"etag": snapshot["etag"]}
+            )
+            # update is a conditional request that returns whether the PR changed.
+            # An unchanged PR is a 304 that doesn't count against the rate limit.
+            # Reviews and comments bump the PR's updated_at so they change the ETag as well.
+            return await aio_wrapper(self.pr_obj.update)
+
+        self.pr_obj = await aio_wrapper(pr_provider.get_pull, self.pull_request_id)
+        return True
+
     async def load_pr(self):
         assert self.pull_request_id
         if not self.iambic_repo.request_id:
             await self._set_repo(False)
 
-        pr_provider = await self.get_pr_provider()
-        self.pr_obj = await aio_wrapper(pr_provider.get_pull, self.pull_request_id)
+        snapshot = await self._get_pr_snapshot()
+        pr_changed = await self._load_pr_obj(snapshot)
         self.merge_commit_sha = self.pr_obj.merge_commit_sha
         self.pull_request_id = self.pr_obj.number
         self.pull_request_url = self.pr_obj.html_url
@@ -420,6 +469,16 @@ class GitHubPullRequest(BasePullRequest):
         self.mergeable = self.pr_obj.mergeable
         self.merged_at = self.pr_obj.merged_at
         self.closed_at = self.pr_obj.closed_at
+        is_closed = bool(self.merged_at or self.closed_at)
+        sha = self.pr_obj.merge_commit_sha or self.pr_obj.head.sha
+
+        if not pr_changed:
+            self.review_state = snapshot["review_state"]
+            self.approved_by = snapshot["approved_by"]
+            self.comments = [GitComment(**comment) for comment in snapshot["comments"]]
+            self.files = [PullRequestFile(**file) for file in snapshot["files"]]
+            return
+
         self.approved_by = []
         reviews = await aio_wrapper(self.pr_obj.get_reviews)
         if not reviews:
@@ -451,22 +510,35 @@ class GitHubPullRequest(BasePullRequest):
                     )
                 )
 
-        previous_sha = None
-        if until := self.merged_at or self.closed_at:
-            commit_shas = [
-                commit.sha for commit in (await aio_wrapper(self.pr_obj.get_commits))
-            ]
-            if merge_sha := self.pr_obj.merge_commit_sha:
-                commit_shas.append(merge_sha)
-            previous_sha = await self.iambic_repo.get_main_sha(commit_shas, until)
-
-        files = await aio_wrapper(self.pr_obj.get_files)
-        sha = self.pr_obj.merge_commit_sha or self.pr_obj.head.sha
-        self.files = list(
-            await asyncio.gather(
-                *[self._get_file_as_pr_file(file, sha, previous_sha) for file in files]
+        if (
+            snapshot
+            and snapshot["files_sha"] == sha
+            and snapshot["is_closed"] == is_closed
+        ):
+            # The files only change with the head or merge commit
+            self.files = [PullRequestFile(**file) for file in snapshot["files"]]
+        else:
+            previous_sha = None
+            if until := self.merged_at or self.closed_at:
+                commit_shas = [
+                    commit.sha
+                    for commit in (await aio_wrapper(self.pr_obj.get_commits))
+                ]
+                if merge_sha := self.pr_obj.merge_commit_sha:
+                    commit_shas.append(merge_sha)
+                previous_sha = await self.iambic_repo.get_main_sha(commit_shas, until)
+
+            files = await aio_wrapper(self.pr_obj.get_files)
+            self.files = list(
+                await asyncio.gather(
+                    *[
+                        self._get_file_as_pr_file(file, sha, previous_sha)
+                        for file in files
+                    ]
+                )
             )
-        )
+
+        await self._store_pr_snapshot(sha)
 
     async def sign_and_comment(self, body: str, approved_by: Union[str, list[str]]):
         loaded_private_key = serialization.load_pem_private_key(
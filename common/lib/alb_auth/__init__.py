@@ -2,9 +2,6 @@ import base64
 import sys
 
 import jwt
-import requests
-import tornado.httpclient
-from jwt.algorithms import ECAlgorithm, RSAAlgorithm
 from jwt.exceptions import (
     ExpiredSignatureError,
     ImmatureSignatureError,
@@ -17,27 +14,21 @@ from okta_jwt.utils import verify_exp, verify_iat
 import common.lib.noq_json as json
 from common.config import config
 from common.exceptions.exceptions import MissingConfigurationValue, UnableToAuthenticate
+from common.lib.oidc.key_store import OidcKeyStore
 
 log = config.get_logger(__name__)
 
 
 async def populate_oidc_config(tenant):
-    http_client = tornado.httpclient.AsyncHTTPClient()
+    key_store = OidcKeyStore.get(tenant)
     metadata_url = config.get_tenant_specific_key(
         "get_user_by_aws_alb_auth_settings.access_token_validation.metadata_url",
         tenant,
     )
 
     if metadata_url:
-        res = await http_client.fetch(
-            metadata_url,
-            method="GET",
-            headers={
-                "Content-Type": "application/x-www-form-urlencoded",
-                "Accept": "application/json",
-            },
-        )
-        oidc_config = json.loads(res.body)
+        # Copied since the cached discovery document is shared between requests
+        oidc_config = dict(await key_store.get_document(metadata_url))
     else:
         jwks_uri = config.get_tenant_specific_key(
             "get_user_by_aws_alb_auth_settings.access_token_validation.jwks_uri",
@@ -49,24 +40,8 @@ async def populate_oidc_config(tenant):
             "jwks_uri": jwks_uri,
         }
 
-    # Fetch jwks_uri for jwt validation
-    res = await http_client.fetch(
-        oidc_config["jwks_uri"],
-        method="GET",
-        headers={
-            "Content-Type": "application/x-www-form-urlencoded",
-            "Accept": "application/json",
-        },
-    )
-    oidc_config["jwks_data"] = json.loads(res.body)
-    oidc_config["jwt_keys"] = {}
-    for k in oidc_config["jwks_data"]["keys"]:
-        key_type = k["kty"]
-        key_id = k["kid"]
-        if key_type == "RSA":
-            oidc_config["jwt_keys"][key_id] = RSAAlgorithm.from_jwk(json.dumps(k))
-        elif key_type == "EC":
-            oidc_config["jwt_keys"][key_id] = ECAlgorithm.from_jwk(json.dumps(k))
+    oidc_config["jwks_uris"] = [oidc_config["jwks_uri"]]
+    oidc_config["jwt_keys"] = await key_store.get_keys(oidc_config["jwks_uris"])
     oidc_config["aud"] = config.get_tenant_specific_key(
         "get_user_by_aws_alb_auth_settings.access_token_validation.client_id",
         tenant,
@@ -102,8 +77,7 @@ async def authenticate_user_by_alb_auth(request):
     kid = decoded_json["kid"]
     # Step 2: Get the public key from regional endpoint
     url = "https://public-keys.auth.elb." + config.region + ".amazonaws.com/" + kid
-    req = requests.get(url)
-    pub_key = req.text
+    pub_key = await OidcKeyStore.get(tenant).get_text(url)
     # Step 3: Get the payload
     payload = jwt.decode(encoded_auth_jwt, pub_key, algorithms=["ES256"])
     email = payload.get(
@@ -136,15 +110,17 @@ async def authenticate_user_by_alb_auth(request):
                 raise UnableToAuthenticate(
                     "Access Token header does not specify a signing algorithm."
                 )
-            access_token_pub_key = oidc_config["jwt_keys"][key_id]
+            access_token_pub_key = await OidcKeyStore.get(tenant).get_key(
+                oidc_config["jwks_uris"], key_id
+            )
 
         decoded_access_token = jwt.decode(
             access_token,
             access_token_pub_key,
             algorithms=[algorithm],
             options=access_token_verify_options,
-            audience=oidc_config.get_tenant_specific_key("aud", tenant),
-            issuer=oidc_config.get_tenant_specific_key("issuer", tenant),
+            audience=oidc_config.get("aud"),
+            issuer=oidc_config.get("issuer"),
         )
         # Step 5: Verify the access token.
         if not jwt_verify:
@@ -1,9 +1,21 @@
+import hashlib
+
+import common.lib.noq_json as json
+from common.config import config
 from common.group_memberships.models import upsert_and_remove_group_memberships
 from common.groups.models import upsert_groups_by_name
+from common.lib.redis import redis_hgetex, redis_hsetex
 from common.tenants.models import Tenant
 from common.users.models import User
 
 
+def get_group_fingerprint(groups: list[str], managed_by: str) -> str:
+    """A hash of the groups an identity provider asserted for a user, independent of their order."""
+    return hashlib.sha256(
+        json.dumps([managed_by, sorted(set(groups))]).encode()
+    ).hexdigest()
+
+
 async def maybe_create_users_groups_in_database(
     db_tenant: Tenant,
     user: str,
@@ -13,6 +25,13 @@ async def maybe_create_users_groups_in_database(
 ):
     db_user = await User.get_by_email(db_tenant, user)
     new_groups = []
+    fingerprints_redis_key = f"{db_tenant.name}_SSO_GROUP_FINGERPRINTS"
+    fingerprint = get_group_fingerprint(groups or [], managed_by)
+    if db_user and fingerprint == await redis_hgetex(
+        fingerprints_redis_key, user, db_tenant.name
+    ):
+        # The user's groups haven't changed since their last login, nothing to write
+        return
     if not db_user:
         from common.celery_tasks.celery_tasks import app as celery_app
 
@@ -46,6 +65,14 @@ async def maybe_create_users_groups_in_database(
             initiated_by=managed_by,
             tenant=db_tenant,
         )
+    # Expires so memberships changed outside of SSO are eventually restored by a login
+    await redis_hsetex(
+        fingerprints_redis_key,
+        user,
+        fingerprint,
+        config.get("_global_.auth.sso_group_fingerprint_ttl_seconds", 86400),
+        db_tenant.name,
+    )
     if new_groups:
         from common.celery_tasks.celery_tasks import app as celery_app
 
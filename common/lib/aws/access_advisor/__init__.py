@@ -1,13 +1,15 @@
+import asyncio
 import copy
 import datetime
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from blinker import Signal
 
 from common.config import config
 from common.config.models import ModelAdapter
 from common.lib.assume_role import get_boto3_instance, rate_limited
+from common.lib.asyncio import aio_wrapper
 from common.lib.aws.cached_resources.iam import (
     get_identity_arns_for_account,
     retrieve_iam_managed_policies_for_tenant,
@@ -67,6 +69,14 @@ class AccessAdvisor:
         self.max_access_advisor_job_wait = (
             5 * 60
         )  # Wait 5 minutes before giving up on jobs
+        # Jobs are polled with an exponential backoff between these delays, in seconds
+        self.job_poll_initial_delay = 1
+        self.job_poll_max_delay = 30
+        # Maximum concurrent IAM requests against the account
+        self.max_concurrent_requests = config.get_tenant_specific_key(
+            "access_advisor.max_concurrent_requests", tenant, 5
+        )
+        self._request_semaphore: Optional[asyncio.Semaphore] = None
 
     async def store_access_advisor_results(
         self, account_id: str, tenant: str, access_advisor_data: Dict[str, Any]
@@ -103,6 +113,7 @@ class AccessAdvisor:
         :param user: User making the request
         :return: Access Advisor data for identities across a single AWS account
         """
+        from common.aws.iam.policy.utils import calculate_unused_policy_for_identities
 
         try:
             assume_role = (
@@ -123,42 +134,59 @@ class AccessAdvisor:
             assume_role=assume_role,
         )
         arns = await get_identity_arns_for_account(tenant, account_id)
-        jobs = self._generate_job_ids(client, arns)
-        access_advisor_data = self._get_job_results(client, jobs)
+        iam_policies = await retrieve_iam_managed_policies_for_tenant(
+            tenant, account_id
+        )
+        access_advisor_data = {}
+        effective_identity_permissions = {}
+        # Effective permissions are calculated for each identity as soon as its job completes
+        async for arn, services_last_accessed in self.stream_access_advisor_data(
+            client, arns
+        ):
+            access_advisor_data[arn] = services_last_accessed
+            effective_identity_permissions.update(
+                await calculate_unused_policy_for_identities(
+                    tenant,
+                    [arn],
+                    iam_policies,
+                    {arn: services_last_accessed},
+                    account_id=account_id,
+                )
+            )
         if arns and not access_advisor_data:
             log.error("Didn't get any results from Access Advisor")
+
+        # Identities without Access Advisor results
+        remaining_arns = [arn for arn in arns if arn not in access_advisor_data]
+        if remaining_arns:
+            effective_identity_permissions.update(
+                await calculate_unused_policy_for_identities(
+                    tenant,
+                    remaining_arns,
+                    iam_policies,
+                    access_advisor_data,
+                    account_id=account_id,
+                )
+            )
+
         await self.store_access_advisor_results(account_id, tenant, access_advisor_data)
-        await self.generate_and_save_effective_identity_permissions(
-            tenant, account_id, arns, access_advisor_data
+        await self.store_effective_identity_permissions(
+            tenant, account_id, effective_identity_permissions
         )
         return access_advisor_data
 
-    async def generate_and_save_effective_identity_permissions(
+    async def store_effective_identity_permissions(
         self,
         tenant: str,
         account_id: str,
-        arns: List[str],
-        access_advisor_data: Dict[str, Any],
+        effective_identity_permissions: Dict[str, Any],
     ) -> bool:
-        """Generates and saves the "effective permissions" for each identity
-        arn in `arns`.
+        """Stores the "effective permissions" for identities across an account in S3.
 
         :param tenant: Tenant ID
         :param account_id: AWS Account ID
-        :return: Access Advisor data for identities across a single AWS account
+        :param effective_identity_permissions: Effective permissions by identity ARN
         """
-        from common.aws.iam.policy.utils import calculate_unused_policy_for_identities
-
-        iam_policies = await retrieve_iam_managed_policies_for_tenant(
-            tenant, account_id
-        )
-        effective_identity_permissions = await calculate_unused_policy_for_identities(
-            tenant,
-            arns,
-            iam_policies,
-            access_advisor_data,
-            account_id=account_id,
-        )
         await store_json_results_in_redis_and_s3(
             effective_identity_permissions,
             s3_bucket=config.get_tenant_specific_key(
@@ -208,132 +236,154 @@ class AccessAdvisor:
             params["Marker"] = marker
         return iam.get_service_last_accessed_details(**params)
 
-    def _generate_job_ids(self, iam, arns: List[str]) -> Dict[str, str]:
-        """Calls generate_service_last_accessed_details for each identity, and
-        generates a list of each pending Job ID
+    async def _call_iam(self, fn, *args, **kwargs):
+        async with self._request_semaphore:
+            return await aio_wrapper(fn, *args, **kwargs)
+
+    async def _generate_job_id(self, iam, arn: str) -> Optional[str]:
+        """Starts an Access Advisor job for an identity.
 
         :param iam: Boto3 IAM client
-        :param arns: A list of identity ARNs
-        :return: A dictionary of `job_id` to `arn`
+        :param arn: Identity ARN
+        :return: The Job ID, or None if the job couldn't be started
+        """
+        try:
+            return await self._call_iam(
+                self._generate_service_last_accessed_details, iam, arn
+            )
+        except iam.exceptions.NoSuchEntityException:
+            """We're here because this ARN disappeared since the call to get_identity_arns_for_account.
+            Log the missing ARN and move along.
+            """
+            log.info("ARN {arn} found gone when fetching details".format(arn=arn))
+        except Exception as e:
+            self.on_error.send(self, error=e)
+            log.error("Could not gather data from {0}.".format(arn), exc_info=True)
+
+    async def _wait_for_job(
+        self, iam, job_id: str, arn: str
+    ) -> Optional[Dict[str, Any]]:
+        """Polls an Access Advisor job with an exponential backoff until it's finished.
+
+        :param iam: Boto3 IAM client
+        :param job_id: Job ID from `generate_service_last_accessed_details` call
+        :param arn: Identity ARN the job is for
+        :return: The first page of the completed job's results, or None if the job didn't complete
         """
-        jobs = {}
-        for role_arn in arns:
+        deadline = time.time() + self.max_access_advisor_job_wait
+        delay = self.job_poll_initial_delay
+        while True:
+            await asyncio.sleep(delay)
             try:
-                job_id = self._generate_service_last_accessed_details(iam, role_arn)
-                jobs[job_id] = role_arn
-            except iam.exceptions.NoSuchEntityException:
-                """We're here because this ARN disappeared since the call to self._get_arns().
-                Log the missing ARN and move along.
-                """
-
-                log.info(
-                    "ARN {arn} found gone when fetching details".format(arn=role_arn)
+                details = await self._call_iam(
+                    self._get_service_last_accessed_details, iam, job_id
                 )
             except Exception as e:
                 self.on_error.send(self, error=e)
-                log.error(
-                    "Could not gather data from {0}.".format(role_arn), exc_info=True
-                )
-        return jobs
-
-    def _get_job_results(self, iam, jobs: Dict[str, str]) -> List[Dict[str, Any]]:
-        """Gets the results of the job IDs in `jobs`.
-
-        :param iam: Boto3 IAM client
-        :param jobs: A dictionary of `job_id` to `arn`
-        :return: Cumulative Access Advisor data for identities across a single AWS account
-        """
-        access_details = {}
-        job_queue = list(jobs.keys())
-        last_job_completion_time = time.time()
-
-        while job_queue:
+                log.error("Could not gather data from {0}.".format(arn), exc_info=True)
+                return None
 
-            # Check for timeout
-            now = time.time()
-            if now - last_job_completion_time > self.max_access_advisor_job_wait:
-                # We ran out of time, some jobs are unfinished
-                self._log_unfinished_jobs(job_queue, jobs)
+            if details["JobStatus"] != "IN_PROGRESS":
                 break
 
-            # Pull next job ID
-            job_id = job_queue.pop()
-            role_arn = jobs[job_id]
-            try:
-                details = self._get_service_last_accessed_details(iam, job_id)
-            except Exception as e:
-                self.on_error.send(self, error=e)
+            if time.time() + delay > deadline:
+                # We ran out of time
                 log.error(
-                    "Could not gather data from {0}.".format(role_arn), exc_info=True
+                    "Job {job_id} for ARN {arn} didn't finish".format(
+                        job_id=job_id,
+                        arn=arn,
+                    )
                 )
-                continue
+                return None
+            delay = min(delay * 2, self.job_poll_max_delay)
 
-            # Check job status
-            if details["JobStatus"] == "IN_PROGRESS":
-                job_queue.append(job_id)
-                continue
+        # Check for job failure
+        if details["JobStatus"] != "COMPLETED":
+            log_str = "Job {job_id} finished with unexpected status {status} for ARN {arn}.".format(
+                job_id=job_id, status=details["JobStatus"], arn=arn
+            )
 
-            # Check for job failure
-            if details["JobStatus"] != "COMPLETED":
-                log_str = "Job {job_id} finished with unexpected status {status} for ARN {arn}.".format(
-                    job_id=job_id, status=details["JobStatus"], arn=role_arn
-                )
+            failing_arns = config.get_tenant_specific_key(
+                "access_advisor.failing_arns", self.tenant, []
+            )
+            if arn in failing_arns:
+                log.info(log_str)
+            else:
+                log.error(log_str)
+            return None
 
-                failing_arns = self.current_app.config.get("FAILING_ARNS", {})
-                if role_arn in failing_arns:
-                    log.info(log_str)
-                else:
-                    log.error(log_str)
-
-                continue
-
-            # Job status must be COMPLETED. Save result.
-            last_job_completion_time = time.time()
-            updated_list = []
-
-            while True:
-                for detail in details.get("ServicesLastAccessed"):
-                    # create a copy, we're going to modify the time to epoch
-                    updated_item = copy.copy(detail)
-
-                    # AWS gives a datetime, convert to epoch
-                    last_auth = detail.get("LastAuthenticated")
-                    if last_auth:
-                        last_auth = int(time.mktime(last_auth.timetuple()) * 1000)
-                    else:
-                        last_auth = 0
-
-                    updated_item["LastAuthenticated"] = last_auth
-                    updated_list.append(updated_item)
-                if details.get("IsTruncated", False):
-                    try:
-                        details = self._get_service_last_accessed_details(
-                            iam, job_id, marker=details.get("Marker")
-                        )
-                    except Exception:
-                        log.error(
-                            "Could not gather data from {0}.".format(role_arn),
-                            exc_info=True,
-                        )
-                        break
+        return details
+
+    async def _get_job_result(
+        self, iam, arn: str
+    ) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+        """Runs an Access Advisor job for an identity and gets its results.
+
+        :param iam: Boto3 IAM client
+        :param arn: Identity ARN
+        :return: The ARN and the services it last accessed, or None if the job failed
+        """
+        job_id = await self._generate_job_id(iam, arn)
+        if not job_id:
+            return None
+
+        details = await self._wait_for_job(iam, job_id, arn)
+        if not details:
+            return None
+
+        updated_list = []
+        while True:
+            for detail in details.get("ServicesLastAccessed"):
+                # create a copy, we're going to modify the time to epoch
+                updated_item = copy.copy(detail)
+
+                # AWS gives a datetime, convert to epoch
+                last_auth = detail.get("LastAuthenticated")
+                if last_auth:
+                    last_auth = int(time.mktime(last_auth.timetuple()) * 1000)
                 else:
+                    last_auth = 0
+
+                updated_item["LastAuthenticated"] = last_auth
+                updated_list.append(updated_item)
+            if details.get("IsTruncated", False):
+                try:
+                    details = await self._call_iam(
+                        self._get_service_last_accessed_details,
+                        iam,
+                        job_id,
+                        marker=details.get("Marker"),
+                    )
+                except Exception:
+                    log.error(
+                        "Could not gather data from {0}.".format(arn),
+                        exc_info=True,
+                    )
                     break
+            else:
+                break
 
-            access_details[role_arn] = updated_list
+        return arn, updated_list
 
-        return access_details
+    async def stream_access_advisor_data(
+        self, iam, arns: List[str]
+    ) -> AsyncIterator[Tuple[str, List[Dict[str, Any]]]]:
+        """Runs Access Advisor jobs for every identity concurrently,
+        yielding each identity's results as soon as its job completes.
 
-    def _log_unfinished_jobs(self, job_queue, job_details):
-        """Logs the jobs that are unfinished.
+        Concurrent requests to IAM are limited by `access_advisor.max_concurrent_requests`.
 
-        :param job_queue: _description_
-        :param job_details: _description_
+        :param iam: Boto3 IAM client
+        :param arns: A list of identity ARNs
+        :return: An async iterator of ARN to the services it last accessed
         """
-        for job_id in job_queue:
-            role_arn = job_details[job_id]
-            log.error(
-                "Job {job_id} for ARN {arn} didn't finish".format(
-                    job_id=job_id,
-                    arn=role_arn,
-                )
-            )
+        self._request_semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        tasks = [asyncio.create_task(self._get_job_result(iam, arn)) for arn in arns]
+        try:
+            for task in asyncio.as_completed(tasks):
+                result = await task
+                if result:
+                    yield result
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -22,19 +22,13 @@ async def get_identity_arns_for_account(
     :param account_id: AWS Account ID
     :param identity_type: "user" (indicating AWS IAM User) or "role" (Indicating AWS IAM Role), defaults to "role"
     :raises NotImplementedError: When identity type is not supported
-    :return: _description_
+    :return: The identity ARNs in the account
     """
     if identity_type != "role":
         raise NotImplementedError(f"identity_type {identity_type} not implemented")
 
-    all_roles = await IAMRole.query(tenant, attributes_to_get=["arn"])
-    matching_roles = set()
-    for role in all_roles:
-        if ":role/service-role/" in role.arn:
-            continue
-        if role.arn.split(":")[4] == account_id:
-            matching_roles.add(role.arn)
-    return list(matching_roles)
+    role_arns = await IAMRole.get_account_role_arns(tenant, account_id)
+    return [arn for arn in role_arns if ":role/service-role/" not in arn]
 
 
 async def store_iam_managed_policies_for_tenant(
@@ -1,8 +1,6 @@
 import base64
-import json as original_json
 import sys
 import time
-from collections import defaultdict
 
 import simplejson as json
 from boto3.dynamodb.types import Binary  # noqa
@@ -12,14 +10,13 @@ from common.aws.utils import ResourceSummary
 from common.config import config
 from common.config.models import ModelAdapter
 from common.lib.aws.utils import simulate_iam_principal_action
-from common.lib.cache import store_json_results_in_redis_and_s3
 from common.lib.dynamo import UserDynamoHandler
-from common.lib.noq_json import SetEncoder
 from common.lib.notifications.models import (
     ConsoleMeUserNotification,
     ConsoleMeUserNotificationAction,
 )
 from common.lib.slack import send_slack_notification_new_notification
+from common.lib.v2.notifications import write_notifications
 from common.models import SpokeAccount
 
 log = config.get_logger(__name__)
@@ -255,37 +252,8 @@ was detected. This notification will disappear when a similar error has not occu
                     )
                 )
             )
-        new_or_changed_notifications_l = []
-        notifications_by_user_group = defaultdict(list)
-        for notification in new_or_changed_notifications.values():
-            new_or_changed_notifications_l.append(notification.dict())
-            for user_or_group in notification.users_or_groups:
-                notifications_by_user_group[user_or_group].append(notification.dict())
-        if new_or_changed_notifications_l:
-            ddb.parallel_write_table(
-                ddb.notifications_table, new_or_changed_notifications_l
-            )
-        if notifications_by_user_group:
-            for k, v in notifications_by_user_group.items():
-                notifications_by_user_group[k] = original_json.dumps(v, cls=SetEncoder)
-            await store_json_results_in_redis_and_s3(
-                notifications_by_user_group,
-                redis_key=config.get_tenant_specific_key(
-                    "notifications.redis_key",
-                    tenant,
-                    f"{tenant}_ALL_NOTIFICATIONS",
-                ),
-                redis_data_type="hash",
-                s3_bucket=config.get_tenant_specific_key(
-                    "notifications.s3.bucket", tenant
-                ),
-                s3_key=config.get_tenant_specific_key(
-                    "notifications.s3.key",
-                    tenant,
-                    "notifications/all_notifications_v1.json.gz",
-                ),
-                tenant=tenant,
-            )
+        new_or_changed_notifications_l = list(new_or_changed_notifications.values())
+        await write_notifications(new_or_changed_notifications_l, tenant)
         return {
             "error_count_by_role": error_count,
             "num_new_or_changed_notifications": len(new_or_changed_notifications_l),
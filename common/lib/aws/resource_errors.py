@@ -0,0 +1,55 @@
+"""Redis caches of the S3 and CloudTrail errors for each principal.
+
+The functions are blocking, call them using aio_wrapper from async code.
+"""
+from typing import Any, Dict, List
+
+import common.lib.noq_json as json
+from common.config import config
+from common.lib.redis import RedisHandler
+
+CLOUDTRAIL_ERRORS_TTL = 86400
+
+
+def _get_s3_errors_key(tenant: str) -> str:
+    return config.get_tenant_specific_key(
+        "redis.s3_errors", tenant, f"{tenant}_S3_ERRORS"
+    )
+
+
+def _get_cloudtrail_errors_key(tenant: str) -> str:
+    return config.get_tenant_specific_key(
+        "celery.cache_cloudtrail_errors_by_arn.redis_key",
+        tenant,
+        f"{tenant}_CLOUDTRAIL_ERRORS_BY_ARN",
+    )
+
+
+def get_all_s3_errors(tenant: str) -> Dict[str, List[Dict[str, Any]]]:
+    red = RedisHandler().redis_sync(tenant)
+    s3_errors = red.get(_get_s3_errors_key(tenant))
+    if s3_errors:
+        return json.loads(s3_errors)
+    return {}
+
+
+def get_s3_errors_for_arn(tenant: str, arn: str) -> List[Dict[str, Any]]:
+    return get_all_s3_errors(tenant).get(arn, [])
+
+
+def store_cloudtrail_error_counts_by_arn(tenant: str, error_counts: Dict[str, int]):
+    """Replace the cached CloudTrail error counts with `error_counts`, the number of errors by ARN."""
+    red = RedisHandler().redis_sync(tenant)
+    red.setex(
+        _get_cloudtrail_errors_key(tenant),
+        CLOUDTRAIL_ERRORS_TTL,
+        json.dumps(error_counts),
+    )
+
+
+def get_all_cloudtrail_error_counts(tenant: str) -> Dict[str, int]:
+    red = RedisHandler().redis_sync(tenant)
+    error_counts = red.get(_get_cloudtrail_errors_key(tenant))
+    if error_counts:
+        return json.loads(error_counts)
+    return {}
@@ -1,4 +1,4 @@
-from datetime import datetime
+import time
 
 from asgiref.sync import async_to_sync
 
@@ -13,15 +13,17 @@ from common.lib.redis import RedisHandler
 # TODO: Get other resource types here
 
 
-def cache_aws_resource_details(items, tenant):
-    """
-    Store all resource ARNs in Redis/S3. Items must have a TTL entry Used by typeahead endpoint.
-    """
+def _get_resource_arns_redis_keys(tenant: str) -> tuple[str, str]:
     redis_key = config.get_tenant_specific_key(
         "store_all_aws_resource_details.redis_key",
         tenant,
         f"{tenant}_ALL_AWS_RESOURCE_ARNS",
     )
+    # Sorted set of the ARNs scored by the epoch time each was last seen
+    return redis_key, f"{redis_key}_LAST_SEEN"
+
+
+def _get_resource_arns_s3_location(tenant: str) -> tuple[str, str]:
     s3_bucket = config.get_tenant_specific_key(
         "all_aws_resource_details.s3.bucket", tenant
     )
@@ -30,59 +32,80 @@ def cache_aws_resource_details(items, tenant):
         tenant,
         "all_aws_resource_details/all_aws_resource_details_v1.json.gz",
     )
+    return s3_bucket, s3_key
+
 
+def cache_aws_resource_details(items, tenant):
+    """
+    Add resource ARNs to the set used by the typeahead endpoint and mark them as seen.
+
+    Only the fields for the provided ARNs are written, so the per account tasks can run concurrently.
+    An ARN's entry is only written the first time it's seen, afterwards just its last seen time is updated.
+    Entries that are no longer seen are removed by sweep_stale_aws_resource_details.
+
+    :param items: The resources keyed by ARN
+    """
+    if not items:
+        return
+
+    redis_key, last_seen_key = _get_resource_arns_redis_keys(tenant)
     red = RedisHandler().redis_sync(tenant)
+    now = int(time.time())
+    entry = json.dumps({"first_seen": now})
 
-    existing_items = async_to_sync(retrieve_json_data_from_redis_or_s3)(
-        redis_key=redis_key,
-        redis_data_type="hash",
-        s3_bucket=s3_bucket,
-        s3_key=s3_key,
-        tenant=tenant,
-        default={},
-    )
-    items.update(existing_items)
-    to_delete = []
-    for arn, item in items.items():
-        if isinstance(item, str):
-            item = json.loads(item)
-        if not item.get("ttl"):
-            raise Exception("Item is missing TTL")
-        if datetime.fromtimestamp(item["ttl"]) < datetime.utcnow():
-            to_delete.append(arn)
-        items[arn] = item
-    for arn in to_delete:
-        del items[arn]
-    if to_delete:
-        red.hdel(redis_key, *to_delete)
-
-    for k, v in items.items():
-        items[k] = json.dumps({"ttl": v["ttl"]})
-
-    async_to_sync(store_json_results_in_redis_and_s3)(
-        items,
-        redis_key=redis_key,
-        redis_data_type="hash",
-        s3_bucket=s3_bucket,
-        s3_key=s3_key,
-        tenant=tenant,
-    )
+    pipeline = red.pipeline(transaction=False)
+    for arn in items.keys():
+        pipeline.hsetnx(redis_key, arn, entry)
+    pipeline.zadd(last_seen_key, {arn: now for arn in items.keys()})
+    pipeline.execute()
+
+
+def sweep_stale_aws_resource_details(tenant, max_age: int = None) -> int:
+    """
+    Remove the resource ARNs that haven't been seen within `max_age` seconds and back up the rest to S3.
+
+    :param max_age: Defaults to `store_all_aws_resource_details.max_age_seconds`, 6 hours if not set
+    :return: The number of ARNs removed
+    """
+    if max_age is None:
+        max_age = config.get_tenant_specific_key(
+            "store_all_aws_resource_details.max_age_seconds", tenant, 21600
+        )
+
+    redis_key, last_seen_key = _get_resource_arns_redis_keys(tenant)
+    red = RedisHandler().redis_sync(tenant)
+    now = int(time.time())
+    stale_before = now - max_age
+
+    if red.hlen(redis_key) > red.zcard(last_seen_key):
+        # Entries written before last seen times were tracked start from now
+        red.zadd(last_seen_key, {arn: now for arn in red.hkeys(redis_key)}, nx=True)
+
+    stale_arns = red.zrangebyscore(last_seen_key, "-inf", stale_before)
+    if stale_arns:
+        pipeline = red.pipeline(transaction=False)
+        pipeline.hdel(redis_key, *stale_arns)
+        # Only removes the scores that are still stale. An ARN seen again since the lookup above
+        # keeps its score and its entry is added back by the next cache_aws_resource_details call.
+        pipeline.zremrangebyscore(last_seen_key, "-inf", stale_before)
+        pipeline.execute()
+
+    s3_bucket, s3_key = _get_resource_arns_s3_location(tenant)
+    all_resources = red.hgetall(redis_key)
+    if all_resources:
+        async_to_sync(store_json_results_in_redis_and_s3)(
+            all_resources,
+            s3_bucket=s3_bucket,
+            s3_key=s3_key,
+            tenant=tenant,
+        )
+
+    return len(stale_arns)
 
 
 async def get_all_resource_arns(tenant):
-    redis_key = config.get_tenant_specific_key(
-        "store_all_aws_resource_details.redis_key",
-        tenant,
-        f"{tenant}_ALL_AWS_RESOURCE_ARNS",
-    )
-    s3_bucket = config.get_tenant_specific_key(
-        "all_aws_resource_details.s3.bucket", tenant
-    )
-    s3_key = config.get_tenant_specific_key(
-        "all_aws_resource_details.s3.file",
-        tenant,
-        "all_aws_resource_details/all_aws_resource_details_v1.json.gz",
-    )
+    redis_key, _ = _get_resource_arns_redis_keys(tenant)
+    s3_bucket, s3_key = _get_resource_arns_s3_location(tenant)
 
     items = await retrieve_json_data_from_redis_or_s3(
         redis_key=redis_key,
@@ -1,4 +1,3 @@
-import gzip
 import json
 import sys
 import time
@@ -14,6 +13,7 @@ from common.exceptions.exceptions import (
     UnsupportedRedisDataType,
 )
 from common.lib.asyncio import aio_wrapper, run_in_parallel
+from common.lib.cache.codecs import decode_cache_object, encode_cache_object
 from common.lib.noq_json import SetEncoder
 from common.lib.plugins import get_plugin_by_name
 from common.lib.redis import RedisHandler
@@ -126,14 +126,14 @@ async def store_json_results_in_redis_and_s3(
         s3_extra_kwargs = {}
         if isinstance(s3_expires, int):
             s3_extra_kwargs["Expires"] = datetime.utcfromtimestamp(s3_expires)
-        data_for_s3 = json.dumps(
-            {"last_updated": last_updated, "data": data},
-            cls=SetEncoder,
-            default=json_encoder,
-            indent=2,
-        ).encode()
-        if s3_key.endswith(".gz"):
-            data_for_s3 = gzip.compress(data_for_s3)
+        # The format is determined by the key suffix, see common.lib.cache.codecs
+        data_for_s3 = await aio_wrapper(
+            encode_cache_object,
+            data,
+            last_updated,
+            s3_key,
+            json_encoder=json_encoder,
+        )
 
         put_object(
             Bucket=s3_bucket,
@@ -244,9 +244,9 @@ async def retrieve_json_data_from_redis_or_s3(
         s3_object_content = await aio_wrapper(s3_object["Body"].read)
         if not s3_object_content and default is not None:
             return default
-        if s3_key.endswith(".gz"):
-            s3_object_content = gzip.decompress(s3_object_content)
-        data_object = json.loads(s3_object_content, object_hook=json_object_hook)
+        data_object = await aio_wrapper(
+            decode_cache_object, s3_object_content, json_object_hook=json_object_hook
+        )
         data = data_object["data"]
 
         if data and max_age:
@@ -0,0 +1,154 @@
+"""Encoding of the cache objects written to S3.
+
+The format is chosen by the S3 key suffix when writing:
+    .msgpack.zst - msgpack in a zstd compressed, versioned envelope
+    .json.zst - JSON (orjson) in a zstd compressed, versioned envelope
+    .gz - gzipped JSON, the original format
+    anything else - plain JSON
+
+Reads don't rely on the key suffix. The format is detected from the object's leading bytes,
+so objects written in any of the formats can always be read.
+"""
+import gzip
+import json
+import struct
+from typing import Any, Callable, Optional
+
+import msgpack
+import orjson
+import zstandard
+
+from common.config import config
+from common.lib.noq_json import SetEncoder
+
+ENVELOPE_MAGIC = b"NOQC"
+ENVELOPE_VERSION = 1
+ENVELOPE_HEADER = struct.Struct(">4sBB")
+
+CODEC_JSON = 1
+CODEC_MSGPACK = 2
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+SUFFIX_CODEC_MAP = {
+    ".msgpack.zst": CODEC_MSGPACK,
+    ".json.zst": CODEC_JSON,
+}
+
+
+def _get_default_encoder(json_encoder: Optional[Callable]) -> Callable:
+    # Matches json.dumps(cls=SetEncoder, default=json_encoder) where a provided default replaces SetEncoder.default
+    return json_encoder or SetEncoder().default
+
+
+def _encode_json(obj: Any, json_encoder: Optional[Callable]) -> bytes:
+    return orjson.dumps(
+        obj,
+        default=_get_default_encoder(json_encoder),
+        option=orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS,
+    )
+
+
+def _encode_msgpack(obj: Any, json_encoder: Optional[Callable]) -> bytes:
+    default = _get_default_encoder(json_encoder)
+
+    def _default(value):
+        # msgpack only serializes lists and tuples natively
+        if isinstance(value, (set, frozenset)):
+            return list(value)
+        return default(value)
+
+    return msgpack.packb(obj, default=_default, use_bin_type=True, datetime=False)
+
+
+def get_cache_codec(s3_key: str) -> Optional[int]:
+    """Get the envelope codec for an S3 key, or None if the key uses a legacy JSON format."""
+    for suffix, codec in SUFFIX_CODEC_MAP.items():
+        if s3_key.endswith(suffix):
+            return codec
+    return None
+
+
+def encode_cache_object(
+    data: Any,
+    last_updated: int,
+    s3_key: str,
+    json_encoder: Optional[Callable] = None,
+) -> bytes:
+    """
+    Encode cached data for storage in S3 using the format for the key's suffix.
+
+    This is CPU bound for large caches so call it using aio_wrapper from async code.
+
+    :param data: The data being cached
+    :param last_updated: Epoch time the data was generated
+    :param s3_key: The S3 key the object will be written to
+    :param json_encoder: Default encoder for objects the serializer doesn't support
+    :return: The bytes to write to S3
+    """
+    cache_object = {"last_updated": last_updated, "data": data}
+    codec = get_cache_codec(s3_key)
+
+    if codec is None:
+        encoded = json.dumps(
+            cache_object, cls=SetEncoder, default=json_encoder
+        ).encode()
+        if s3_key.endswith(".gz"):
+            encoded = gzip.compress(encoded)
+        return encoded
+
+    if codec == CODEC_MSGPACK:
+        payload = _encode_msgpack(cache_object, json_encoder)
+    else:
+        payload = _encode_json(cache_object, json_encoder)
+
+    compressor = zstandard.ZstdCompressor(
+        level=config.get("_global_.cache.zstd_compression_level", 3)
+    )
+    return compressor.compress(
+        ENVELOPE_HEADER.pack(ENVELOPE_MAGIC, ENVELOPE_VERSION, codec) + payload
+    )
+
+
+def decode_cache_object(
+    content: bytes, json_object_hook: Optional[Callable] = None
+) -> dict:
+    """
+    Decode an S3 cache object written in any of the supported formats.
+
+    This is CPU bound for large caches so call it using aio_wrapper from async code.
+
+    :param content: The raw bytes of the S3 object
+    :param json_object_hook: Called with every decoded dict, like json.loads object_hook
+    :return: The cache object, a dict with the last_updated time and the data
+    """
+    if content.startswith(GZIP_MAGIC):
+        return json.loads(gzip.decompress(content), object_hook=json_object_hook)
+
+    if not content.startswith(ZSTD_MAGIC):
+        return json.loads(content, object_hook=json_object_hook)
+
+    content = zstandard.ZstdDecompressor().decompress(content)
+    magic, version, codec = ENVELOPE_HEADER.unpack_from(content)
+    if magic != ENVELOPE_MAGIC or version > ENVELOPE_VERSION:
+        raise ValueError(
+            f"Unsupported cache envelope. Magic: {magic!r}, Version: {version}"
+        )
+
+    payload = memoryview(content)[ENVELOPE_HEADER.size :]
+    if codec == CODEC_MSGPACK:
+        return msgpack.unpackb(
+            payload,
+            raw=False,
+            strict_map_key=False,
+            object_hook=json_object_hook,
+        )
+    elif codec == CODEC_JSON:
+        if json_object_hook:
+            return json.loads(bytes(payload), object_hook=json_object_hook)
+        return orjson.loads(payload)
+
+    raise ValueError(f"Unsupported cache envelope codec: {codec}")
@@ -1,8 +1,10 @@
+import functools
 import json
 import re
 import sys
+import threading
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 
 import boto3
 import sentry_sdk
@@ -12,6 +14,7 @@ from common.config import config
 from common.config.models import ModelAdapter
 from common.exceptions.exceptions import DataNotRetrievable
 from common.lib.assume_role import boto3_cached_conn
+from common.lib.asyncio import NoqSemaphore, aio_wrapper
 from common.lib.dynamo import UserDynamoHandler
 from common.models import (
     CloudtrailDetection,
@@ -22,50 +25,142 @@ from common.models import (
 log = config.get_logger(__name__)
 
 
-def process_event(event: Dict[str, Any], account_id: str, tenant: str):
-    access_undenied_config = access_undenied.common.Config()
-    access_undenied_config.session = boto3.Session()
-    access_undenied_config.account_id = access_undenied_config.session.client(
-        "sts"
-    ).get_caller_identity()["Account"]
-    try:
-        spoke_account_name = (
-            ModelAdapter(SpokeAccount)
-            .load_config("spoke_accounts", tenant)
-            .with_query({"account_id": account_id})
-            .first.name
+@functools.lru_cache(maxsize=1)
+def get_caller_account_id() -> str:
+    """The account of the credentials the deny analysis is run with. It doesn't change for the life of the process."""
+    return boto3.Session().client("sts").get_caller_identity()["Account"]
+
+
+class AccessUndeniedConfigCache:
+    """
+    Reuses access_undenied configs, and the boto3 clients they hold, for every event from an account.
+
+    Configs are cached per thread because boto3 sessions aren't thread safe.
+    Create a cache for each run so the clients don't outlive their assumed role credentials.
+    """
+
+    def __init__(self, tenant: str):
+        self.tenant = tenant
+        self._spoke_account_names = {}
+        self._spoke_account_names_lock = threading.Lock()
+        self._local = threading.local()
+
+    def get_spoke_account_name(self, account_id: str) -> Optional[str]:
+        with self._spoke_account_names_lock:
+            if account_id not in self._spoke_account_names:
+                try:
+                    self._spoke_account_names[account_id] = (
+                        ModelAdapter(SpokeAccount)
+                        .load_config("spoke_accounts", self.tenant)
+                        .with_query({"account_id": account_id})
+                        .first.name
+                    )
+                except ValueError:
+                    # Account no longer a part of the tenant
+                    self._spoke_account_names[account_id] = None
+            return self._spoke_account_names[account_id]
+
+    def get(self, account_id: str) -> Optional[access_undenied.common.Config]:
+        configs = getattr(self._local, "configs", None)
+        if configs is None:
+            configs = self._local.configs = {}
+        if account_id in configs:
+            return configs[account_id]
+
+        spoke_account_name = self.get_spoke_account_name(account_id)
+        if not spoke_account_name:
+            configs[account_id] = None
+            return None
+
+        access_undenied_config = access_undenied.common.Config()
+        access_undenied_config.session = boto3.Session()
+        access_undenied_config.account_id = get_caller_account_id()
+        access_undenied_config.tenant = self.tenant
+        access_undenied_config.region = config.region
+        access_undenied_config.iam_client = boto3_cached_conn(
+            "iam",
+            access_undenied_config.tenant,
+            None,
+            account_number=account_id,
+            assume_role=spoke_account_name,
+            region=access_undenied_config.region,
+            sts_client_kwargs=dict(
+                region_name=access_undenied_config.region,
+                endpoint_url=f"https://sts.{access_undenied_config.region}.amazonaws.com",
+            ),
+            session_name="noq_process_event",
         )
-    except ValueError:
-        # Account no longer a part of the tenant
-        return None
-    access_undenied_config.tenant = tenant
-    access_undenied_config.region = config.region
-    access_undenied_config.iam_client = boto3_cached_conn(
-        "iam",
-        access_undenied_config.tenant,
-        None,
-        account_number=account_id,
-        assume_role=spoke_account_name,
-        region=access_undenied_config.region,
-        sts_client_kwargs=dict(
-            region_name=access_undenied_config.region,
-            endpoint_url=f"https://sts.{access_undenied_config.region}.amazonaws.com",
-        ),
-        session_name="noq_process_event",
-    )
 
-    access_undenied.cli.initialize_config_from_user_input(
-        config=access_undenied_config,
-        cross_account_role_name=(spoke_account_name),
-        management_account_role_arn=(
-            f"arn:aws:iam::{account_id}:role/{spoke_account_name}"
-        ),
-        output_file=sys.stdout,
-        suppress_output=True,
-    )
+        access_undenied.cli.initialize_config_from_user_input(
+            config=access_undenied_config,
+            cross_account_role_name=(spoke_account_name),
+            management_account_role_arn=(
+                f"arn:aws:iam::{account_id}:role/{spoke_account_name}"
+            ),
+            output_file=sys.stdout,
+            suppress_output=True,
+        )
+        configs[account_id] = access_undenied_config
+        return access_undenied_config
+
+
+def process_event(
+    event: Dict[str, Any],
+    account_id: str,
+    tenant: str,
+    config_cache: Optional[AccessUndeniedConfigCache] = None,
+):
+    if config_cache is None:
+        config_cache = AccessUndeniedConfigCache(tenant)
+
+    access_undenied_config = config_cache.get(account_id)
+    if not access_undenied_config:
+        return None
     return access_undenied.analysis.analyze(access_undenied_config, event)
 
 
+def get_generated_policies(generated_policy) -> Tuple[bool, Optional[Dict[str, Any]]]:
+    """
+    Get the policy generated for a deny by access_undenied.
+
+    :return: Whether the event counts towards the number of processed events,
+        and the generated policy if the deny should be cached
+    """
+    if generated_policy is None:
+        log.warning("Unable to process cloudtrail deny event")
+        return True, None
+
+    if (
+        generated_policy.assessment_result
+        == access_undenied.common.AccessDeniedReason.ERROR
+    ):
+        log.warning(
+            f"Unable to process cloudtrail deny event: {generated_policy.error_message}"
+        )
+        return False, None
+
+    if (
+        generated_policy.assessment_result
+        == access_undenied.common.AccessDeniedReason.ALLOWED
+    ):
+        log.info("Allowing event")
+        return False, None
+
+    if (
+        not hasattr(generated_policy, "result_details")
+        or not generated_policy.result_details.policies
+        or len(generated_policy.result_details.policies) == 0
+    ):
+        log.warning(
+            "TODO/TECH-DEBT: deal with errors when result_details is not defined"
+        )
+        return False, None
+
+    if "Policy" in generated_policy.result_details.policies[0]:
+        return True, generated_policy.result_details.policies[0]["Policy"]
+    return True, generated_policy.result_details.policies[0]["PolicyStatement"]
+
+
 def get_resource_from_cloudtrail_deny(
     event: CloudtrailDetection, raw_ct_event: Dict[str, Any]
 ) -> str:
@@ -101,6 +196,219 @@ def get_resource_from_cloudtrail_deny(
     return resource
 
 
+def parse_cloudtrail_deny_message(
+    message: Dict[str, Any], tenant: str, event_ttl: int
+) -> Optional[Tuple[CloudtrailDetection, Dict[str, Any]]]:
+    """
+    Parse an SQS message containing a CloudTrail access deny.
+
+    :return: The deny and the raw CloudTrail event, or None if the message can't be processed
+    """
+    message_body = json.loads(message["Body"])
+    try:
+        if "Message" in message_body:
+            decoded_message = json.loads(message_body["Message"])["detail"]
+        else:
+            decoded_message = message_body["detail"]
+    except Exception as e:
+        log.error(
+            {
+                "function": f"{__name__}.{sys._getframe().f_code.co_name}",
+                "tenant": tenant,
+                "message": "Unable to process Cloudtrail message",
+                "message_body": message_body,
+                "error": str(e),
+            }
+        )
+        sentry_sdk.capture_exception()
+        return None
+    event_name = decoded_message.get("eventName")
+    event_source = decoded_message.get("eventSource")
+    for event_source_substitution in config.get_tenant_specific_key(
+        "event_bridge.detect_cloudtrail_denies_and_update_cache.event_bridge_substitutions",
+        tenant,
+        [".amazonaws.com"],
+    ):
+        event_source = event_source.replace(event_source_substitution, "")
+    event_time = decoded_message.get("eventTime")
+    utc_time = datetime.strptime(event_time, "%Y-%m-%dT%H:%M:%SZ")
+    epoch_event_time = int((utc_time - datetime(1970, 1, 1)).total_seconds())
+    try:
+        session_name = decoded_message["userIdentity"]["arn"].split("/")[-1]
+    except (
+        IndexError,
+        KeyError,
+    ):  # If IAM user, there won't be a session name
+        session_name = ""
+    try:
+        principal_arn = decoded_message["userIdentity"]["sessionContext"][
+            "sessionIssuer"
+        ]["arn"]
+    except KeyError:  # Skip events without a parsable ARN
+        return None
+
+    event_call = f"{event_source}:{event_name}"
+
+    event = CloudtrailDetection(
+        tenant=tenant,
+        error_code=decoded_message.get("errorCode"),
+        error_message=decoded_message.get("errorMessage"),
+        arn=principal_arn,
+        session_name=session_name,
+        source_ip=decoded_message["sourceIPAddress"],
+        event_call=event_call,
+        epoch_event_time=epoch_event_time,
+        ttl=epoch_event_time + event_ttl,
+        count=1,
+    )
+
+    event.resource = get_resource_from_cloudtrail_deny(event, decoded_message)
+    event.request_id = f"{principal_arn}-{session_name}-{event_call}-{event.resource}"
+    return event, decoded_message
+
+
+class CloudTrailDenyPipeline:
+    """
+    Analyzes the CloudTrail access denies from a tenant's SQS queue and caches them in Dynamo.
+
+    - Messages are long polled from the queue in batches.
+    - Denies are deduplicated by their request_id, so each distinct deny is only analyzed once per run.
+      Repeats of a deny increment its count.
+    - Distinct denies in a batch are analyzed concurrently, bounded by `max_concurrency`.
+    - Only the denies that were new or changed by a batch are written to Dynamo,
+      and the batch is deleted from the queue once they're written.
+    """
+
+    def __init__(
+        self,
+        tenant: str,
+        sqs_client,
+        queue_url: str,
+        event_ttl: int,
+        max_num_messages_to_process: int,
+    ):
+        self.tenant = tenant
+        self.sqs_client = sqs_client
+        self.queue_url = queue_url
+        self.event_ttl = event_ttl
+        self.max_num_messages_to_process = max_num_messages_to_process
+        self.dynamo = UserDynamoHandler(tenant=tenant)
+        self.config_cache = AccessUndeniedConfigCache(tenant)
+        self.wait_time_seconds = config.get_tenant_specific_key(
+            "event_bridge.detect_cloudtrail_denies_and_update_cache.wait_time_seconds",
+            tenant,
+            10,
+        )
+        self.analysis_semaphore = NoqSemaphore(
+            self._analyze_event,
+            config.get_tenant_specific_key(
+                "event_bridge.detect_cloudtrail_denies_and_update_cache.max_concurrency",
+                tenant,
+                10,
+            ),
+            callback_is_async=False,
+        )
+        # Denies seen this run by request_id
+        self.cloudtrail_denies: Dict[str, CloudtrailDetection] = {}
+        self.num_events = 0
+        self.new_events = 0
+        self.reached_limit_on_num_messages_to_process = False
+
+    def _analyze_event(
+        self, raw_event: Dict[str, Any]
+    ) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        return get_generated_policies(
+            process_event(
+                raw_event,
+                raw_event.get("recipientAccountId"),
+                self.tenant,
+                self.config_cache,
+            )
+        )
+
+    async def receive_messages(self) -> List[Dict[str, Any]]:
+        response = await aio_wrapper(
+            self.sqs_client.receive_message,
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=10,
+            WaitTimeSeconds=self.wait_time_seconds,
+        )
+        return response.get("Messages", [])
+
+    async def process_messages(self, messages: List[Dict[str, Any]]):
+        changed_request_ids = set()
+        unanalyzed_events = {}
+        for message in messages:
+            parsed_message = parse_cloudtrail_deny_message(
+                message, self.tenant, self.event_ttl
+            )
+            if not parsed_message:
+                continue
+
+            event, raw_event = parsed_message
+            existing_event = self.cloudtrail_denies.get(event.request_id)
+            if existing_event:
+                # Already analyzed this run, only the count and latest occurrence change
+                event.generated_policies = existing_event.generated_policies
+                event.count += existing_event.count
+                self.cloudtrail_denies[event.request_id] = event
+                changed_request_ids.add(event.request_id)
+                self.num_events += 1
+            elif event.request_id in unanalyzed_events:
+                unanalyzed_events[event.request_id][0].append(event)
+            else:
+                unanalyzed_events[event.request_id] = ([event], raw_event)
+
+        analysis_results = await self.analysis_semaphore.process(
+            [{"raw_event": raw_event} for _, raw_event in unanalyzed_events.values()]
+        )
+        for (events, _), (counted, generated_policies) in zip(
+            unanalyzed_events.values(), analysis_results
+        ):
+            if counted:
+                self.num_events += len(events)
+            if not generated_policies:
+                continue
+
+            event = events[-1]
+            event.count = len(events)
+            event.generated_policies = generated_policies
+            self.cloudtrail_denies[event.request_id] = event
+            changed_request_ids.add(event.request_id)
+            self.new_events += 1
+
+        if changed_request_ids:
+            await aio_wrapper(
+                self.dynamo.batch_write_cloudtrail_events,
+                [
+                    self.cloudtrail_denies[request_id].dict()
+                    for request_id in changed_request_ids
+                ],
+                self.tenant,
+            )
+
+        await aio_wrapper(
+            self.sqs_client.delete_message_batch,
+            QueueUrl=self.queue_url,
+            Entries=[
+                {
+                    "Id": message["MessageId"],
+                    "ReceiptHandle": message["ReceiptHandle"],
+                }
+                for message in messages
+            ],
+        )
+
+    async def run(self):
+        messages = await self.receive_messages()
+        while messages:
+            if self.num_events >= self.max_num_messages_to_process:
+                self.reached_limit_on_num_messages_to_process = True
+                break
+            await self.process_messages(messages)
+            messages = await self.receive_messages()
+
+
 async def detect_cloudtrail_denies_and_update_cache(
     celery_app: object,
     tenant: str,
@@ -125,12 +433,7 @@ async def detect_cloudtrail_denies_and_update_cache(
     max_num_messages_to_process = (
         max_number_to_process or configuration.max_messages_to_process
     )
-    dynamo = UserDynamoHandler(tenant=tenant)
-    queue_arn = (
-        ModelAdapter(CloudtrailDetectionConfiguration)
-        .load_config("cloudtrail", tenant)
-        .model.queue_arn
-    )
+    queue_arn = configuration.queue_arn
 
     queue_name = queue_arn.split(":")[-1]
     queue_account_number = queue_arn.split(":")[4]
@@ -160,163 +463,20 @@ async def detect_cloudtrail_denies_and_update_cache(
     queue_url = queue_url_res.get("QueueUrl")
     if not queue_url:
         raise DataNotRetrievable(f"Unable to retrieve Queue URL for {queue_arn}")
-    messages_awaitable = sqs_client.receive_message(
-        QueueUrl=queue_url, MaxNumberOfMessages=10
-    )
-    new_events = 0
-    messages = messages_awaitable.get("Messages", [])
-    num_events = 0
-    reached_limit_on_num_messages_to_process = False
-    all_cloudtrail_denies = dict()
-
-    while messages:
-        if num_events >= max_num_messages_to_process:
-            reached_limit_on_num_messages_to_process = True
-            break
-        processed_messages = [
-            {
-                "Id": message["MessageId"],
-                "ReceiptHandle": message["ReceiptHandle"],
-            }
-            for message in messages
-        ]
-
-        for message in messages:
-            message_body = json.loads(message["Body"])
-            try:
-                if "Message" in message_body:
-                    decoded_message = json.loads(message_body["Message"])["detail"]
-                else:
-                    decoded_message = message_body["detail"]
-            except Exception as e:
-                log.error(
-                    {
-                        **log_data,
-                        "message": "Unable to process Cloudtrail message",
-                        "message_body": message_body,
-                        "error": str(e),
-                    }
-                )
-                sentry_sdk.capture_exception()
-                continue
-            event_name = decoded_message.get("eventName")
-            event_source = decoded_message.get("eventSource")
-            for event_source_substitution in config.get_tenant_specific_key(
-                "event_bridge.detect_cloudtrail_denies_and_update_cache.event_bridge_substitutions",
-                tenant,
-                [".amazonaws.com"],
-            ):
-                event_source = event_source.replace(event_source_substitution, "")
-            event_time = decoded_message.get("eventTime")
-            utc_time = datetime.strptime(event_time, "%Y-%m-%dT%H:%M:%SZ")
-            epoch_event_time = int((utc_time - datetime(1970, 1, 1)).total_seconds())
-            # Skip entries older than a day
-            # if int(time.time()) - 86400 > epoch_event_time:
-            #     continue
-            try:
-                session_name = decoded_message["userIdentity"]["arn"].split("/")[-1]
-            except (
-                IndexError,
-                KeyError,
-            ):  # If IAM user, there won't be a session name
-                session_name = ""
-            try:
-                principal_arn = decoded_message["userIdentity"]["sessionContext"][
-                    "sessionIssuer"
-                ]["arn"]
-            except KeyError:  # Skip events without a parsable ARN
-                continue
-
-            event_call = f"{event_source}:{event_name}"
-
-            event = CloudtrailDetection(
-                tenant=tenant,
-                error_code=decoded_message.get("errorCode"),
-                error_message=decoded_message.get("errorMessage"),
-                arn=principal_arn,
-                # principal_owner=owner,
-                session_name=session_name,
-                source_ip=decoded_message["sourceIPAddress"],
-                event_call=event_call,
-                epoch_event_time=epoch_event_time,
-                ttl=epoch_event_time + event_ttl,
-                count=1,
-            )
 
-            event.resource = get_resource_from_cloudtrail_deny(event, decoded_message)
-            event.request_id = (
-                f"{principal_arn}-{session_name}-{event_call}-{event.resource}"
-            )
-            generated_policy = process_event(
-                decoded_message, decoded_message.get("recipientAccountId"), tenant
-            )
-
-            if generated_policy is None:
-                log.warning("Unable to process cloudtrail deny event")
-                num_events += 1
-            elif (
-                generated_policy.assessment_result
-                == access_undenied.common.AccessDeniedReason.ERROR
-            ):
-                log.warning(
-                    f"Unable to process cloudtrail deny event: {generated_policy.error_message}"
-                )
-            elif (
-                generated_policy.assessment_result
-                != access_undenied.common.AccessDeniedReason.ALLOWED
-            ):
-                if (
-                    not hasattr(generated_policy, "result_details")
-                    or not generated_policy.result_details.policies
-                    or len(generated_policy.result_details.policies) == 0
-                ):
-                    log.warning(
-                        "TODO/TECH-DEBT: deal with errors when result_details is not defined"
-                    )
-                    continue
-                if "Policy" in generated_policy.result_details.policies[0]:
-                    event.generated_policies = generated_policy.result_details.policies[
-                        0
-                    ]["Policy"]
-                else:
-                    event.generated_policies = generated_policy.result_details.policies[
-                        0
-                    ]["PolicyStatement"]
-                if all_cloudtrail_denies.get(event.request_id):
-                    existing_event = CloudtrailDetection.parse_obj(
-                        all_cloudtrail_denies[event.request_id]
-                    )
-                    event.count += existing_event.count
-                    all_cloudtrail_denies[event.request_id] = event.dict()
-                else:
-                    all_cloudtrail_denies[event.request_id] = event.dict()
-                    new_events += 1
-                num_events += 1
-
-            else:
-                log.info("Allowing event")
-        if processed_messages:
-            sqs_client.delete_message_batch(
-                QueueUrl=queue_url, Entries=processed_messages
-            )
-
-        dynamo.batch_write_cloudtrail_events(
-            all_cloudtrail_denies.values(),
-            tenant,
-        )
-        messages_awaitable = sqs_client.receive_message(
-            QueueUrl=queue_url, MaxNumberOfMessages=10
-        )
-        messages = messages_awaitable.get("Messages", [])
-    if reached_limit_on_num_messages_to_process:
+    pipeline = CloudTrailDenyPipeline(
+        tenant, sqs_client, queue_url, event_ttl, max_num_messages_to_process
+    )
+    await pipeline.run()
+    if pipeline.reached_limit_on_num_messages_to_process:
         # We hit our limit. Let's spawn another task immediately to process remaining messages
         celery_app.send_task(
             "common.celery_tasks.celery_tasks.cache_cloudtrail_denies",
             args=(tenant,),
         )
     log_data["message"] = "Successfully cached Cloudtrail Access Denies"
-    log_data["num_events"] = num_events
-    log_data["new_events"] = new_events
+    log_data["num_events"] = pipeline.num_events
+    log_data["new_events"] = pipeline.new_events
     log.debug(log_data)
 
     return log_data
@@ -1,15 +1,17 @@
 import asyncio
 import os
 import sys
+import threading
 import time
 import uuid
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # used as a placeholder for empty SID to work around this:
 # https://github.com/aws/aws-sdk-js/issues/833
 from decimal import Decimal
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
 
 import bcrypt
 import simplejson as json
@@ -56,6 +58,15 @@ DYNAMO_EMPTY_STRING = "---DYNAMO-EMPTY-STRING---"
 # Decimal module.
 DYNAMODB_EMPTY_DECIMAL = Decimal(0)
 
+DYNAMO_THROTTLING_ERROR_CODES = {
+    "ProvisionedThroughputExceededException",
+    "RequestLimitExceeded",
+    "ThrottlingException",
+}
+# Page size used for a scan once it has been throttled, if a Limit wasn't provided
+DYNAMO_THROTTLED_SCAN_PAGE_SIZE = 1000
+DYNAMO_MIN_SCAN_PAGE_SIZE = 25
+
 POSSIBLE_STATUSES = [
     "pending",
     "approved",
@@ -274,6 +285,77 @@ class BaseDynamoHandler:
                     with attempt:
                         batch.delete_item(Key=self._data_to_dynamo_replace(key))
 
+    def _scan_segment_pages(
+        self,
+        table,
+        segment: int,
+        total_segments: int,
+        dynamodb_kwargs: Dict[str, Any],
+        on_page: Callable[[List[Dict[str, Any]]], None],
+        stop_event: Optional[threading.Event] = None,
+    ):
+        """Scan a single segment of a table, passing each sanitized page to on_page as it is retrieved.
+
+        This is blocking and is intended to be run in a thread per segment.
+
+        The page size adapts to throttling. When a request is throttled the Limit is halved and the request is retried
+        after an exponential backoff. Once requests succeed again the Limit is doubled until it is back to the
+        requested Limit, or removed if no Limit was requested.
+        """
+        scan_kwargs = {
+            **dynamodb_kwargs,
+            "Segment": segment,
+            "TotalSegments": total_segments,
+        }
+        max_page_size = dynamodb_kwargs.get("Limit")
+        page_size = max_page_size
+        throttle_count = 0
+
+        while not (stop_event and stop_event.is_set()):
+            if page_size:
+                scan_kwargs["Limit"] = page_size
+            else:
+                scan_kwargs.pop("Limit", None)
+
+            try:
+                response = table.scan(**scan_kwargs)
+            except ClientError as e:
+                if e.response["Error"]["Code"] not in DYNAMO_THROTTLING_ERROR_CODES:
+                    raise
+
+                throttle_count += 1
+                if throttle_count > cluster_config.dynamo_retry_count:
+                    raise ProvisionedThroughputExceededError(
+                        f"Provisioned throughput exceeded for table '{table.name}' "
+                        f"while scanning segment {segment} of {total_segments}."
+                    )
+
+                page_size = max(
+                    DYNAMO_MIN_SCAN_PAGE_SIZE,
+                    (page_size or DYNAMO_THROTTLED_SCAN_PAGE_SIZE) // 2,
+                )
+                stats.count(
+                    "BaseDynamoHandler.scan_segment.throttled",
+                    tags={"table": table.name, "page_size": page_size},
+                )
+                time.sleep(min(0.1 * 2**throttle_count, 10))
+                continue
+
+            throttle_count = 0
+            on_page(self._data_from_dynamo_replace(response.get("Items", [])))
+
+            if page_size and page_size != max_page_size:
+                # Recover the page size after throttling
+                page_size *= 2
+                if max_page_size:
+                    page_size = min(page_size, max_page_size)
+                elif page_size >= DYNAMO_THROTTLED_SCAN_PAGE_SIZE:
+                    page_size = None
+
+            if "LastEvaluatedKey" not in response:
+                return
+            scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
     def parallel_scan_table(
         self,
         table,
@@ -283,71 +365,95 @@ class BaseDynamoHandler:
         if not dynamodb_kwargs:
             dynamodb_kwargs = {}
 
-        async def _scan_segment(segment, total_segments):
-            response = table.scan(
-                Segment=segment, TotalSegments=total_segments, **dynamodb_kwargs
-            )
-            items = response.get("Items", [])
-
-            while "LastEvaluatedKey" in response:
-                response = table.scan(
-                    ExclusiveStartKey=response["LastEvaluatedKey"],
-                    Segment=segment,
-                    TotalSegments=total_segments,
-                    **dynamodb_kwargs,
+        segment_items = [[] for _ in range(total_threads)]
+        with ThreadPoolExecutor(max_workers=total_threads) as executor:
+            futures = [
+                executor.submit(
+                    self._scan_segment_pages,
+                    table,
+                    segment,
+                    total_threads,
+                    dynamodb_kwargs,
+                    segment_items[segment].extend,
                 )
-                items.extend(self._data_from_dynamo_replace(response["Items"]))
-
-            return items
+                for segment in range(total_threads)
+            ]
+            for future in futures:
+                future.result()
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        tasks = []
-        for i in range(total_threads):
-            task = asyncio.ensure_future(_scan_segment(i, total_threads))
-            tasks.append(task)
-
-        results = loop.run_until_complete(asyncio.gather(*tasks))
         items = []
-        for result in results:
+        for result in segment_items:
             items.extend(result)
         return items
 
-    async def parallel_scan_table_async(
+    async def parallel_scan_table_pages_async(
         self,
         table,
         total_threads=os.cpu_count(),
         dynamodb_kwargs: Optional[Dict[str, Any]] = None,
-    ):
+        max_workers: Optional[int] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Scan a table with a segment per thread, yielding each page as soon as any segment retrieves it.
+
+        This lets callers start processing before the scan has finished.
+        The scan is stopped if the caller stops iterating.
+
+        :param table: The boto3 DynamoDB table resource to scan
+        :param total_threads: The number of segments to split the scan into
+        :param dynamodb_kwargs: Additional kwargs passed to every scan request
+        :param max_workers: The maximum number of segments scanned at once. Defaults to all of them.
+        """
         if not dynamodb_kwargs:
             dynamodb_kwargs = {}
 
-        async def _scan_segment(segment, total_segments):
-            response = table.scan(
-                Segment=segment, TotalSegments=total_segments, **dynamodb_kwargs
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        stop_event = threading.Event()
+
+        def _on_page(items: List[Dict[str, Any]]):
+            loop.call_soon_threadsafe(queue.put_nowait, items)
+
+        executor = ThreadPoolExecutor(max_workers=max_workers or total_threads)
+        futures = []
+        for segment in range(total_threads):
+            future = loop.run_in_executor(
+                executor,
+                self._scan_segment_pages,
+                table,
+                segment,
+                total_threads,
+                dynamodb_kwargs,
+                _on_page,
+                stop_event,
             )
-            items = response.get("Items", [])
-
-            while "LastEvaluatedKey" in response:
-                response = table.scan(
-                    ExclusiveStartKey=response["LastEvaluatedKey"],
-                    Segment=segment,
-                    TotalSegments=total_segments,
-                    **dynamodb_kwargs,
-                )
-                items.extend(self._data_from_dynamo_replace(response["Items"]))
+            # The finished future is put on the queue so errors are raised as soon as a segment fails
+            future.add_done_callback(queue.put_nowait)
+            futures.append(future)
 
-            return items
-
-        tasks = []
-        for i in range(total_threads):
-            task = asyncio.ensure_future(_scan_segment(i, total_threads))
-            tasks.append(task)
+        remaining_segments = len(futures)
+        try:
+            while remaining_segments:
+                page = await queue.get()
+                if isinstance(page, asyncio.Future):
+                    page.result()
+                    remaining_segments -= 1
+                elif page:
+                    yield page
+        finally:
+            stop_event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
 
-        results = await asyncio.gather(*tasks)
+    async def parallel_scan_table_async(
+        self,
+        table,
+        total_threads=os.cpu_count(),
+        dynamodb_kwargs: Optional[Dict[str, Any]] = None,
+    ):
         items = []
-        for result in results:
-            items.extend(result)
+        async for page in self.parallel_scan_table_pages_async(
+            table, total_threads, dynamodb_kwargs
+        ):
+            items.extend(page)
         return items
 
     def truncateTable(self, table, tenant):
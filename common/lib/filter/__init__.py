@@ -2,7 +2,7 @@ import math
 from enum import Enum
 from typing import Any, Optional, Type
 
-from sqlalchemy import String, and_, cast, func, or_
+from sqlalchemy import and_, func, or_
 from sqlalchemy.sql import select
 
 from common.config.globals import ASYNC_PG_SESSION
@@ -11,6 +11,7 @@ from common.groups.models import Group  # noqa: F401, E402
 from common.lib.pydantic import BaseModel
 from common.models import DataTableResponse
 from common.pg_core.models import Base  # noqa: F401,E402
+from common.pg_core.search import ilike_contains, searchable_columns
 from common.tenants.models import Tenant  # noqa: F401, E402
 from common.users.models import User  # noqa: F401, E402
 
@@ -201,9 +202,9 @@ async def get_query_conditions(Table, token, conditions):
         elif token.operator == FilterOperator.not_equals:
             conditions.append(filter_key != token.value)
         elif token.operator == FilterOperator.contains:
-            conditions.append(filter_key.ilike(f"%{token.value}%"))
+            conditions.append(ilike_contains(filter_key, token.value))
         elif token.operator == FilterOperator.does_not_contain:
-            conditions.append(filter_key.notilike(f"%{token.value}%"))
+            conditions.append(~ilike_contains(filter_key, token.value))
         elif token.operator == FilterOperator.greater_than:
             conditions.append(filter_key > token.value)
         elif token.operator == FilterOperator.less_than:
@@ -212,8 +213,8 @@ async def get_query_conditions(Table, token, conditions):
         if token.operator in {FilterOperator.contains, FilterOperator.does_not_contain}:
             search_condition = or_(
                 *[
-                    cast(getattr(Table, col.name), String).ilike(f"%{token.value}%")
-                    for col in Table.__table__.columns
+                    ilike_contains(column, token.value)
+                    for column in searchable_columns(Table)
                 ]
             )
             if token.operator == FilterOperator.does_not_contain:
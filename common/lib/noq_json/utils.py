@@ -1,11 +1,13 @@
 import json
 from datetime import datetime
 from decimal import Decimal
+from functools import partial
 from uuid import UUID
 
 import orjson
 import ujson
 from deepdiff.model import PrettyOrderedSet
+from pydantic import BaseModel as PydanticBaseModel
 
 
 class SetEncoder(json.JSONEncoder):
@@ -23,6 +25,31 @@ class SetEncoder(json.JSONEncoder):
         return json.JSONEncoder.default(self, obj)
 
 
+def _orjson_default(obj: any, fallback_default=None) -> any:
+    """Converts the types orjson doesn't serialize natively, in a single pass.
+
+    Mirrors SetEncoder for the types it handles.
+    Payloads with any of these types used to be written by SetEncoder, so their datetimes are still written as
+    epoch timestamps unless the caller provided a default. orjson passes them here with OPT_PASSTHROUGH_DATETIME.
+    """
+    if isinstance(obj, (frozenset, set, PrettyOrderedSet)):
+        return list(obj)
+    if isinstance(obj, datetime):
+        return fallback_default(obj) if fallback_default else obj.timestamp()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, UUID):
+        # Only reached from the json fallback, orjson serializes UUIDs natively
+        return str(obj)
+    if isinstance(obj, PydanticBaseModel):
+        return obj.dict()
+    if isinstance(obj, Exception):
+        return str(obj)
+    if fallback_default:
+        return fallback_default(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
 def dumps(
     obj: any,
     ensure_ascii: bool = True,
@@ -31,38 +58,44 @@ def dumps(
     escape_forward_slashes: bool = False,
     sort_keys: bool = False,
     indent: int = 0,
-    **kwargs
+    **kwargs,
 ) -> str:
+    option = orjson.OPT_NON_STR_KEYS
+    if indent > 0:
+        option = option | orjson.OPT_INDENT_2
+    if sort_keys:
+        option = option | orjson.OPT_SORT_KEYS
+
     try:
-        option = orjson.OPT_NON_STR_KEYS
-        if indent > 0:
-            option = option | orjson.OPT_INDENT_2
-        # Try orjson first
-        result = orjson.dumps(obj, option=option).decode()
+        # Payloads of types orjson serializes natively, datetimes are written as ISO 8601
+        return orjson.dumps(obj, option=option).decode()
     except TypeError:
-        try:
-            # Try ujson next
-            result = ujson.dumps(
-                obj,
-                ensure_ascii=ensure_ascii,
-                double_precision=double_precision,
-                encode_html_chars=encode_html_chars,
-                escape_forward_slashes=escape_forward_slashes,
-                sort_keys=sort_keys,
-                indent=indent,
-                **kwargs
-            )
-        except TypeError:
-            # Fallback to the slower json library
-            result = json.dumps(
-                obj,
-                cls=SetEncoder,
-                ensure_ascii=ensure_ascii,
-                sort_keys=sort_keys,
-                indent=indent,
-                **kwargs
-            )
-    return result
+        pass
+
+    # Support the stdlib json hooks for types not handled by _orjson_default
+    fallback_default = kwargs.pop("default", None)
+    encoder_cls = kwargs.pop("cls", None)
+    if not fallback_default and encoder_cls:
+        fallback_default = encoder_cls().default
+    default = partial(_orjson_default, fallback_default=fallback_default)
+
+    try:
+        return orjson.dumps(
+            obj,
+            default=default,
+            option=option | orjson.OPT_PASSTHROUGH_DATETIME,
+        ).decode()
+    except TypeError:
+        # orjson can't serialize some values, like integers larger than 64 bits.
+        # Fallback to the slower json library
+        return json.dumps(
+            obj,
+            default=default,
+            ensure_ascii=ensure_ascii,
+            sort_keys=sort_keys,
+            indent=indent or None,
+            **kwargs,
+        )
 
 
 def loads(s: str, **kwargs) -> any:
@@ -12,7 +12,6 @@ import pytz
 import sentry_sdk
 import tornado.httpclient
 from furl import furl
-from jwt.algorithms import ECAlgorithm, RSAAlgorithm
 from jwt.exceptions import DecodeError
 from tornado import httputil
 
@@ -23,27 +22,21 @@ from common.lib.auth.user_management import maybe_create_users_groups_in_databas
 from common.lib.cognito.identity import CognitoUserClient
 from common.lib.generic import should_force_redirect
 from common.lib.jwt import generate_jwt_token
+from common.lib.oidc.key_store import OidcKeyStore
 from common.lib.plugins import get_plugin_by_name
 
 log = config.get_logger(__name__)
 
 
 async def populate_oidc_config(tenant):
-    http_client = tornado.httpclient.AsyncHTTPClient()
+    key_store = OidcKeyStore.get(tenant)
     metadata_url = config.get_tenant_specific_key(
         "get_user_by_oidc_settings.metadata_url", tenant
     )
 
     if metadata_url:
-        res = await http_client.fetch(
-            metadata_url,
-            method="GET",
-            headers={
-                "Content-Type": "application/x-www-form-urlencoded",
-                "Accept": "application/json",
-            },
-        )
-        oidc_config = json.loads(res.body)
+        # Copied since the cached discovery document is shared between requests
+        oidc_config = dict(await key_store.get_document(metadata_url))
     else:
         authorization_endpoint = config.get_tenant_specific_key(
             "get_user_by_oidc_settings.authorization_endpoint",
@@ -70,35 +63,14 @@ async def populate_oidc_config(tenant):
         raise MissingConfigurationValue("Missing OIDC ID")
     oidc_config["client_id"] = client_id
     oidc_config["client_secret"] = client_secret
-    oidc_config["jwt_keys"] = {}
     jwks_uris = [oidc_config["jwks_uri"]]
     jwks_uris.extend(
         config.get_tenant_specific_key(
             "get_user_by_oidc_settings.extra_jwks_uri", tenant, []
         )
     )
-    for jwks_uri in jwks_uris:
-        # Fetch jwks_uri for jwt validation
-        res = await http_client.fetch(
-            jwks_uri,
-            method="GET",
-            headers={
-                "Content-Type": "application/x-www-form-urlencoded",
-                "Accept": "application/json",
-            },
-        )
-        jwks_data = json.loads(res.body)
-        for k in jwks_data["keys"]:
-            key_type = k["kty"]
-            key_id = k["kid"]
-            if key_type == "RSA":
-                oidc_config["jwt_keys"][key_id] = RSAAlgorithm.from_jwk(json.dumps(k))
-            elif key_type == "EC":
-                oidc_config["jwt_keys"][key_id] = ECAlgorithm.from_jwk(json.dumps(k))
-            else:
-                raise MissingConfigurationValue(
-                    f"OIDC/OAuth2 key type not recognized. Detected key type: {key_type}."
-                )
+    oidc_config["jwks_uris"] = jwks_uris
+    oidc_config["jwt_keys"] = await key_store.get_keys(jwks_uris)
     return oidc_config
 
 
@@ -307,7 +279,9 @@ async def authenticate_user_by_oidc(request, return_200=False, force_redirect=No
             raise UnableToAuthenticate(
                 "ID Token header does not specify a signing algorithm."
             )
-        pub_key = oidc_config["jwt_keys"][key_id]
+        pub_key = await OidcKeyStore.get(tenant).get_key(
+            oidc_config["jwks_uris"], key_id
+        )
         # This will raises errors if the audience isn't right or if the token is expired or has other errors.
         decoded_id_token = jwt.decode(
             id_token,
@@ -350,7 +324,9 @@ async def authenticate_user_by_oidc(request, return_200=False, force_redirect=No
                     raise UnableToAuthenticate(
                         "Access Token header does not specify a signing algorithm."
                     )
-                pub_key = oidc_config["jwt_keys"][key_id]
+                pub_key = await OidcKeyStore.get(tenant).get_key(
+                    oidc_config["jwks_uris"], key_id
+                )
                 # This will raises errors if the audience isn't right or if the token is expired or has other
                 # errors.
                 decoded_access_token = jwt.decode(
@@ -0,0 +1,178 @@
+import asyncio
+import re
+import time
+from typing import Any, Callable
+
+import tornado.httpclient
+from jwt.algorithms import ECAlgorithm, RSAAlgorithm
+
+import common.lib.noq_json as json
+from common.config import config
+
+log = config.get_logger(__name__)
+
+MAX_AGE_REGEX = re.compile(r"max-age=(\d+)")
+
+
+class CachedDocument:
+    def __init__(self, value: Any, expires_at: float):
+        self.value = value
+        self.expires_at = expires_at
+        self.fetched_at = time.time()
+
+
+def parse_jwks(jwks_data: dict) -> dict[str, Any]:
+    """The public keys of a JWKS document by their kid."""
+    jwt_keys = {}
+    for k in jwks_data["keys"]:
+        key_type = k["kty"]
+        key_id = k["kid"]
+        if key_type == "RSA":
+            jwt_keys[key_id] = RSAAlgorithm.from_jwk(json.dumps(k))
+        elif key_type == "EC":
+            jwt_keys[key_id] = ECAlgorithm.from_jwk(json.dumps(k))
+        else:
+            log.warning(
+                {
+                    "message": "OIDC/OAuth2 key type not recognized, skipping the key.",
+                    "key_type": key_type,
+                    "key_id": key_id,
+                }
+            )
+    return jwt_keys
+
+
+class OidcKeyStore:
+    """
+    A tenant's cache of OIDC discovery documents and parsed JWKS keys, shared by the OIDC and ALB auth modules.
+
+    Documents are cached for the max-age of their Cache-Control header, bounded by
+    _global_.auth.oidc_key_store.min_ttl_seconds and max_ttl_seconds.
+    If a refresh fails the stale document keeps being served, so an IdP outage doesn't fail authentication.
+    A kid missing from the keys refreshes the JWKS documents once, and at most every
+    _global_.auth.oidc_key_store.kid_miss_refresh_interval_seconds.
+    """
+
+    _stores: dict[str, "OidcKeyStore"] = {}
+
+    def __init__(self, tenant: str):
+        self.tenant = tenant
+        self._documents: dict[str, CachedDocument] = {}
+        self._refreshes: dict[str, asyncio.Task] = {}
+        self._jwt_keys: dict[
+            tuple[str, ...], tuple[tuple[float, ...], dict[str, Any]]
+        ] = {}
+        self._kid_miss_refreshed_at: dict[tuple[str, ...], float] = {}
+
+    @classmethod
+    def get(cls, tenant: str) -> "OidcKeyStore":
+        if tenant not in cls._stores:
+            cls._stores[tenant] = cls(tenant)
+        return cls._stores[tenant]
+
+    def _get_ttl(self, response: tornado.httpclient.HTTPResponse) -> int:
+        min_ttl = config.get("_global_.auth.oidc_key_store.min_ttl_seconds", 60)
+        max_ttl = config.get("_global_.auth.oidc_key_store.max_ttl_seconds", 86400)
+        ttl = config.get("_global_.auth.oidc_key_store.default_ttl_seconds", 3600)
+        if match := MAX_AGE_REGEX.search(response.headers.get("Cache-Control", "")):
+            ttl = int(match.group(1))
+        return min(max(ttl, min_ttl), max_ttl)
+
+    async def _fetch(self, url: str, parse: Callable[[bytes], Any]) -> CachedDocument:
+        http_client = tornado.httpclient.AsyncHTTPClient()
+        res = await http_client.fetch(
+            url,
+            method="GET",
+            headers={
+                "Content-Type": "application/x-www-form-urlencoded",
+                "Accept": "application/json",
+            },
+        )
+        document = CachedDocument(parse(res.body), time.time() + self._get_ttl(res))
+        self._documents[url] = document
+        return document
+
+    async def _refresh(self, url: str, parse: Callable[[bytes], Any]) -> CachedDocument:
+        """Fetch the document, concurrent refreshes of a URL share a single fetch."""
+        if not (refresh := self._refreshes.get(url)):
+            refresh = asyncio.ensure_future(self._fetch(url, parse))
+            self._refreshes[url] = refresh
+            refresh.add_done_callback(lambda _: self._refreshes.pop(url, None))
+        try:
+            return await asyncio.shield(refresh)
+        except Exception as err:
+            if not (document := self._documents.get(url)):
+                raise
+            log.warning(
+                {
+                    "message": "Unable to refresh OIDC document, using the cached document.",
+                    "url": url,
+                    "tenant": self.tenant,
+                    "error": str(err),
+                }
+            )
+            # Retry after the minimum TTL instead of on every request while the IdP is unavailable
+            document.expires_at = time.time() + config.get(
+                "_global_.auth.oidc_key_store.min_ttl_seconds", 60
+            )
+            return document
+
+    async def _get(
+        self, url: str, parse: Callable[[bytes], Any], force_refresh: bool = False
+    ) -> CachedDocument:
+        document = self._documents.get(url)
+        if force_refresh or not document or document.expires_at <= time.time():
+            document = await self._refresh(url, parse)
+        return document
+
+    async def get_document(self, url: str, force_refresh: bool = False) -> dict:
+        """A JSON document, such as the discovery document at a metadata URL."""
+        return (await self._get(url, json.loads, force_refresh)).value
+
+    async def get_text(self, url: str) -> str:
+        return (await self._get(url, lambda body: body.decode("utf-8"))).value
+
+    async def get_keys(
+        self, jwks_uris: list[str], force_refresh: bool = False
+    ) -> dict[str, Any]:
+        """The keys of the JWKS URIs by their kid, only parsed again when a document is refreshed."""
+        documents = [
+            await self._get(jwks_uri, json.loads, force_refresh)
+            for jwks_uri in jwks_uris
+        ]
+        cache_key = tuple(jwks_uris)
+        fetched_at = tuple(document.fetched_at for document in documents)
+        cached_keys = self._jwt_keys.get(cache_key)
+        if cached_keys and cached_keys[0] == fetched_at:
+            return cached_keys[1]
+        jwt_keys = {}
+        for document in documents:
+            jwt_keys.update(parse_jwks(document.value))
+        self._jwt_keys[cache_key] = (fetched_at, jwt_keys)
+        return jwt_keys
+
+    async def get_key(self, jwks_uris: list[str], key_id: str) -> Any:
+        """
+        The key with the kid, refreshing the JWKS documents if it isn't known yet.
+
+        :raises KeyError: If the key isn't in the JWKS documents
+        """
+        jwt_keys = await self.get_keys(jwks_uris)
+        if key_id in jwt_keys:
+            return jwt_keys[key_id]
+
+        # The IdP may have rotated its keys, rate limited so unknown kids can't trigger a fetch per request
+        cache_key = tuple(jwks_uris)
+        refresh_interval = config.get(
+            "_global_.auth.oidc_key_store.kid_miss_refresh_interval_seconds", 60
+        )
+        # Requests that miss while a refresh is running wait for it instead of failing
+        refreshing = any(jwks_uri in self._refreshes for jwks_uri in jwks_uris)
+        if refreshing or (
+            time.time() - self._kid_miss_refreshed_at.get(cache_key, 0)
+            >= refresh_interval
+        ):
+            if not refreshing:
+                self._kid_miss_refreshed_at[cache_key] = time.time()
+            jwt_keys = await self.get_keys(jwks_uris, force_refresh=True)
+        return jwt_keys[key_id]
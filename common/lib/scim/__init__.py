@@ -0,0 +1,312 @@
+"""SCIM v2 operations shared by the SCIM handlers and the Bulk endpoint."""
+import re
+import uuid
+from typing import Optional
+
+from common.group_memberships.models import apply_group_membership_operations
+from common.groups.models import Group
+from common.lib.password import generate_random_password
+from common.tenants.models import Tenant
+from common.users.models import User
+
+ERROR_SCHEMA = "urn:ietf:params:scim:api:messages:2.0:Error"
+# The path of a PATCH operation removing a single member, as sent by Okta
+MEMBER_VALUE_FILTER = re.compile(r'members\[value eq "([^"]*)"\]')
+# A reference to a resource created by an earlier operation of a Bulk request
+BULK_ID_REFERENCE = re.compile(r'bulkId:([^/"\s]+)')
+
+
+class ScimError(Exception):
+    """An error returned to the identity provider as a SCIM error response."""
+
+    def __init__(self, status: int, detail: str):
+        self.status = status
+        self.detail = detail
+        super().__init__(detail)
+
+    def dict(self) -> dict:
+        return {"schemas": [ERROR_SCHEMA], "detail": self.detail, "status": self.status}
+
+
+def parse_id(resource_id) -> Optional[uuid.UUID]:
+    """Parse a SCIM resource ID, an ID that isn't a UUID can't match a resource."""
+    try:
+        return uuid.UUID(str(resource_id))
+    except ValueError:
+        return None
+
+
+def parse_ids(ids: list[str], not_found_detail: str) -> list[uuid.UUID]:
+    parsed_ids = [parse_id(resource_id) for resource_id in ids]
+    if None in parsed_ids:
+        raise ScimError(404, not_found_detail)
+    return parsed_ids
+
+
+async def resolve_user_ids(tenant: Tenant, user_ids: list[str]) -> list[uuid.UUID]:
+    """Resolve the IDs of the tenant's users with a single query, raising if any don't exist."""
+    parsed_user_ids = parse_ids(user_ids, "User not found")
+    if not parsed_user_ids:
+        return []
+    existing_user_ids = await User.get_existing_ids(tenant, parsed_user_ids)
+    if not existing_user_ids.issuperset(parsed_user_ids):
+        raise ScimError(404, "User not found")
+    return list(dict.fromkeys(parsed_user_ids))
+
+
+async def add_user_to_groups(tenant: Tenant, user: User, groups: list[dict]):
+    """Add the user to the groups, creating the groups that don't exist yet."""
+    requested_group_ids = [parse_id(group["value"]) for group in groups]
+    existing_group_ids = await Group.get_existing_ids(
+        tenant, [group_id for group_id in requested_group_ids if group_id]
+    )
+    group_ids = []
+    for group, group_id in zip(groups, requested_group_ids):
+        if group_id in existing_group_ids:
+            group_ids.append(group_id)
+        else:
+            new_group = Group(
+                name=group["displayName"],
+                tenant=tenant,
+                managed_by="SCIM",
+            )
+            await new_group.write()
+            group_ids.append(new_group.id)
+    await apply_group_membership_operations(
+        list(dict.fromkeys(group_ids)), [("add", [user.id])]
+    )
+
+
+async def serialize_group(tenant: Tenant, group_id) -> dict:
+    group = await Group.get_by_id(tenant, group_id, get_users=True)
+    return await group.serialize_for_scim()
+
+
+async def create_user(tenant: Tenant, body: dict) -> dict:
+    active = body.get("active")
+    username = body.get("userName")
+    display_name = body.get("displayName")
+    emails = body.get("emails")
+    external_id = body.get("externalId")
+    groups = body.get("groups")
+    locale = body.get("locale")
+    given_name = body.get("name", {}).get("givenName")
+    middle_name = body.get("name", {}).get("middleName")
+    family_name = body.get("name", {}).get("familyName")
+    password = body.get("password")
+    if not password:
+        password = await generate_random_password()
+
+    existing_user = await User.get_by_username(tenant, username)
+    if existing_user:
+        raise ScimError(409, "User already exists in the database.")
+
+    user = User(
+        active=active,
+        tenant=tenant,
+        display_name=display_name,
+        email_primary=emails[0]["primary"],
+        email=emails[0]["value"],
+        email_type=emails[0]["type"],
+        external_id=external_id,
+        locale=locale,
+        given_name=given_name,
+        middle_name=middle_name,
+        family_name=family_name,
+        password_hash=await User.generate_password_hash(password),
+        username=username,
+        managed_by="SCIM",
+    )
+    await user.write()
+
+    if groups:
+        await add_user_to_groups(tenant, user, groups)
+    user = await User.get_by_username(tenant, username, get_groups=True)
+    return await user.serialize_for_scim()
+
+
+async def update_user(tenant: Tenant, user_id: str, body: dict) -> dict:
+    user = await User.get_by_id(tenant, user_id)
+    if not user:
+        raise ScimError(404, "User not found")
+    user.active = body.get("active")
+    user.username = body.get("userName")
+    user.display_name = body.get("displayName")
+    emails = body.get("emails")
+    user.external_id = body.get("externalId")
+    user.locale = body.get("locale")
+    user.given_name = body.get("name", {}).get("givenName")
+    user.middle_name = body.get("name", {}).get("middleName")
+    user.family_name = body.get("name", {}).get("familyName")
+    user.password = body.get("password")
+    user.schemas = body.get("schemas")
+    user.managed_by = "SCIM"
+    if emails and len(emails) > 0:
+        user.email_primary = emails[0]["primary"]
+        user.email = emails[0]["value"]
+        user.email_type = emails[0]["type"]
+    groups = body.get("groups")
+    if groups:
+        await add_user_to_groups(tenant, user, groups)
+    await user.write()
+    user = await User.get_by_username(tenant, user.username, get_groups=True)
+    return await user.serialize_for_scim()
+
+
+async def patch_user(tenant: Tenant, user_id: str, body: dict):
+    """Set user active status."""
+    ops = body.get("Operations", [])
+    if not ops:
+        raise ScimError(400, "No operations provided")
+    user = await User.get_by_id(tenant, user_id)
+    if not user:
+        raise ScimError(404, "User not found")
+    user.active = ops[0].get("value", {}).get("active")
+    user.managed_by = "SCIM"
+    await user.write()
+
+
+async def delete_user(tenant: Tenant, user_id: str):
+    user = await User.get_by_id(tenant, user_id)
+    if not user:
+        raise ScimError(404, "User not found")
+    await user.delete()
+
+
+async def create_group(tenant: Tenant, body: dict) -> dict:
+    user_ids = await resolve_user_ids(
+        tenant, [member["value"] for member in body.get("members", [])]
+    )
+    group = Group(
+        name=body["displayName"],
+        tenant=tenant,
+        managed_by="SCIM",
+    )
+    await group.write()
+    if user_ids:
+        await apply_group_membership_operations([group.id], [("add", user_ids)])
+    return await serialize_group(tenant, group.id)
+
+
+async def get_group_id(tenant: Tenant, group_id: str) -> uuid.UUID:
+    parsed_group_id = parse_ids([group_id], "Group not found")[0]
+    if not await Group.get_existing_ids(tenant, [parsed_group_id]):
+        raise ScimError(404, "Group not found")
+    return parsed_group_id
+
+
+async def update_group_members(
+    tenant: Tenant, group_id: str, operations: list[tuple[str, list[str]]]
+) -> dict:
+    """Apply the membership operations to the group in a single transaction and return the updated group."""
+    parsed_group_id = await get_group_id(tenant, group_id)
+    # Resolve every user that is added with a single query, removing a user that doesn't exist is a no-op
+    await resolve_user_ids(
+        tenant,
+        [
+            user_id
+            for op, user_ids in operations
+            if op != "remove"
+            for user_id in user_ids
+        ],
+    )
+    membership_operations = [
+        (op, list(dict.fromkeys(filter(None, map(parse_id, user_ids)))))
+        for op, user_ids in operations
+    ]
+
+    await apply_group_membership_operations([parsed_group_id], membership_operations)
+    group = await Group.get_by_id(tenant, parsed_group_id, get_users=True)
+    if group.managed_by != "SCIM":
+        group.managed_by = "SCIM"
+        await group.write()
+    return await group.serialize_for_scim()
+
+
+async def replace_group(tenant: Tenant, group_id: str, body: dict) -> dict:
+    user_ids = [member["value"] for member in body.get("members") or []]
+    return await update_group_members(tenant, group_id, [("replace", user_ids)])
+
+
+def get_group_patch_operations(body: dict) -> list[tuple[str, list[str]]]:
+    """The membership operations of a SCIM PATCH request for a group.
+
+    Operations on other attributes, such as replacing the displayName, are ignored.
+    """
+    operations = []
+    for operation in body.get("Operations", []):
+        op = (operation.get("op") or "").lower()
+        path = operation.get("path") or ""
+        value = operation.get("value")
+        if op not in {"add", "remove", "replace"}:
+            raise ScimError(400, f"Unsupported operation: {op}")
+        if match := MEMBER_VALUE_FILTER.fullmatch(path):
+            user_ids = [match.group(1)]
+        elif path == "members":
+            user_ids = [member["value"] for member in value or []]
+        elif not path and isinstance(value, list):
+            # Members sent without a path
+            user_ids = [member["value"] for member in value]
+        else:
+            continue
+        operations.append((op, user_ids))
+    return operations
+
+
+async def patch_group(tenant: Tenant, group_id: str, body: dict) -> dict:
+    return await update_group_members(
+        tenant, group_id, get_group_patch_operations(body)
+    )
+
+
+async def delete_group(tenant: Tenant, group_id: str):
+    group = await Group.get_by_id(tenant, group_id)
+    if not group:
+        raise ScimError(404, "Group not found")
+    await group.delete()
+
+
+async def apply_bulk_operation(
+    tenant: Tenant, method: str, path: str, data: Optional[dict]
+) -> tuple[int, Optional[dict]]:
+    """Run a single operation of a SCIM Bulk request.
+
+    :return: The status code and the resource, if the operation returns one
+    """
+    method = method.upper()
+    resource_type, _, resource_id = path.strip("/").partition("/")
+    if resource_type == "Users":
+        if method == "POST" and not resource_id:
+            return 201, await create_user(tenant, data)
+        elif method == "PUT" and resource_id:
+            return 200, await update_user(tenant, resource_id, data)
+        elif method == "PATCH" and resource_id:
+            await patch_user(tenant, resource_id, data)
+            return 204, None
+        elif method == "DELETE" and resource_id:
+            await delete_user(tenant, resource_id)
+            return 204, None
+    elif resource_type in {"Groups", "Group"}:
+        if method == "POST" and not resource_id:
+            return 201, await create_group(tenant, data)
+        elif method == "PUT" and resource_id:
+            return 200, await replace_group(tenant, resource_id, data)
+        elif method == "PATCH" and resource_id:
+            return 200, await patch_group(tenant, resource_id, data)
+        elif method == "DELETE" and resource_id:
+            await delete_group(tenant, resource_id)
+            return 204, None
+    raise ScimError(400, f"Unsupported bulk operation: {method} {path}")
+
+
+def resolve_bulk_ids(value, bulk_ids: dict[str, str]):
+    """Replace the bulkId:<bulkId> references in a Bulk operation with the IDs of the resources created earlier in the request."""
+    if isinstance(value, str):
+        return BULK_ID_REFERENCE.sub(
+            lambda match: bulk_ids.get(match.group(1), match.group(0)), value
+        )
+    elif isinstance(value, list):
+        return [resolve_bulk_ids(item, bulk_ids) for item in value]
+    elif isinstance(value, dict):
+        return {key: resolve_bulk_ids(item, bulk_ids) for key, item in value.items()}
+    return value
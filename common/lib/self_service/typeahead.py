@@ -132,7 +132,7 @@ async def cache_self_service_typeahead(tenant: str) -> SelfServiceTypeaheadModel
         s3_key=config.get_tenant_specific_key(
             "cache_iam_resources_across_accounts.all_users_combined.s3.file",
             tenant,
-            "account_resource_cache/cache_all_users_v1.json.gz",
+            "account_resource_cache/cache_all_users_v2.msgpack.zst",
         ),
         default={},
         tenant=tenant,
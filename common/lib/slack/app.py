@@ -6,9 +6,8 @@ from collections import defaultdict
 from typing import Optional
 from uuid import uuid4
 
-import jq
 import ujson as json
-from policyuniverse.expander_minimizer import _expand_wildcard_action
+from cachetools import TTLCache
 from slack_bolt.async_app import AsyncApp
 from slack_bolt.oauth.async_oauth_settings import AsyncOAuthSettings
 from slack_bolt.oauth.callback_options import CallbackOptions, FailureArgs, SuccessArgs
@@ -36,7 +35,17 @@ from common.lib.cache import retrieve_json_data_from_redis_or_s3
 from common.lib.change_request import _get_policy_sentry_access_level_actions
 from common.lib.iambic.git import IambicGit
 from common.lib.redis import RedisHandler
-from common.lib.slack.models import BOTS_TABLE, INSTALLATIONS_TABLE, OAUTH_STATES_TABLE
+from common.lib.slack.models import (
+    BOTS_TABLE,
+    INSTALLATIONS_TABLE,
+    OAUTH_STATES_TABLE,
+    get_tenant_from_team_id,
+)
+from common.lib.slack.typeahead import (
+    search_aws_services,
+    search_cloud_identities,
+    search_templates,
+)
 from common.lib.slack.workflows import FRIENDLY_RESOURCE_TYPE_NAMES, SlackWorkflows
 from common.lib.yaml import yaml
 from common.models import IambicTemplateChange
@@ -476,45 +485,7 @@ class TenantSlackApp:
             slack_app_type = body["action_id"].split("/")[-1]
             if slack_app_type not in FRIENDLY_RESOURCE_TYPE_NAMES.keys():
                 slack_app_type = None
-        redis_key = self.tenant_config.iambic_templates_redis_key
-        template_dicts = await retrieve_json_data_from_redis_or_s3(
-            redis_key=redis_key,
-            tenant=self.tenant,
-        )
-        res = []
-        if slack_app_type:
-            res.extend(
-                jq.compile(
-                    f".[] | select(.template_type == \"{slack_app_type}\") | select(.identifier | test(\"{body['value']}\"; \"i\"))?"
-                )
-                .input(template_dicts)
-                .all()
-            )
-            res.extend(
-                jq.compile(
-                    f".[] | select(.template_type == \"{slack_app_type}\") | select(.properties.name | test(\"{body['value']}\"; \"i\"))?"
-                )
-                .input(template_dicts)
-                .all()
-            )
-
-        else:
-            res.extend(
-                jq.compile(
-                    f".[] | select(.identifier | test(\"{body['value']}\"; \"i\"))?"
-                )
-                .input(template_dicts)
-                .all()
-            )
-            res.extend(
-                jq.compile(
-                    f".[] | select(.properties.name | test(\"{body['value']}\"; \"i\"))?"
-                )
-                .input(template_dicts)
-                .all()
-            )
-        # Lambda to remove duplicates if repo_relative_file_path is the same
-        res = list({v["repo_relative_file_path"]: v for v in res}.values())
+        res = await search_templates(self.tenant, body["value"], slack_app_type)
 
         option_groups = defaultdict(list)
         for typeahead_entry in res:
@@ -973,63 +944,21 @@ class TenantSlackApp:
     async def handle_select_cloud_identities_options_tenant(
         self, ack, logger, body, client, respond
     ):
-        res = await retrieve_json_data_from_redis_or_s3(
-            redis_key=self.tenant_config.iambic_arn_typeahead_redis_key,
-            tenant=self.tenant,
-        )
-
-        # reverse_hash_for_arn = await retrieve_json_data_from_redis_or_s3(
-        #             redis_key=tenant_config.iambic_hash_arn_redis_key,
-        #             tenant=tenant,
-        #         )
-        num_entries = 0
-        option_groups = defaultdict(list)
-        for typeahead_entry, template_details in res.items():
-
-            # Maximum length of option group options is 100:
-            if num_entries >= 100:
-                break
-            reverse_hash_for_arn = template_details["hash"]
-            account_id = typeahead_entry.split(":")[4]
-            account_name = template_details["account_name"]
-            partial_arn = typeahead_entry.replace(f"arn:aws:iam::{account_id}:", "")
-            account_name_arn = partial_arn.replace(
-                partial_arn, f"{account_name}:{partial_arn}"
-            )
-            if not (
-                body["value"].lower() in typeahead_entry.lower()
-                or body["value"].lower() in account_name_arn.lower()
-            ):
-                continue
-            template_type = template_details["template_type"]
-
-            friendly_name = FRIENDLY_RESOURCE_TYPE_NAMES.get(
-                template_type, template_type
-            )
+        option_groups = {}
+        for friendly_name, option in await search_cloud_identities(
+            self.tenant, body["value"]
+        ):
             if not option_groups.get(friendly_name):
                 option_groups[friendly_name] = {
                     "label": {"type": "plain_text", "text": friendly_name[:75]},
                     "options": [],
                 }
-
-            option_groups[friendly_name]["options"].append(
-                {
-                    "text": {
-                        "type": "plain_text",
-                        "text": account_name_arn[:75],
-                    },
-                    # Warning: Slack docs specify the max length of options value is 75 characters
-                    # but it is actually larger. Slack will not give you an error if this is exceeded,
-                    # and you will be left wandering aimlessly in the abyss.
-                    "value": reverse_hash_for_arn[:75],
-                }
-            )
-            num_entries += 1
+            option_groups[friendly_name]["options"].append(option)
         option_groups = [v for _, v in option_groups.items()]
         option_groups_formatted = {
             "option_groups": option_groups,
         }
-        res = await ack(option_groups_formatted)
+        await ack(option_groups_formatted)
 
     async def handle_select_aws_actions_options(
         self, ack, logger, body, client, respond
@@ -1038,11 +967,7 @@ class TenantSlackApp:
         await ack()
         # Get the value of the selected radio button
         options = []
-        prefix = body["value"] + "*"
-        results = sorted(_expand_wildcard_action(prefix))
-        services = sorted(
-            list({r.split(":")[0].replace("*", "") for r in results if ":" in r})
-        )
+        services = search_aws_services(body["value"])
         if body["value"].endswith("*"):
             options.append(
                 {
@@ -1691,3 +1616,47 @@ class TenantSlackApp:
 #  - Allow
 # resource:
 #  - {{NOQ::AWS::SecretsManager::Secret/Secret_Prefix}}/*
+
+
+class TenantSlackAppRegistry:
+    """
+    Process wide registry of the tenant Slack apps.
+
+    Building a TenantAsyncSlackApp registers every listener, so each app is built once and reused for every event.
+    The listeners read the tenant's config when they run so a config change doesn't require a rebuild.
+    The team to tenant mapping is cached for a minute so the other API processes pick up an install or removal.
+    """
+
+    _apps: dict[tuple, TenantAsyncSlackApp] = {}
+    _team_tenants: TTLCache = TTLCache(maxsize=1024, ttl=60)
+
+    @classmethod
+    async def get_tenant_name(cls, team_id: str) -> Optional[str]:
+        if tenant_name := cls._team_tenants.get(team_id):
+            return tenant_name
+
+        tenant = await get_tenant_from_team_id(team_id)
+        if not tenant:
+            # Not cached, the team may be in the middle of installing the app
+            return None
+        cls._team_tenants[team_id] = tenant.name
+        return tenant.name
+
+    @classmethod
+    async def get_slack_app(
+        cls, tenant: str, enterprise_id: str, team_id: str, app_id: str
+    ) -> TenantAsyncSlackApp:
+        key = (tenant, enterprise_id, team_id, app_id)
+        if not (slack_app := cls._apps.get(key)):
+            slack_app = await TenantSlackApp(*key).get_slack_app()
+            cls._apps[key] = slack_app
+        return slack_app
+
+    @classmethod
+    def invalidate(cls, tenant: str):
+        """Drop the tenant's apps and team mappings, called when the tenant installs or removes the Slack app."""
+        for key in [key for key in cls._apps if key[0] == tenant]:
+            cls._apps.pop(key, None)
+        for team_id, tenant_name in list(cls._team_tenants.items()):
+            if tenant_name == tenant:
+                cls._team_tenants.pop(team_id, None)
@@ -0,0 +1,191 @@
+import abc
+import time
+from bisect import bisect_left
+from typing import Optional
+
+from policyuniverse import all_permissions
+from policyuniverse.expander_minimizer import _expand_wildcard_action
+
+from common.config import config
+from common.config.tenant_config import TenantConfig
+from common.lib.asyncio import aio_wrapper
+from common.lib.cache import retrieve_json_data_from_redis_or_s3
+from common.lib.redis import RedisHandler
+from common.lib.slack.workflows import FRIENDLY_RESOURCE_TYPE_NAMES
+
+# Slack rejects an options response with more than 100 options
+MAX_OPTIONS = 100
+
+_aws_services: Optional[list[str]] = None
+
+
+class TypeaheadIndex(abc.ABC):
+    """
+    In-process index of a tenant's cached typeahead entries, keyed by the tenant and the cache's redis key.
+
+    Rebuilt when store_json_results_in_redis_and_s3 records a newer write of the cache,
+    so a keystroke costs a single HGET instead of loading and scanning the whole cache.
+    """
+
+    # Rebuilt after this long if the cache's last updated time isn't available
+    max_age_seconds = 300
+
+    _indexes: dict[tuple[str, str], "TypeaheadIndex"] = {}
+
+    def __init__(self, entries: list, last_updated: Optional[str]):
+        self.entries = entries
+        self.last_updated = last_updated
+        self.built_at = time.time()
+
+    @staticmethod
+    @abc.abstractmethod
+    def build_entries(data) -> list:
+        """Build the index's entries from the cached data."""
+
+    @classmethod
+    async def get(cls, tenant: str, redis_key: str) -> "TypeaheadIndex":
+        last_updated_redis_key = config.get_tenant_specific_key(
+            "store_json_results_in_redis_and_s3.last_updated_redis_key",
+            tenant,
+            f"{tenant}_STORE_JSON_RESULTS_IN_REDIS_AND_S3_LAST_UPDATED",
+        )
+        red = await RedisHandler().redis(tenant)
+        last_updated = await aio_wrapper(red.hget, last_updated_redis_key, redis_key)
+
+        index = cls._indexes.get((tenant, redis_key))
+        if index and (
+            (last_updated and index.last_updated == last_updated)
+            or (not last_updated and time.time() - index.built_at < cls.max_age_seconds)
+        ):
+            return index
+
+        data = await retrieve_json_data_from_redis_or_s3(
+            redis_key=redis_key,
+            tenant=tenant,
+        )
+        index = cls(cls.build_entries(data), last_updated)
+        cls._indexes[(tenant, redis_key)] = index
+        return index
+
+
+class TemplateTypeaheadIndex(TypeaheadIndex):
+    @staticmethod
+    def build_entries(data) -> list[tuple[str, Optional[str], Optional[str], dict]]:
+        entries = []
+        for template in data or []:
+            identifier = template.get("identifier")
+            name = (template.get("properties") or {}).get("name")
+            entries.append(
+                (
+                    template["template_type"],
+                    identifier.lower() if isinstance(identifier, str) else None,
+                    name.lower() if isinstance(name, str) else None,
+                    template,
+                )
+            )
+        return entries
+
+    def search(self, value: str, template_type: Optional[str] = None) -> list[dict]:
+        """Templates whose identifier or name contains the value, identifier matches first."""
+        value = value.lower()
+        identifier_matches = []
+        name_matches = []
+        for entry_template_type, identifier, name, template in self.entries:
+            if template_type and entry_template_type != template_type:
+                continue
+            if identifier is not None and value in identifier:
+                identifier_matches.append(template)
+            elif name is not None and value in name:
+                name_matches.append(template)
+
+        # Remove duplicates if repo_relative_file_path is the same
+        res = {
+            template["repo_relative_file_path"]: template
+            for template in identifier_matches + name_matches
+        }
+        return list(res.values())[:MAX_OPTIONS]
+
+
+class CloudIdentityTypeaheadIndex(TypeaheadIndex):
+    @staticmethod
+    def build_entries(data) -> list[tuple[str, str, str, dict]]:
+        entries = []
+        for arn, template_details in (data or {}).items():
+            account_id = arn.split(":")[4]
+            partial_arn = arn.replace(f"arn:aws:iam::{account_id}:", "")
+            account_name_arn = f"{template_details['account_name']}:{partial_arn}"
+            template_type = template_details["template_type"]
+            entries.append(
+                (
+                    arn.lower(),
+                    account_name_arn.lower(),
+                    FRIENDLY_RESOURCE_TYPE_NAMES.get(template_type, template_type),
+                    {
+                        "text": {
+                            "type": "plain_text",
+                            "text": account_name_arn[:75],
+                        },
+                        # Warning: Slack docs specify the max length of options value is 75 characters
+                        # but it is actually larger. Slack will not give you an error if this is exceeded,
+                        # and you will be left wandering aimlessly in the abyss.
+                        "value": template_details["hash"][:75],
+                    },
+                )
+            )
+        return entries
+
+    def search(self, value: str) -> list[tuple[str, dict]]:
+        """The friendly template type and option of each identity whose ARN or account name contains the value."""
+        value = value.lower()
+        res = []
+        for arn, account_name_arn, friendly_name, option in self.entries:
+            if value in arn or value in account_name_arn:
+                res.append((friendly_name, option))
+                if len(res) >= MAX_OPTIONS:
+                    break
+        return res
+
+
+async def search_templates(
+    tenant: str, value: str, template_type: Optional[str] = None
+) -> list[dict]:
+    index = await TemplateTypeaheadIndex.get(
+        tenant, TenantConfig.get_instance(tenant).iambic_templates_redis_key
+    )
+    return index.search(value, template_type)
+
+
+async def search_cloud_identities(tenant: str, value: str) -> list[tuple[str, dict]]:
+    index = await CloudIdentityTypeaheadIndex.get(
+        tenant, TenantConfig.get_instance(tenant).iambic_arn_typeahead_redis_key
+    )
+    return index.search(value)
+
+
+def search_aws_services(value: str) -> list[str]:
+    """
+    The AWS services with an action starting with the value, using a sorted list of the services built once.
+
+    Matches what expanding `{value}*` with policyuniverse returns,
+    a value with wildcards of its own is still expanded with policyuniverse.
+    """
+    global _aws_services
+
+    value = value.lower()
+    if any(char in value for char in "*?["):
+        results = _expand_wildcard_action(value + "*")
+        return sorted({r.split(":")[0].replace("*", "") for r in results if ":" in r})
+    if ":" in value:
+        # policyuniverse returns the value itself when no action matches, so it's always the service
+        return [value.split(":")[0]]
+
+    if _aws_services is None:
+        _aws_services = sorted(
+            {permission.split(":")[0].lower() for permission in all_permissions}
+        )
+    services = []
+    for service in _aws_services[bisect_left(_aws_services, value) :]:
+        if not service.startswith(value):
+            break
+        services.append(service)
+    return services
@@ -1,9 +1,9 @@
+import asyncio
 from datetime import datetime, timedelta
 from typing import List, Optional, Union
 
 from policy_sentry.util.arns import parse_arn
 
-import common.lib.noq_json as json
 from common.aws.iam.role.models import IAMRole
 from common.aws.iam.user.utils import fetch_iam_user
 from common.aws.utils import get_resource_tag
@@ -11,9 +11,10 @@ from common.config import config
 from common.config.models import ModelAdapter
 from common.lib.account_indexers import get_account_id_to_name_mapping
 from common.lib.asyncio import aio_wrapper
+from common.lib.aws.resource_errors import get_s3_errors_for_arn
 from common.lib.plugins import get_plugin_by_name
 from common.lib.policies import get_aws_config_history_url_for_resource
-from common.lib.redis import RedisHandler, redis_get
+from common.lib.redis import RedisHandler
 from common.models import (
     AppDetailsArray,
     AwsPrincipalModel,
@@ -109,13 +110,7 @@ async def get_s3_details_for_role(
         yesterday=yesterday, role_name=f"'{role_name}'", account_id=f"'{account_id}'"
     )
 
-    s3_error_topic = config.get_tenant_specific_key(
-        "redis.s3_errors", tenant, f"{tenant}_S3_ERRORS"
-    )
-    all_s3_errors = await redis_get(s3_error_topic, tenant)
-    s3_errors_unformatted = []
-    if all_s3_errors:
-        s3_errors_unformatted = json.loads(all_s3_errors).get(arn, [])
+    s3_errors_unformatted = await aio_wrapper(get_s3_errors_for_arn, tenant, arn)
     s3_errors_formatted = []
     for error in s3_errors_unformatted:
         s3_errors_formatted.append(
@@ -172,30 +167,41 @@ async def get_user_details(
     extended: bool = False,
     force_refresh: bool = False,
 ) -> Optional[Union[ExtendedAwsPrincipalModel, AwsPrincipalModel]]:
-    account_ids_to_name = await get_account_id_to_name_mapping(tenant)
     arn = f"arn:aws:iam::{account_id}:user/{user_name}"
 
-    user = await fetch_iam_user(account_id, arn, tenant)
+    user, account_ids_to_name = await asyncio.gather(
+        fetch_iam_user(account_id, arn, tenant),
+        get_account_id_to_name_mapping(tenant),
+    )
     # requested user doesn't exist
     if not user:
         return None
     if extended:
+        (
+            config_timeline_url,
+            cloudtrail_details,
+            s3_details,
+            apps,
+        ) = await asyncio.gather(
+            get_config_timeline_url_for_role(user, account_id, tenant),
+            get_cloudtrail_details_for_role(arn, tenant),
+            get_s3_details_for_role(
+                account_id=account_id,
+                role_name=user_name,
+                tenant=tenant,
+            ),
+            get_app_details_for_role(arn, tenant),
+        )
         return ExtendedAwsPrincipalModel(
             name=user_name,
             account_id=account_id,
             account_name=account_ids_to_name.get(account_id, None),
             arn=arn,
             inline_policies=user.get("UserPolicyList", []),
-            config_timeline_url=await get_config_timeline_url_for_role(
-                user, account_id, tenant
-            ),
-            cloudtrail_details=await get_cloudtrail_details_for_role(arn, tenant),
-            s3_details=await get_s3_details_for_role(
-                account_id=account_id,
-                role_name=user_name,
-                tenant=tenant,
-            ),
-            apps=await get_app_details_for_role(arn, tenant),
+            config_timeline_url=config_timeline_url,
+            cloudtrail_details=cloudtrail_details,
+            s3_details=s3_details,
+            apps=apps,
             managed_policies=user["AttachedManagedPolicies"],
             groups=user["Groups"],
             tags=user["Tags"],
@@ -286,15 +292,15 @@ async def get_role_details(
     force_refresh: bool = False,
     is_admin_request: bool = False,
 ) -> Optional[Union[ExtendedAwsPrincipalModel, AwsPrincipalModel]]:
-    account_ids_to_name = await get_account_id_to_name_mapping(tenant)
     arn = f"arn:aws:iam::{account_id}:role/{role_name}"
-    role: IAMRole = await IAMRole.get(
-        tenant, account_id, arn, force_refresh=force_refresh
+    iam_role, account_ids_to_name = await asyncio.gather(
+        IAMRole.get(tenant, account_id, arn, force_refresh=force_refresh),
+        get_account_id_to_name_mapping(tenant),
     )
-    if not role:  # requested role doesn't exist
+    if not iam_role:  # requested role doesn't exist
         return None
 
-    role: dict = role.dict()
+    role: dict = iam_role.dict()
     account_info: SpokeAccount = (
         ModelAdapter(SpokeAccount)
         .load_config("spoke_accounts", tenant)
@@ -303,9 +309,27 @@ async def get_role_details(
     )
 
     if extended:
-        elevated_access_config = None
-        role_access_config = None
-        template = await get_role_template(arn, tenant)
+        (
+            terraform,
+            template,
+            role_access_data,
+            config_timeline_url,
+            cloudtrail_details,
+            s3_details,
+            apps,
+        ) = await asyncio.gather(
+            iam_role.get_terraform(),
+            get_role_template(arn, tenant),
+            get_noq_authorization_tag_groups(role, tenant),
+            get_config_timeline_url_for_role(role, account_id, tenant),
+            get_cloudtrail_details_for_role(arn, tenant),
+            get_s3_details_for_role(
+                account_id=account_id,
+                role_name=role_name,
+                tenant=tenant,
+            ),
+            get_app_details_for_role(arn, tenant),
+        )
         tags = role["policy"]["Tags"]
 
         # Set elevated_access_config
@@ -320,7 +344,6 @@ async def get_role_details(
         )
 
         # Set role_access_config
-        role_access_data = await get_noq_authorization_tag_groups(role, tenant)
         role_access_config = PrincipalModelRoleAccessConfig(
             noq_authorized_tag=role_access_data["default_noq_authorized_tag"],
             noq_authorized_cli_tag=role_access_data["default_noq_authorized_cli_tag"],
@@ -339,16 +362,10 @@ async def get_role_details(
                 "RolePolicyList", role["policy"].get("UserPolicyList", [])
             ),
             assume_role_policy_document=role["policy"]["AssumeRolePolicyDocument"],
-            config_timeline_url=await get_config_timeline_url_for_role(
-                role, account_id, tenant
-            ),
-            cloudtrail_details=await get_cloudtrail_details_for_role(arn, tenant),
-            s3_details=await get_s3_details_for_role(
-                account_id=account_id,
-                role_name=role_name,
-                tenant=tenant,
-            ),
-            apps=await get_app_details_for_role(arn, tenant),
+            config_timeline_url=config_timeline_url,
+            cloudtrail_details=cloudtrail_details,
+            s3_details=s3_details,
+            apps=apps,
             managed_policies=role["policy"]["AttachedManagedPolicies"],
             tags=tags,
             elevated_access_config=elevated_access_config,
@@ -360,7 +377,7 @@ async def get_role_details(
             description=role["policy"].get("Description"),
             owner=role.get("owner"),
             permissions_boundary=role["policy"].get("PermissionsBoundary", {}),
-            terraform=role.get("terraform"),
+            terraform=terraform,
             read_only=account_info.read_only,
         )
     else:
@@ -1,63 +1,223 @@
-import json as original_json
 import sys
 import time
-from collections import defaultdict
-from typing import Dict
+from typing import Dict, Iterable, List, Optional, Set
 
 import sentry_sdk
 
-import common.lib.noq_json as json
 from common.config import config
 from common.lib.asyncio import aio_wrapper
-from common.lib.cache import (
-    retrieve_json_data_from_redis_or_s3,
-    store_json_results_in_redis_and_s3,
-)
 from common.lib.dynamo import UserDynamoHandler
-from common.lib.noq_json import SetEncoder
 from common.lib.notifications.models import (
     ConsoleMeUserNotification,
     GetNotificationsForUserResponse,
 )
-from common.lib.singleton import Singleton
+from common.lib.redis import RedisHandler
 
 log = config.get_logger(__name__)
 
 
-class RetrieveNotifications(metaclass=Singleton):
-    def __init__(self):
-        self.last_update = 0
-        self.all_notifications = []
+class NotificationIndex:
+    """
+    A per-tenant index of notifications in Redis.
+
+    Every notification is stored once in a hash keyed by its predictable_id.
+    Each user or group has a sorted set of the predictable_ids of their notifications, scored by expiration,
+    so the active notifications for a user and their groups are read with a range query per key.
+    A tenant wide sorted set, also scored by expiration, is used to find and remove expired notifications.
+
+    Writes only touch the keys of the notifications being written.
+    The methods are blocking, call them using aio_wrapper from async code.
+    """
+
+    def __init__(self, tenant: str):
+        self.tenant = tenant
+        self.red = RedisHandler().redis_sync(tenant)
+        key_prefix = config.get_tenant_specific_key(
+            "notifications.redis_key_prefix",
+            tenant,
+            f"{tenant}_NOTIFICATIONS",
+        )
+        self.notifications_key = key_prefix
+        self.expiration_key = f"{key_prefix}_EXPIRATION"
+        self.index_key_prefix = f"{key_prefix}_INDEX:"
+
+    def _index_key(self, user_or_group: str) -> str:
+        return f"{self.index_key_prefix}{user_or_group}"
+
+    def _get_users_or_groups(self, predictable_ids: List[str]) -> Dict[str, set]:
+        if not predictable_ids:
+            return {}
+
+        users_or_groups = {}
+        raw_notifications = self.red.hmget(self.notifications_key, predictable_ids)
+        for predictable_id, raw_notification in zip(predictable_ids, raw_notifications):
+            if not raw_notification:
+                continue
+            try:
+                notification = ConsoleMeUserNotification.parse_raw(raw_notification)
+            except Exception:
+                continue
+            users_or_groups[predictable_id] = notification.users_or_groups
+        return users_or_groups
+
+    def append(self, notifications: Iterable[ConsoleMeUserNotification]) -> int:
+        """
+        Add or update notifications in the index.
+
+        Users or groups that were removed from an existing notification no longer see it.
+
+        :return: The number of notifications written
+        """
+        notifications = {
+            notification.predictable_id: notification for notification in notifications
+        }
+        if not notifications:
+            return 0
+
+        previous_users_or_groups = self._get_users_or_groups(list(notifications))
+        pipeline = self.red.pipeline(transaction=False)
+        for predictable_id, notification in notifications.items():
+            pipeline.hset(self.notifications_key, predictable_id, notification.json())
+            pipeline.zadd(
+                self.expiration_key, {predictable_id: notification.expiration}
+            )
+            for user_or_group in notification.users_or_groups:
+                pipeline.zadd(
+                    self._index_key(user_or_group),
+                    {predictable_id: notification.expiration},
+                )
+            for user_or_group in previous_users_or_groups.get(
+                predictable_id, set()
+            ) - set(notification.users_or_groups):
+                pipeline.zrem(self._index_key(user_or_group), predictable_id)
+        pipeline.execute()
+        return len(notifications)
+
+    def expire(self, current_time: Optional[int] = None) -> int:
+        """
+        Remove notifications that have expired from the index.
+
+        :return: The number of notifications removed
+        """
+        if current_time is None:
+            current_time = int(time.time())
+
+        expired_ids = self.red.zrangebyscore(self.expiration_key, "-inf", current_time)
+        return self.remove(expired_ids)
+
+    def remove(self, predictable_ids: List[str]) -> int:
+        """
+        Remove notifications from the index.
+
+        :return: The number of notifications removed
+        """
+        if not predictable_ids:
+            return 0
+
+        users_or_groups = self._get_users_or_groups(predictable_ids)
+        pipeline = self.red.pipeline(transaction=False)
+        for predictable_id in predictable_ids:
+            for user_or_group in users_or_groups.get(predictable_id, set()):
+                pipeline.zrem(self._index_key(user_or_group), predictable_id)
+        pipeline.hdel(self.notifications_key, *predictable_ids)
+        pipeline.zrem(self.expiration_key, *predictable_ids)
+        pipeline.execute()
+        return len(predictable_ids)
+
+    def get_ids(self) -> Set[str]:
+        """Get the predictable_ids of every notification in the index."""
+        return set(self.red.hkeys(self.notifications_key))
+
+    def reconcile(
+        self,
+        notifications: Iterable[ConsoleMeUserNotification],
+        indexed_ids: Set[str],
+    ) -> Dict[str, int]:
+        """
+        Reconcile the index with a snapshot of the active notifications, without reverting concurrent writes.
+
+        Only notifications missing from the index are added, so a snapshot older than a write to the index never
+        overwrites it. Only the indexed_ids, read before the snapshot was taken, that aren't in the snapshot
+        are removed, so notifications written after the snapshot was taken are kept.
+
+        :return: The number of notifications added and removed
+        """
+        notifications = {
+            notification.predictable_id: notification for notification in notifications
+        }
+        removed = self.remove(list(indexed_ids - set(notifications)))
+
+        missing_ids = [
+            predictable_id
+            for predictable_id in notifications
+            if predictable_id not in indexed_ids
+        ]
+        pipeline = self.red.pipeline(transaction=False)
+        for predictable_id in missing_ids:
+            pipeline.hsetnx(
+                self.notifications_key,
+                predictable_id,
+                notifications[predictable_id].json(),
+            )
+        # HSETNX fails for notifications written since the index was read, their writer indexed them
+        added_ids = [
+            predictable_id
+            for predictable_id, added in zip(missing_ids, pipeline.execute())
+            if added
+        ]
+
+        pipeline = self.red.pipeline(transaction=False)
+        for predictable_id in added_ids:
+            notification = notifications[predictable_id]
+            pipeline.zadd(
+                self.expiration_key, {predictable_id: notification.expiration}
+            )
+            for user_or_group in notification.users_or_groups:
+                pipeline.zadd(
+                    self._index_key(user_or_group),
+                    {predictable_id: notification.expiration},
+                )
+        pipeline.execute()
+        return {"added": len(added_ids), "removed": removed}
+
+    def get_for_users_or_groups(
+        self, users_or_groups: Iterable[str], current_time: Optional[int] = None
+    ) -> List[str]:
+        """
+        Get the serialized notifications that haven't expired for any of the users or groups.
+
+        A notification shared by several of the users or groups is only returned once.
+        """
+        if current_time is None:
+            current_time = int(time.time())
 
-    async def retrieve_all_notifications(self, tenant, force_refresh=False):
-        if force_refresh or (
-            int(time.time()) - self.last_update
-            > config.get_tenant_specific_key(
-                "get_notifications_for_user.notification_retrieval_interval",
-                tenant,
-                20,
+        users_or_groups = list(dict.fromkeys(users_or_groups))
+        if not users_or_groups:
+            return []
+
+        pipeline = self.red.pipeline(transaction=False)
+        for user_or_group in users_or_groups:
+            pipeline.zrangebyscore(
+                self._index_key(user_or_group), f"({current_time}", "+inf"
+            )
+
+        predictable_ids = list(
+            dict.fromkeys(
+                predictable_id
+                for index_ids in pipeline.execute()
+                for predictable_id in index_ids
             )
-        ):
-            self.all_notifications = await retrieve_json_data_from_redis_or_s3(
-                redis_key=config.get_tenant_specific_key(
-                    "notifications.redis_key",
-                    tenant,
-                    f"{tenant}_ALL_NOTIFICATIONS",
-                ),
-                redis_data_type="hash",
-                s3_bucket=config.get_tenant_specific_key(
-                    "notifications.s3.bucket", tenant
-                ),
-                s3_key=config.get_tenant_specific_key(
-                    "notifications.s3.key",
-                    tenant,
-                    "notifications/all_notifications_v1.json.gz",
-                ),
-                default={},
-                tenant=tenant,
+        )
+        if not predictable_ids:
+            return []
+
+        return [
+            raw_notification
+            for raw_notification in self.red.hmget(
+                self.notifications_key, predictable_ids
             )
-            self.last_update = int(time.time())
-        return self.all_notifications
+            if raw_notification
+        ]
 
 
 async def get_notifications_for_user(
@@ -65,67 +225,48 @@ async def get_notifications_for_user(
     groups,
     tenant,
     max_notifications,
-    force_refresh=False,
 ) -> GetNotificationsForUserResponse:
     function = f"{__name__}.{sys._getframe().f_code.co_name}"
     log_data = {
         "function": function,
         "user": user,
         "max_notifications": max_notifications,
-        "force_refresh": force_refresh,
         "tenant": tenant,
     }
 
     current_time = int(time.time())
-    all_notifications = await RetrieveNotifications().retrieve_all_notifications(
-        tenant, force_refresh=force_refresh
+    if not groups:
+        groups = []
+    # Identical notifications can be attributed to the user and their groups. IE: "UserA" performed an access deny
+    # operation locally under "RoleA" with session name = "UserA", so the generated notification is tied to the user.
+    # However, "UserA" is a member of "GroupA", which owns RoleA. We want to show the notification to members of
+    # "GroupA", as well as "UserA" but we don't want "UserA" to see 2 notifications. The index only returns each
+    # notification once.
+    raw_notifications = await aio_wrapper(
+        NotificationIndex(tenant).get_for_users_or_groups,
+        [user, *groups],
+        current_time,
     )
+
     unread_count = 0
     notifications_for_user = []
-    if not groups:
-        groups = []
-    for user_or_group in [user, *groups]:
-        # Filter out identical notifications that were already captured via user-specific attribution. IE: "UserA"
-        # performed an access deny operation locally under "RoleA" with session name = "UserA", so the generated
-        # notification is tied to the user. However, "UserA" is a member of "GroupA", which owns RoleA. We want
-        # to show the notification to members of "GroupA", as well as "UserA" but we don't want "UserA" to see 2
-        # notifications.
-        notifications = all_notifications.get(user_or_group)
-        if not notifications:
+    for notification_raw in raw_notifications:
+        try:
+            # We parse ConsoleMeUserNotification individually instead of as an array
+            # to account for future changes to the model that may invalidate older
+            # notifications
+            notification = ConsoleMeUserNotification.parse_raw(notification_raw)
+        except Exception as e:
+            log.error({**log_data, "error": str(e)})
+            sentry_sdk.capture_exception()
             continue
-        notifications = json.loads(notifications)
-        for notification_raw in notifications:
-            try:
-                # We parse ConsoleMeUserNotification individually instead of as an array
-                # to account for future changes to the model that may invalidate older
-                # notifications
-                notification = ConsoleMeUserNotification.parse_obj(notification_raw)
-            except Exception as e:
-                log.error({**log_data, "error": str(e)})
-                sentry_sdk.capture_exception()
-                continue
-            if notification.version != 1:
-                # Skip unsupported versions of the notification model
-                continue
-            if user in notification.hidden_for_users:
-                # Skip this notification if it isn't hidden for the user
-                continue
-            seen = False
-            for existing_user_notification_raw in notifications_for_user:
-                existing_user_notification = ConsoleMeUserNotification.parse_obj(
-                    existing_user_notification_raw
-                )
-                if (
-                    notification.predictable_id
-                    == existing_user_notification.predictable_id
-                ):
-                    seen = True
-            if not seen:
-                notifications_for_user.append(notification)
-    # Filter out "expired" notifications
-    notifications_for_user = [
-        v for v in notifications_for_user if v.expiration > current_time
-    ]
+        if notification.version != 1:
+            # Skip unsupported versions of the notification model
+            continue
+        if user in notification.hidden_for_users:
+            # Skip this notification if it isn't hidden for the user
+            continue
+        notifications_for_user.append(notification)
 
     # Show newest notifications first
     notifications_for_user = sorted(
@@ -155,59 +296,70 @@ async def fetch_notification(notification_id: str, tenant: str):
 
 
 async def cache_notifications_to_redis_s3(tenant) -> Dict[str, int]:
+    """
+    Reconcile the tenant's notification index with the notifications table and flag expired notifications.
+
+    Run periodically to reconcile the index with Dynamo. Notifications are added to the index as they're written.
+    """
     function = f"{__name__}.{sys._getframe().f_code.co_name}"
     current_time = int(time.time())
-    log_data = {"function": function}
+    log_data = {"function": function, "tenant": tenant}
     ddb = UserDynamoHandler(tenant=tenant)
-    notifications_by_user_group = defaultdict(list)
+    notification_index = NotificationIndex(tenant)
+    # Read before the scan so notifications written during the scan aren't removed from the index
+    indexed_ids = await aio_wrapper(notification_index.get_ids)
+    active_notifications = []
+    users_or_groups = set()
     all_notifications_l = await ddb.parallel_scan_table_async(ddb.notifications_table)
     changed_notifications = []
     for existing_notification in all_notifications_l:
         notification = ConsoleMeUserNotification.parse_obj(existing_notification)
         if current_time > notification.expiration:
-            notification.expired = True
-            changed_notifications.append(notification.dict())
-        for user_or_group in notification.users_or_groups:
-            notifications_by_user_group[user_or_group].append(notification.dict())
+            if not notification.expired:
+                notification.expired = True
+                changed_notifications.append(notification.dict())
+            continue
+        active_notifications.append(notification)
+        users_or_groups.update(notification.users_or_groups)
 
     if changed_notifications:
         ddb.parallel_write_table(ddb.notifications_table, changed_notifications)
 
-    if notifications_by_user_group:
-        for k, v in notifications_by_user_group.items():
-            notifications_by_user_group[k] = original_json.dumps(v, cls=SetEncoder)
-        await store_json_results_in_redis_and_s3(
-            notifications_by_user_group,
-            redis_key=config.get_tenant_specific_key(
-                "notifications.redis_key",
-                tenant,
-                f"{tenant}_ALL_NOTIFICATIONS",
-            ),
-            redis_data_type="hash",
-            s3_bucket=config.get_tenant_specific_key("notifications.s3.bucket", tenant),
-            s3_key=config.get_tenant_specific_key(
-                "notifications.s3.key",
-                tenant,
-                "notifications/all_notifications_v1.json.gz",
-            ),
-            tenant=tenant,
-        )
-    log_data["num_user_groups_for_notifications"] = len(
-        notifications_by_user_group.keys()
+    log_data["index_changes"] = await aio_wrapper(
+        notification_index.reconcile, active_notifications, indexed_ids
     )
+    log_data["num_user_groups_for_notifications"] = len(users_or_groups)
     log_data["num_notifications"] = len(all_notifications_l)
     log.debug(log_data)
     return {
-        "num_user_groups_to_notify": len(notifications_by_user_group.keys()),
+        "num_user_groups_to_notify": len(users_or_groups),
         "num_notifications": len(all_notifications_l),
     }
 
 
+async def write_notifications(
+    notifications: List[ConsoleMeUserNotification], tenant: str
+):
+    """Write notifications to Dynamo and add them to the notification index."""
+    if not notifications:
+        return
+
+    ddb = UserDynamoHandler(tenant=tenant)
+    await aio_wrapper(
+        ddb.parallel_write_table,
+        ddb.notifications_table,
+        [notification.dict() for notification in notifications],
+    )
+    notification_index = NotificationIndex(tenant)
+    await aio_wrapper(notification_index.append, notifications)
+    await aio_wrapper(notification_index.expire)
+
+
 async def write_notification(notification: ConsoleMeUserNotification, tenant):
     ddb = UserDynamoHandler(tenant=tenant)
     await aio_wrapper(
         ddb.notifications_table.put_item,
         Item=ddb._data_to_dynamo_replace(notification.dict()),
     )
-    await cache_notifications_to_redis_s3(tenant)
+    await aio_wrapper(NotificationIndex(tenant).append, [notification])
     return True
@@ -0,0 +1,91 @@
+from typing import Any
+
+from sqlalchemy import Enum, String, cast, text
+from sqlalchemy.sql.elements import ColumnElement
+
+from common.config.globals import ASYNC_PG_SESSION
+
+LIKE_ESCAPE_CHAR = "\\"
+
+
+def escape_like(value: str) -> str:
+    """
+    Escape the LIKE wildcard characters in a user provided search value.
+
+    :param value: The raw search value
+    :return: The value with %, _ and the escape character escaped
+    """
+    return (
+        str(value)
+        .replace(LIKE_ESCAPE_CHAR, LIKE_ESCAPE_CHAR * 2)
+        .replace("%", f"{LIKE_ESCAPE_CHAR}%")
+        .replace("_", f"{LIKE_ESCAPE_CHAR}_")
+    )
+
+
+def ilike_contains(column: Any, value: str) -> ColumnElement:
+    """
+    Case-insensitive substring match that can be served by a pg_trgm GIN index on the column.
+
+    :param column: The column to search. It must not be wrapped in a cast or the index will not be used.
+    :param value: The raw search value
+    """
+    return column.ilike(f"%{escape_like(value)}%", escape=LIKE_ESCAPE_CHAR)
+
+
+def ilike_startswith(column: Any, value: str) -> ColumnElement:
+    """
+    Case-insensitive prefix match that can be served by a pg_trgm GIN index on the column.
+
+    :param column: The column to search. It must not be wrapped in a cast or the index will not be used.
+    :param value: The raw search value
+    """
+    return column.ilike(f"{escape_like(value)}%", escape=LIKE_ESCAPE_CHAR)
+
+
+def searchable_columns(Table) -> list:
+    """
+    Get the columns of a table that are included in a general search.
+
+    Text columns are searched as is so the condition can use a trigram index on the column.
+    Other columns, such as IDs, numbers, timestamps and enums, are cast to text so they can still be matched.
+    Generated columns are skipped as they are derived from columns that are already searched.
+    """
+    columns = []
+    for col in Table.__table__.columns:
+        if col.computed is not None:
+            continue
+
+        column = getattr(Table, col.key)
+        if not isinstance(col.type, String) or isinstance(col.type, Enum):
+            column = cast(column, String)
+        columns.append(column)
+
+    return columns
+
+
+async def explain_query(
+    stmt, analyze: bool = False, enable_seqscan: bool = True
+) -> str:
+    """
+    Get the Postgres query plan for a statement.
+
+    Used to verify search conditions are resolved using an index.
+
+    :param stmt: The SQLAlchemy statement to explain
+    :param analyze: Whether to run the statement and include the actual timings
+    :param enable_seqscan: Set to False to check the planner is able to use an index on small tables,
+        where a sequential scan is always the cheapest plan
+    :return: The query plan as a newline delimited string
+    """
+    async with ASYNC_PG_SESSION() as session:
+        async with session.begin():
+            if not enable_seqscan:
+                await session.execute(text("SET LOCAL enable_seqscan = off"))
+
+            compiled = stmt.compile(
+                dialect=session.bind.dialect, compile_kwargs={"literal_binds": True}
+            )
+            explain_stmt = "EXPLAIN ANALYZE" if analyze else "EXPLAIN"
+            result = await session.execute(text(f"{explain_stmt} {compiled}"))
+            return "\n".join(row[0] for row in result.all())
@@ -1,7 +1,11 @@
 from itertools import chain, islice
-from typing import Iterable, List, TypeVar
+from typing import Any, Iterable, List, Optional, Sequence, TypeVar
 
+import psycopg
+from psycopg import sql
 from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from common.config.globals import ASYNC_PG_SESSION
 
@@ -38,6 +42,60 @@ async def bulk_add(instance_list: List[T]) -> List[T]:
     return instance_list
 
 
+async def bulk_copy(
+    model: Any,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    session: Optional[AsyncSession] = None,
+) -> int:
+    """
+    Stream rows into a model's table using Postgres COPY.
+
+    This bypasses the ORM entirely so no instances are created or flushed.
+    Rows are written as they are pulled from the iterable, which means a generator can be passed in
+     to avoid materializing the full data set.
+    Primary and foreign keys must be set on the rows by the caller.
+
+    If a session is provided the COPY is run in the session's current transaction,
+     otherwise a new session and transaction is created.
+
+    :param model: The SQLAlchemy model whose table is being loaded
+    :param columns: The column names, in the same order as the values in each row
+    :param rows: An iterable of row value sequences.
+        JSON columns must be passed as serialized strings.
+    :param session: An optional session to run the COPY in
+    :return: The number of rows written
+    """
+    if session is None:
+        async with ASYNC_PG_SESSION() as session:
+            async with session.begin():
+                return await bulk_copy(model, columns, rows, session)
+
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    driver_connection = raw_connection.driver_connection
+    table_name = model.__table__.name
+    copy_stmt = sql.SQL("COPY {} ({}) FROM STDIN").format(
+        sql.Identifier(table_name),
+        sql.SQL(", ").join(sql.Identifier(column) for column in columns),
+    )
+    row_count = 0
+
+    try:
+        async with driver_connection.cursor() as cursor:
+            async with cursor.copy(copy_stmt) as copy:
+                for row in rows:
+                    await copy.write_row(row)
+                    row_count += 1
+    except psycopg.IntegrityError as err:
+        # Surface the same exception type as the ORM path so callers handle both the same way
+        raise IntegrityError(
+            f"COPY {table_name} ({', '.join(columns)}) FROM STDIN", None, err
+        ) from err
+
+    return row_count
+
+
 async def bulk_delete(instance_list: List[T], as_query: bool = True) -> None:
     """Delete a list of instances from the database in batches.
 
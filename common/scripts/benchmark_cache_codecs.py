@@ -0,0 +1,99 @@
+"""Compares the size and latency of the S3 cache formats in common.lib.cache.codecs.
+
+Usage:
+    CONFIG_LOCATION=... python -m common.scripts.benchmark_cache_codecs
+"""
+import time
+
+from common.lib.cache.codecs import decode_cache_object, encode_cache_object
+
+CACHE_KEY_FORMATS = [
+    "benchmark_v1.json",
+    "benchmark_v1.json.gz",
+    "benchmark_v2.json.zst",
+    "benchmark_v2.msgpack.zst",
+]
+
+
+def generate_account_authorization_details(role_count: int = 2000) -> dict:
+    """A payload shaped like the get_account_authorization_details cache."""
+    account_id = "123456789012"
+    return {
+        "RoleDetailList": [
+            {
+                "Path": "/",
+                "RoleName": f"role_{i}",
+                "RoleId": f"AROA{i:016d}",
+                "Arn": f"arn:aws:iam::{account_id}:role/role_{i}",
+                "AssumeRolePolicyDocument": {
+                    "Version": "2012-10-17",
+                    "Statement": [
+                        {
+                            "Effect": "Allow",
+                            "Principal": {"Service": "ec2.amazonaws.com"},
+                            "Action": "sts:AssumeRole",
+                        }
+                    ],
+                },
+                "RolePolicyList": [
+                    {
+                        "PolicyName": f"policy_{i}_{p}",
+                        "PolicyDocument": {
+                            "Version": "2012-10-17",
+                            "Statement": [
+                                {
+                                    "Effect": "Allow",
+                                    "Action": [f"s3:GetObject{a}" for a in range(20)],
+                                    "Resource": [f"arn:aws:s3:::bucket-{i}-{p}/*"],
+                                }
+                            ],
+                        },
+                    }
+                    for p in range(3)
+                ],
+                "AttachedManagedPolicies": [
+                    {
+                        "PolicyName": "ReadOnlyAccess",
+                        "PolicyArn": "arn:aws:iam::aws:policy/ReadOnlyAccess",
+                    }
+                ],
+                "Tags": [{"Key": "owner", "Value": f"team_{i % 25}"}],
+            }
+            for i in range(role_count)
+        ],
+        "UserDetailList": [],
+        "GroupDetailList": [],
+        "Policies": [],
+    }
+
+
+def benchmark_cache_codecs(data: dict, iterations: int = 5) -> list[dict]:
+    results = []
+    for s3_key in CACHE_KEY_FORMATS:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            encoded = encode_cache_object(data, int(time.time()), s3_key)
+        encode_ms = (time.perf_counter() - start) * 1000 / iterations
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            decode_cache_object(encoded)
+        decode_ms = (time.perf_counter() - start) * 1000 / iterations
+
+        results.append(
+            {
+                "s3_key": s3_key,
+                "size_kb": round(len(encoded) / 1024, 1),
+                "encode_ms": round(encode_ms, 2),
+                "decode_ms": round(decode_ms, 2),
+            }
+        )
+    return results
+
+
+if __name__ == "__main__":
+    for result in benchmark_cache_codecs(generate_account_authorization_details()):
+        print(
+            f"{result['s3_key']:<28} {result['size_kb']:>10} KB "
+            f"{result['encode_ms']:>10} ms encode {result['decode_ms']:>10} ms decode"
+        )
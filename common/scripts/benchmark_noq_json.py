@@ -0,0 +1,117 @@
+"""Benchmarks common.lib.noq_json.dumps over representative payloads.
+
+Compares the single pass orjson encoder against the previous orjson -> ujson -> json fallback chain.
+
+Usage:
+    CONFIG_LOCATION=... python -m common.scripts.benchmark_noq_json
+"""
+import json
+import time
+from datetime import datetime
+from decimal import Decimal
+
+import orjson
+import ujson
+
+from common.lib.noq_json import SetEncoder, dumps
+
+
+def legacy_dumps(obj: any) -> str:
+    """The fallback chain used by noq_json.dumps before the orjson default hook."""
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    except TypeError:
+        try:
+            return ujson.dumps(obj)
+        except TypeError:
+            return json.dumps(obj, cls=SetEncoder)
+
+
+def generate_role_dicts(count: int = 1000) -> list[dict]:
+    return [
+        {
+            "arn": f"arn:aws:iam::123456789012:role/role_{i}",
+            "name": f"role_{i}",
+            "accountId": "123456789012",
+            "ttl": Decimal(1700000000 + i),
+            "templated": False,
+            "tags": [{"Key": "owner", "Value": f"team_{i % 25}"}],
+            "policy": {
+                "RolePolicyList": [
+                    {
+                        "PolicyName": f"policy_{i}",
+                        "PolicyDocument": {
+                            "Statement": [
+                                {
+                                    "Effect": "Allow",
+                                    "Action": [f"s3:GetObject{a}" for a in range(10)],
+                                    "Resource": "*",
+                                }
+                            ]
+                        },
+                    }
+                ]
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def generate_authorization_mapping(
+    role_count: int = 2000, group_count: int = 200
+) -> dict:
+    return {
+        f"arn:aws:iam::123456789012:role/role_{i}": {
+            "authorized_groups": {f"group_{g}@example.com" for g in range(i % 10)},
+            "authorized_groups_cli_only": {f"cli_group_{i % group_count}"},
+        }
+        for i in range(role_count)
+    }
+
+
+def generate_typeahead_array(count: int = 5000) -> list[dict]:
+    return [
+        {
+            "title": f"arn:aws:iam::123456789012:role/role_{i}",
+            "account": "123456789012",
+            "last_updated": datetime(2023, 1, 1),
+        }
+        for i in range(count)
+    ]
+
+
+PAYLOADS = {
+    "role_dicts": generate_role_dicts,
+    "authorization_mapping": generate_authorization_mapping,
+    "typeahead_array": generate_typeahead_array,
+}
+
+
+def benchmark_noq_json(iterations: int = 20) -> list[dict]:
+    results = []
+    for payload_name, generate_payload in PAYLOADS.items():
+        payload = generate_payload()
+        for implementation_name, implementation in [
+            ("legacy", legacy_dumps),
+            ("noq_json", dumps),
+        ]:
+            start = time.perf_counter()
+            for _ in range(iterations):
+                implementation(payload)
+            results.append(
+                {
+                    "payload": payload_name,
+                    "implementation": implementation_name,
+                    "dumps_ms": round(
+                        (time.perf_counter() - start) * 1000 / iterations, 2
+                    ),
+                }
+            )
+    return results
+
+
+if __name__ == "__main__":
+    for result in benchmark_noq_json():
+        print(
+            f"{result['payload']:<24} {result['implementation']:<10} {result['dumps_ms']:>10} ms"
+        )
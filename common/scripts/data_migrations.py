@@ -165,9 +165,38 @@ async def iambic_template_add_friendly_name():
         await iambic_template.write()
 
 
+async def iam_role_add_tenant_account_id():
+    """Set tenant_account_id on cached roles written before the account index, so the index has every role."""
+    from pynamodax.exceptions import UpdateError
+
+    from common.aws.iam.role.models import IAMRole
+
+    iam_roles = await IAMRole.scan(
+        filter_condition=IAMRole.tenant_account_id.does_not_exist(),
+        attributes_to_get=["tenant", "entity_id", "accountId"],
+    )
+    for iam_role in iam_roles:
+        try:
+            await iam_role.update(
+                actions=[
+                    IAMRole.tenant_account_id.set(
+                        IAMRole.get_tenant_account_id(
+                            iam_role.tenant, iam_role.accountId
+                        )
+                    )
+                ],
+                # Don't recreate roles deleted since the scan
+                condition=IAMRole.entity_id.exists(),
+            )
+        except UpdateError as err:
+            if err.cause_response_code != "ConditionalCheckFailedException":
+                raise
+
+
 def run_data_migrations():
     asyncio.run(typeahead_upgrade())
     asyncio.run(iambic_template_add_friendly_name())
+    asyncio.run(iam_role_add_tenant_account_id())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,65 @@
+"""migration
+
+Revision ID: 4f1d2c7e9a31
+Revises: 2921da1e8990
+Create Date: 2023-08-21 10:41:52.304816
+
+"""
+import sqlalchemy as sa  # noqa: F401
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "4f1d2c7e9a31"
+down_revision = "2921da1e8990"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+    op.execute(
+        """ALTER TABLE iambic_template_content ADD COLUMN iambic_managed VARCHAR GENERATED ALWAYS AS (content ->> 'iambic_managed') STORED;"""
+    )
+    op.create_index(
+        "iambic_tmplt_content_managed_idx",
+        "iambic_template_content",
+        ["tenant_id", "iambic_managed"],
+        unique=False,
+    )
+    op.create_index(
+        "iambic_tmplt_resource_id_trgm_idx",
+        "iambic_template",
+        ["resource_id"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"resource_id": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "iambic_tmplt_friendly_name_trgm_idx",
+        "iambic_template",
+        ["friendly_name"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"friendly_name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "itpd_resource_id_trgm_idx",
+        "iambic_template_provider_definition",
+        ["resource_id"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"resource_id": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "itpd_resource_id_trgm_idx",
+        table_name="iambic_template_provider_definition",
+    )
+    op.drop_index("iambic_tmplt_friendly_name_trgm_idx", table_name="iambic_template")
+    op.drop_index("iambic_tmplt_resource_id_trgm_idx", table_name="iambic_template")
+    op.drop_index(
+        "iambic_tmplt_content_managed_idx", table_name="iambic_template_content"
+    )
+    op.drop_column("iambic_template_content", "iambic_managed")
@@ -0,0 +1,50 @@
+"""migration
+
+Revision ID: 7b3e9d52c1a4
+Revises: 4f1d2c7e9a31
+Create Date: 2023-08-24 14:02:17.538261
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7b3e9d52c1a4"
+down_revision = "4f1d2c7e9a31"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "role_access",
+        sa.Column("all_users", sa.Boolean(), server_default=sa.false(), nullable=False),
+    )
+    op.add_column(
+        "role_access",
+        sa.Column(
+            "all_groups", sa.Boolean(), server_default=sa.false(), nullable=False
+        ),
+    )
+    op.create_index(
+        "uq_tenant_all_users_role",
+        "role_access",
+        ["tenant_id", "identity_role_id"],
+        unique=True,
+        postgresql_where=sa.text("all_users"),
+    )
+    op.create_index(
+        "uq_tenant_all_groups_role",
+        "role_access",
+        ["tenant_id", "identity_role_id"],
+        unique=True,
+        postgresql_where=sa.text("all_groups"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_tenant_all_groups_role", table_name="role_access")
+    op.drop_index("uq_tenant_all_users_role", table_name="role_access")
+    op.execute("DELETE FROM role_access WHERE all_users OR all_groups")
+    op.drop_column("role_access", "all_groups")
+    op.drop_column("role_access", "all_users")
@@ -32,6 +32,7 @@ try:
         AttributeDefinitions=[
             {"AttributeName": "tenant", "AttributeType": "S"},
             {"AttributeName": "entity_id", "AttributeType": "S"},
+            {"AttributeName": "tenant_account_id", "AttributeType": "S"},
         ],
         KeySchema=[
             {"AttributeName": "tenant", "KeyType": "HASH"},
@@ -58,7 +59,24 @@ try:
                     "ReadCapacityUnits": 1,
                     "WriteCapacityUnits": 1,
                 },
-            }
+            },
+            {
+                "IndexName": "tenant_account_id_index",
+                "KeySchema": [
+                    {
+                        "AttributeName": "tenant_account_id",
+                        "KeyType": "HASH",
+                    },
+                ],
+                "Projection": {
+                    "ProjectionType": "INCLUDE",
+                    "NonKeyAttributes": ["arn"],
+                },
+                "ProvisionedThroughput": {
+                    "ReadCapacityUnits": 1,
+                    "WriteCapacityUnits": 1,
+                },
+            },
         ],
     )
 
@@ -0,0 +1,119 @@
+import datetime
+import threading
+import time
+from unittest import IsolatedAsyncioTestCase
+
+from mock import AsyncMock, patch
+
+from util.tests.fixtures.globals import tenant
+
+
+class NoSuchEntityException(Exception):
+    pass
+
+
+class FakeIam:
+    """An IAM client whose Access Advisor jobs finish after `in_progress_polls` polls."""
+
+    class exceptions:
+        NoSuchEntityException = NoSuchEntityException
+
+    def __init__(self, in_progress_polls=0, job_status="COMPLETED", missing_arns=()):
+        self.in_progress_polls = in_progress_polls
+        self.job_status = job_status
+        self.missing_arns = set(missing_arns)
+        self.polls = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _track(self):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.01)
+        with self._lock:
+            self.in_flight -= 1
+
+    def generate_service_last_accessed_details(self, Arn):
+        self._track()
+        if Arn in self.missing_arns:
+            raise NoSuchEntityException()
+        return {"JobId": Arn}
+
+    def get_service_last_accessed_details(self, JobId, Marker=None):
+        self._track()
+        self.polls[JobId] = self.polls.get(JobId, 0) + 1
+        if self.polls[JobId] <= self.in_progress_polls:
+            return {"JobStatus": "IN_PROGRESS"}
+        if not Marker:
+            return {
+                "JobStatus": self.job_status,
+                "ServicesLastAccessed": [
+                    {
+                        "ServiceNamespace": "s3",
+                        "LastAuthenticated": datetime.datetime(2023, 1, 1),
+                    }
+                ],
+                "IsTruncated": True,
+                "Marker": "page_2",
+            }
+        return {
+            "JobStatus": self.job_status,
+            "ServicesLastAccessed": [{"ServiceNamespace": "ec2"}],
+            "IsTruncated": False,
+        }
+
+
+class TestStreamAccessAdvisorData(IsolatedAsyncioTestCase):
+    async def collect(self, iam, arns, max_concurrent_requests=5):
+        from common.lib.aws.access_advisor import AccessAdvisor
+
+        access_advisor = AccessAdvisor(tenant)
+        access_advisor.max_concurrent_requests = max_concurrent_requests
+        return {
+            arn: services
+            async for arn, services in access_advisor.stream_access_advisor_data(
+                iam, arns
+            )
+        }
+
+    async def test_results_are_paginated_and_converted(self):
+        iam = FakeIam(missing_arns=["arn:missing"])
+        with patch("common.lib.aws.access_advisor.asyncio.sleep", AsyncMock()):
+            results = await self.collect(iam, ["arn:role_a", "arn:missing"])
+
+        self.assertEqual(list(results), ["arn:role_a"])
+        self.assertEqual(
+            [service["ServiceNamespace"] for service in results["arn:role_a"]],
+            ["s3", "ec2"],
+        )
+        self.assertEqual(
+            results["arn:role_a"][0]["LastAuthenticated"],
+            int(time.mktime(datetime.datetime(2023, 1, 1).timetuple()) * 1000),
+        )
+        self.assertEqual(results["arn:role_a"][1]["LastAuthenticated"], 0)
+
+    async def test_jobs_are_polled_with_backoff(self):
+        iam = FakeIam(in_progress_polls=3)
+        with patch("common.lib.aws.access_advisor.asyncio.sleep", AsyncMock()) as sleep:
+            results = await self.collect(iam, ["arn:role_a"])
+
+        self.assertEqual(list(results), ["arn:role_a"])
+        self.assertEqual([call.args[0] for call in sleep.await_args_list], [1, 2, 4, 8])
+
+    async def test_failed_jobs_are_skipped(self):
+        iam = FakeIam(job_status="FAILED")
+        with patch("common.lib.aws.access_advisor.asyncio.sleep", AsyncMock()):
+            results = await self.collect(iam, ["arn:role_a"])
+
+        self.assertEqual(results, {})
+
+    async def test_concurrent_requests_are_bounded(self):
+        iam = FakeIam(in_progress_polls=1)
+        arns = [f"arn:role_{i}" for i in range(10)]
+        with patch("common.lib.aws.access_advisor.asyncio.sleep", AsyncMock()):
+            results = await self.collect(iam, arns, max_concurrent_requests=2)
+
+        self.assertEqual(sorted(results), sorted(arns))
+        self.assertLessEqual(iam.max_in_flight, 2)
@@ -0,0 +1,92 @@
+import gzip
+import json
+from unittest import TestCase
+
+import zstandard
+
+
+class TestCacheCodecs(TestCase):
+    def setUp(self):
+        self.data = {
+            "arn:aws:iam::123456789012:role/role_1": {"tags": {"a", "b"}, "count": 1},
+            "nested": [{"name": "value"}, None, 1.5, True],
+        }
+        self.expected_data = {
+            "arn:aws:iam::123456789012:role/role_1": {"tags": ["a", "b"], "count": 1},
+            "nested": [{"name": "value"}, None, 1.5, True],
+        }
+
+    def _round_trip(self, s3_key: str) -> tuple[bytes, dict]:
+        from common.lib.cache.codecs import decode_cache_object, encode_cache_object
+
+        encoded = encode_cache_object(self.data, 1234, s3_key)
+        decoded = decode_cache_object(encoded)
+        decoded["data"]["arn:aws:iam::123456789012:role/role_1"]["tags"].sort()
+        return encoded, decoded
+
+    def test_round_trip_all_formats(self):
+        for s3_key in [
+            "cache_v1.json",
+            "cache_v1.json.gz",
+            "cache_v2.json.zst",
+            "cache_v2.msgpack.zst",
+        ]:
+            with self.subTest(s3_key=s3_key):
+                _, decoded = self._round_trip(s3_key)
+                self.assertEqual(decoded["last_updated"], 1234)
+                self.assertEqual(decoded["data"], self.expected_data)
+
+    def test_gz_is_readable_by_legacy_readers(self):
+        encoded, _ = self._round_trip("cache_v1.json.gz")
+        legacy = json.loads(gzip.decompress(encoded))
+        legacy["data"]["arn:aws:iam::123456789012:role/role_1"]["tags"].sort()
+        self.assertEqual(legacy["data"], self.expected_data)
+
+    def test_zst_envelope_is_versioned(self):
+        from common.lib.cache.codecs import (
+            CODEC_MSGPACK,
+            ENVELOPE_HEADER,
+            ENVELOPE_MAGIC,
+            ENVELOPE_VERSION,
+        )
+
+        encoded, _ = self._round_trip("cache_v2.msgpack.zst")
+        content = zstandard.ZstdDecompressor().decompress(encoded)
+        self.assertEqual(
+            ENVELOPE_HEADER.unpack_from(content),
+            (ENVELOPE_MAGIC, ENVELOPE_VERSION, CODEC_MSGPACK),
+        )
+
+    def test_unsupported_envelope_version(self):
+        from common.lib.cache.codecs import (
+            CODEC_JSON,
+            ENVELOPE_HEADER,
+            ENVELOPE_MAGIC,
+            ENVELOPE_VERSION,
+            decode_cache_object,
+        )
+
+        content = zstandard.ZstdCompressor().compress(
+            ENVELOPE_HEADER.pack(ENVELOPE_MAGIC, ENVELOPE_VERSION + 1, CODEC_JSON)
+            + b"{}"
+        )
+        with self.assertRaises(ValueError):
+            decode_cache_object(content)
+
+    def test_object_hook_is_applied(self):
+        from common.lib.cache.codecs import decode_cache_object, encode_cache_object
+
+        def object_hook(obj):
+            if "count" in obj:
+                obj["hooked"] = True
+            return obj
+
+        for s3_key in ["cache_v1.json.gz", "cache_v2.msgpack.zst"]:
+            with self.subTest(s3_key=s3_key):
+                decoded = decode_cache_object(
+                    encode_cache_object(self.data, 1234, s3_key),
+                    json_object_hook=object_hook,
+                )
+                self.assertTrue(
+                    decoded["data"]["arn:aws:iam::123456789012:role/role_1"]["hooked"]
+                )
@@ -0,0 +1,75 @@
+import json
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock, patch
+
+from util.tests.fixtures.globals import tenant
+
+
+def build_message(message_id, action, event_time="2023-01-01T00:00:00Z"):
+    return {
+        "MessageId": message_id,
+        "ReceiptHandle": f"{message_id}-receipt",
+        "Body": json.dumps(
+            {
+                "detail": {
+                    "eventName": action,
+                    "eventSource": "s3.amazonaws.com",
+                    "eventTime": event_time,
+                    "errorCode": "AccessDenied",
+                    "errorMessage": "Access Denied",
+                    "sourceIPAddress": "1.2.3.4",
+                    "recipientAccountId": "123456789012",
+                    "requestParameters": {"bucketName": "bucket"},
+                    "userIdentity": {
+                        "arn": "arn:aws:sts::123456789012:assumed-role/role/user",
+                        "sessionContext": {
+                            "sessionIssuer": {
+                                "arn": "arn:aws:iam::123456789012:role/role"
+                            }
+                        },
+                    },
+                }
+            }
+        ),
+    }
+
+
+class TestCloudTrailDenyPipeline(IsolatedAsyncioTestCase):
+    @patch("common.lib.cloudtrail.auto_perms.UserDynamoHandler")
+    @patch("common.lib.cloudtrail.auto_perms.process_event")
+    @patch("common.lib.cloudtrail.auto_perms.get_generated_policies")
+    async def test_denies_are_analyzed_once_and_only_changes_written(
+        self, mock_get_generated_policies, mock_process_event, mock_dynamo_handler
+    ):
+        from common.lib.cloudtrail.auto_perms import CloudTrailDenyPipeline
+
+        policy = {"Statement": [{"Action": ["s3:GetObject"]}]}
+        mock_get_generated_policies.return_value = (True, policy)
+        sqs_client = MagicMock()
+        sqs_client.receive_message.side_effect = [
+            {
+                "Messages": [
+                    build_message("1", "GetObject"),
+                    build_message("2", "GetObject"),
+                    build_message("3", "PutObject"),
+                ]
+            },
+            {"Messages": [build_message("4", "GetObject")]},
+            {},
+        ]
+
+        pipeline = CloudTrailDenyPipeline(tenant, sqs_client, "queue_url", 86400, 100)
+        await pipeline.run()
+
+        # One analysis per distinct deny
+        self.assertEqual(mock_process_event.call_count, 2)
+        self.assertEqual(pipeline.num_events, 4)
+        self.assertEqual(pipeline.new_events, 2)
+
+        batch_writes = pipeline.dynamo.batch_write_cloudtrail_events.call_args_list
+        self.assertEqual(len(batch_writes[0].args[0]), 2)
+        # The second batch only writes the deny it changed
+        self.assertEqual(len(batch_writes[1].args[0]), 1)
+        self.assertEqual(batch_writes[1].args[0][0]["count"], 3)
+        self.assertEqual(batch_writes[1].args[0][0]["generated_policies"], policy)
+        self.assertEqual(sqs_client.delete_message_batch.call_count, 2)
@@ -0,0 +1,115 @@
+import asyncio
+import time
+from unittest import IsolatedAsyncioTestCase
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from mock import patch
+
+TABLE_NAME = "parallel_scan_test"
+
+
+class RecordingTable:
+    """Wraps a table, throttling the first `throttle_count` scans and recording the Limit of every scan."""
+
+    def __init__(self, table, throttle_count: int = 0, delay: float = 0):
+        self.table = table
+        self.name = table.name
+        self.throttle_count = throttle_count
+        self.delay = delay
+        self.limits = []
+
+    def scan(self, **kwargs):
+        self.limits.append(kwargs.get("Limit"))
+        if self.delay:
+            time.sleep(self.delay)
+        if self.throttle_count:
+            self.throttle_count -= 1
+            raise ClientError(
+                {"Error": {"Code": "ProvisionedThroughputExceededException"}}, "Scan"
+            )
+        return self.table.scan(**kwargs)
+
+
+@pytest.mark.usefixtures("aws_credentials", "dynamodb")
+class TestParallelScan(IsolatedAsyncioTestCase):
+    def setUp(self):
+        from common.config.config import CONFIG
+
+        dynamodb = boto3.resource(
+            "dynamodb",
+            region_name="us-east-1",
+            **CONFIG.get("_global_.boto3.client_kwargs", {}),
+        )
+        self.table = dynamodb.create_table(
+            TableName=TABLE_NAME,
+            AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+            ProvisionedThroughput={
+                "ReadCapacityUnits": 1000,
+                "WriteCapacityUnits": 1000,
+            },
+        )
+        with self.table.batch_writer() as batch:
+            for i in range(120):
+                batch.put_item(Item={"id": f"item_{i:03}", "value": i})
+
+    def tearDown(self):
+        self.table.delete()
+
+    async def test_pages_are_streamed_from_every_segment(self):
+        from common.lib.dynamo import BaseDynamoHandler
+
+        pages = [
+            page
+            async for page in BaseDynamoHandler().parallel_scan_table_pages_async(
+                self.table, total_threads=3, dynamodb_kwargs={"Limit": 10}
+            )
+        ]
+
+        self.assertTrue(all(0 < len(page) <= 10 for page in pages))
+        self.assertEqual(
+            sorted(item["id"] for page in pages for item in page),
+            [f"item_{i:03}" for i in range(120)],
+        )
+
+    async def test_scan_stops_when_iteration_stops(self):
+        from common.lib.dynamo import BaseDynamoHandler
+
+        table = RecordingTable(self.table, delay=0.05)
+        pages = BaseDynamoHandler().parallel_scan_table_pages_async(
+            table, total_threads=1, dynamodb_kwargs={"Limit": 10}
+        )
+        await pages.__anext__()
+        await pages.aclose()
+        await asyncio.sleep(0.2)
+
+        # The scan running when iteration stopped finishes, no other page is requested
+        self.assertLessEqual(len(table.limits), 2)
+
+    async def test_throttled_scan_halves_and_recovers_page_size(self):
+        from common.lib.dynamo import BaseDynamoHandler
+
+        table = RecordingTable(self.table, throttle_count=1)
+        with patch("common.lib.dynamo.time.sleep") as sleep:
+            items = await BaseDynamoHandler().parallel_scan_table_async(
+                table, total_threads=1, dynamodb_kwargs={"Limit": 100}
+            )
+
+        self.assertEqual(len(items), 120)
+        self.assertEqual(table.limits, [100, 50, 100])
+        sleep.assert_called_once()
+
+    async def test_scan_raises_when_throttled_past_retry_count(self):
+        from common.exceptions.exceptions import ProvisionedThroughputExceededError
+        from common.lib.dynamo import BaseDynamoHandler, cluster_config
+
+        table = RecordingTable(
+            self.table, throttle_count=cluster_config.dynamo_retry_count + 1
+        )
+        with patch("common.lib.dynamo.time.sleep"):
+            with self.assertRaises(ProvisionedThroughputExceededError):
+                await BaseDynamoHandler().parallel_scan_table_async(
+                    table, total_threads=1
+                )
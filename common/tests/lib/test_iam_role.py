@@ -0,0 +1,105 @@
+import datetime
+from copy import deepcopy
+from unittest import IsolatedAsyncioTestCase
+
+import pytest
+from mock import patch
+
+from util.tests.fixtures.globals import tenant
+
+ACCOUNT_ID = "123456789012"
+ROLE = {
+    "Arn": f"arn:aws:iam::{ACCOUNT_ID}:role/terraform_role",
+    "RoleName": "terraform_role",
+    "RoleId": "AROA1234567890TERRAFORM",
+    "Path": "/",
+    "Description": "A role rendered as Terraform",
+    "AssumeRolePolicyDocument": {
+        "Version": "2012-10-17",
+        "Statement": [
+            {
+                "Effect": "Allow",
+                "Principal": {"Service": "ec2.amazonaws.com"},
+                "Action": "sts:AssumeRole",
+            }
+        ],
+    },
+    "RolePolicyList": [],
+    "AttachedManagedPolicies": [],
+    "InstanceProfileList": [],
+    "Tags": [],
+    "RoleLastUsed": {"LastUsedDate": "2023-01-01T00:00:00Z", "Region": "us-east-1"},
+}
+
+
+@pytest.mark.usefixtures("aws_credentials", "dynamodb", "iamrole_table", "redis")
+class TestIAMRoleTerraform(IsolatedAsyncioTestCase):
+    async def asyncTearDown(self):
+        from common.aws.iam.role.models import IAMRole
+
+        await IAMRole.sync_account_roles(tenant, ACCOUNT_ID, [])
+
+    async def get_stored_terraform(self) -> str:
+        from common.aws.iam.role.models import IAMRole
+
+        iam_role = await IAMRole.get(tenant, ACCOUNT_ID, ROLE["Arn"])
+        return iam_role.terraform
+
+    async def test_stored_terraform_survives_account_sync(self):
+        from common.aws.iam.role.models import IAMRole
+
+        await IAMRole.sync_account_roles(tenant, ACCOUNT_ID, [deepcopy(ROLE)])
+        iam_role = await IAMRole.get(tenant, ACCOUNT_ID, ROLE["Arn"])
+        terraform = await iam_role.get_terraform()
+        self.assertIn('resource "aws_iam_role" "terraform_role"', terraform)
+
+        # Using the role doesn't change the attributes the Terraform is rendered from
+        role = deepcopy(ROLE)
+        role["RoleLastUsed"]["LastUsedDate"] = datetime.datetime.utcnow().isoformat()
+        await IAMRole.sync_account_roles(tenant, ACCOUNT_ID, [role])
+
+        self.assertEqual(await self.get_stored_terraform(), terraform)
+        iam_role = await IAMRole.get(tenant, ACCOUNT_ID, ROLE["Arn"])
+        with patch.object(IAMRole, "_render_terraform") as render_terraform:
+            self.assertEqual(await iam_role.get_terraform(), terraform)
+        render_terraform.assert_not_called()
+
+    async def test_stored_terraform_is_cleared_when_policy_changes(self):
+        from common.aws.iam.role.models import IAMRole
+
+        await IAMRole.sync_account_roles(tenant, ACCOUNT_ID, [deepcopy(ROLE)])
+        iam_role = await IAMRole.get(tenant, ACCOUNT_ID, ROLE["Arn"])
+        await iam_role.get_terraform()
+
+        role = deepcopy(ROLE)
+        role["Description"] = "A role with a new description"
+        await IAMRole.sync_account_roles(tenant, ACCOUNT_ID, [role])
+
+        self.assertIsNone(await self.get_stored_terraform())
+
+
+@pytest.mark.usefixtures("aws_credentials", "dynamodb", "iamrole_table", "redis")
+class TestIAMRoleAccountIndex(IsolatedAsyncioTestCase):
+    async def test_roles_written_before_the_index_are_backfilled(self):
+        from common.aws.iam.role.models import IAMRole
+        from common.scripts.data_migrations import iam_role_add_tenant_account_id
+
+        account_id = "210987654321"
+        arn = f"arn:aws:iam::{account_id}:role/legacy_role"
+        # Saved without tenant_account_id, like the roles cached before the index
+        await IAMRole(
+            tenant=tenant,
+            entity_id=f"{arn}||{tenant}",
+            accountId=account_id,
+            name="legacy_role",
+            arn=arn,
+            policy="{}",
+            resourceId="AROA1234567890LEGACY",
+            last_updated=0,
+        ).save()
+        self.assertEqual(await IAMRole.get_account_role_arns(tenant, account_id), set())
+
+        await iam_role_add_tenant_account_id()
+
+        self.assertEqual(await IAMRole.get_account_role_arns(tenant, account_id), {arn})
+        await IAMRole.sync_account_roles(tenant, account_id, [])
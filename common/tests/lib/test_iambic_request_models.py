@@ -0,0 +1,128 @@
+from unittest import IsolatedAsyncioTestCase
+
+from mock import AsyncMock, MagicMock, patch
+
+import common.lib.noq_json as json
+
+PR_URL = "https://api.github.com/repos/noqdev/iambic-templates/pulls/1"
+
+
+def get_pr_data(head_sha: str, title: str = "Request access") -> dict:
+    return {
+        "url": PR_URL,
+        "issue_url": "https://api.github.com/repos/noqdev/iambic-templates/issues/1",
+        "number": 1,
+        "html_url": "https://github.com/noqdev/iambic-templates/pull/1",
+        "title": title,
+        "body": "Requested by user@example.com",
+        "mergeable": True,
+        "merged_at": None,
+        "closed_at": None,
+        "merge_commit_sha": None,
+        "head": {"sha": head_sha},
+    }
+
+
+def get_snapshot(head_sha: str) -> dict:
+    return {
+        "etag": 'W/"snapshot"',
+        "pr_data": get_pr_data(head_sha),
+        "files_sha": head_sha,
+        "is_closed": False,
+        "review_state": "APPROVED",
+        "approved_by": ["reviewer"],
+        "comments": [],
+        "files": [
+            {
+                "file_path": "resources/aws/roles/admin.yaml",
+                "status": "modified",
+                "additions": 2,
+                "template_body": "template_type: NOQ::AWS::IAM::Role",
+            }
+        ],
+    }
+
+
+class TestGitHubPullRequestSnapshot(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.requests = []
+        self.pr_response = (304, {}, None)
+
+    def fake_request_json(self, verb, url, parameters=None, headers=None, *args):
+        self.requests.append((url, headers))
+        if url == PR_URL:
+            return self.pr_response
+        # Reviews and comments
+        return 200, {}, "[]"
+
+    def get_pull_request(self):
+        from github import Github
+
+        from common.iambic_request.models import GitHubPullRequest
+
+        return GitHubPullRequest.construct(
+            tenant=MagicMock(),
+            iambic_repo=MagicMock(request_id="request_id"),
+            request_id="request_id",
+            pull_request_id=1,
+            merge_on_approval=False,
+            pr_client=Github("token"),
+            pr_provider=MagicMock(),
+        )
+
+    def patch_snapshot(self, snapshot: dict):
+        from common.iambic_request.models import GitHubPullRequest
+
+        self.store_pr_snapshot = AsyncMock()
+        self.get_file_as_pr_file = AsyncMock()
+        return patch.multiple(
+            GitHubPullRequest,
+            _get_pr_snapshot=AsyncMock(return_value=snapshot),
+            _store_pr_snapshot=self.store_pr_snapshot,
+            _get_file_as_pr_file=self.get_file_as_pr_file,
+        )
+
+    async def test_unchanged_pr_is_loaded_from_snapshot(self):
+        pull_request = self.get_pull_request()
+        with self.patch_snapshot(get_snapshot("sha_1")), patch(
+            "github.Requester.Requester.requestJson", self.fake_request_json
+        ):
+            await pull_request.load_pr()
+
+        # A single conditional request, reviews, comments and files aren't reloaded
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(self.requests[0][1]["If-None-Match"], 'W/"snapshot"')
+        self.assertEqual(pull_request.title, "Request access")
+        self.assertEqual(pull_request.review_state, "APPROVED")
+        self.assertEqual(pull_request.approved_by, ["reviewer"])
+        self.assertEqual(
+            [file.file_path for file in pull_request.files],
+            ["resources/aws/roles/admin.yaml"],
+        )
+        self.get_file_as_pr_file.assert_not_called()
+        self.store_pr_snapshot.assert_not_called()
+
+    async def test_changed_pr_with_same_sha_reuses_files(self):
+        pull_request = self.get_pull_request()
+        self.pr_response = (
+            200,
+            {"etag": 'W/"changed"'},
+            json.dumps(get_pr_data("sha_1", title="Request admin access")),
+        )
+        with self.patch_snapshot(get_snapshot("sha_1")), patch(
+            "github.Requester.Requester.requestJson", self.fake_request_json
+        ):
+            await pull_request.load_pr()
+
+        requested_urls = [url for url, _ in self.requests]
+        self.assertEqual(requested_urls[0], PR_URL)
+        self.assertFalse(any(url.endswith("/files") for url in requested_urls))
+        self.assertEqual(pull_request.title, "Request admin access")
+        self.assertEqual(pull_request.review_state, "PENDING_REVIEW")
+        self.assertEqual(pull_request.comments, [])
+        self.assertEqual(
+            [file.file_path for file in pull_request.files],
+            ["resources/aws/roles/admin.yaml"],
+        )
+        self.get_file_as_pr_file.assert_not_called()
+        self.store_pr_snapshot.assert_awaited_once_with("sha_1")
@@ -0,0 +1,93 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import TestCase
+from uuid import UUID
+
+from deepdiff.model import PrettyOrderedSet
+from pydantic import BaseModel
+
+
+class ExampleModel(BaseModel):
+    name: str
+    groups: set[str]
+
+
+class TestNoqJsonDumps(TestCase):
+    def test_dumps_sets(self):
+        from common.lib.noq_json import dumps
+
+        self.assertEqual(json.loads(dumps({"a": {"x"}})), {"a": ["x"]})
+        self.assertEqual(json.loads(dumps({"a": frozenset(["x"])})), {"a": ["x"]})
+        self.assertEqual(
+            json.loads(dumps({"a": PrettyOrderedSet(["x", "y"])})), {"a": ["x", "y"]}
+        )
+
+    def test_dumps_decimal_and_exception(self):
+        from common.lib.noq_json import dumps
+
+        self.assertEqual(
+            json.loads(dumps({"d": Decimal("1.5"), "e": ValueError("bad")})),
+            {"d": 1.5, "e": "bad"},
+        )
+
+    def test_dumps_native_types_unchanged(self):
+        from common.lib.noq_json import dumps
+
+        uuid = UUID("12345678-1234-5678-1234-567812345678")
+        self.assertEqual(
+            json.loads(dumps({"u": uuid, "dt": datetime(2023, 1, 1), 1: "int key"})),
+            {"u": str(uuid), "dt": "2023-01-01T00:00:00", "1": "int key"},
+        )
+
+    def test_dumps_pydantic_model(self):
+        from common.lib.noq_json import dumps
+
+        self.assertEqual(
+            json.loads(dumps([ExampleModel(name="a", groups={"g"})])),
+            [{"name": "a", "groups": ["g"]}],
+        )
+
+    def test_dumps_sort_keys_and_indent(self):
+        from common.lib.noq_json import dumps
+
+        self.assertEqual(dumps({"b": 1, "a": 2}, sort_keys=True), '{"a":2,"b":1}')
+        self.assertEqual(dumps({"a": 1}, indent=2), '{\n  "a": 1\n}')
+
+    def test_dumps_uses_provided_default(self):
+        from common.lib.noq_json import dumps
+
+        class Custom:
+            pass
+
+        self.assertEqual(
+            json.loads(dumps({"c": Custom()}, default=lambda _: "x")), {"c": "x"}
+        )
+        with self.assertRaises(TypeError):
+            dumps({"c": Custom()})
+
+    def test_dumps_falls_back_for_large_ints(self):
+        from common.lib.noq_json import dumps
+
+        self.assertEqual(
+            json.loads(dumps({"i": 2**70, "s": {"x"}})), {"i": 2**70, "s": ["x"]}
+        )
+
+    def test_dumps_datetimes_with_non_native_types_as_timestamps(self):
+        from common.lib.noq_json import dumps
+
+        dt = datetime(2023, 1, 1, 12, 30, tzinfo=timezone.utc)
+        # Payloads with types orjson doesn't serialize natively were written by SetEncoder
+        self.assertEqual(
+            json.loads(dumps({"dt": dt}))["dt"], "2023-01-01T12:30:00+00:00"
+        )
+        self.assertEqual(
+            json.loads(dumps({"dt": dt, "s": {"x"}})), {"dt": 1672576200.0, "s": ["x"]}
+        )
+        self.assertEqual(
+            json.loads(dumps({"dt": dt, "i": 2**70}))["dt"], 1672576200.0
+        )
+        self.assertEqual(
+            json.loads(dumps({"dt": dt, "s": {"x"}}, default=lambda _: "custom"))["dt"],
+            "custom",
+        )
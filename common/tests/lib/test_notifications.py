@@ -0,0 +1,105 @@
+import time
+from unittest import TestCase
+
+import pytest
+
+from util.tests.fixtures.globals import tenant
+
+
+def build_notification(predictable_id, users_or_groups, expiration, event_time=None):
+    from common.lib.notifications.models import ConsoleMeUserNotification
+
+    return ConsoleMeUserNotification(
+        tenant=tenant,
+        predictable_id=predictable_id,
+        type="cloudtrail_generated_policy",
+        users_or_groups=set(users_or_groups),
+        event_time=event_time or int(time.time()),
+        expiration=expiration,
+        expired=False,
+        message="message",
+        message_actions=[],
+        details={},
+        read_by_users=[],
+        read_by_all=False,
+        hidden_for_users=[],
+        hidden_for_all=False,
+        version=1,
+    )
+
+
+@pytest.mark.usefixtures("redis")
+class TestNotificationIndex(TestCase):
+    def setUp(self):
+        from common.lib.v2.notifications import NotificationIndex
+
+        self.index = NotificationIndex(tenant)
+        self.index.remove(list(self.index.get_ids()))
+        self.current_time = int(time.time())
+
+    def get_ids(self, users_or_groups):
+        from common.lib.notifications.models import ConsoleMeUserNotification
+
+        return sorted(
+            ConsoleMeUserNotification.parse_raw(raw).predictable_id
+            for raw in self.index.get_for_users_or_groups(
+                users_or_groups, self.current_time
+            )
+        )
+
+    def test_shared_notification_returned_once(self):
+        self.index.append(
+            [
+                build_notification("a", ["user", "group"], self.current_time + 60),
+                build_notification("b", ["group"], self.current_time + 60),
+            ]
+        )
+        self.assertEqual(self.get_ids(["user", "group"]), ["a", "b"])
+        self.assertEqual(self.get_ids(["user"]), ["a"])
+
+    def test_append_removes_dropped_users_or_groups(self):
+        self.index.append(
+            [build_notification("a", ["user", "group"], self.current_time + 60)]
+        )
+        self.index.append([build_notification("a", ["user"], self.current_time + 60)])
+        self.assertEqual(self.get_ids(["group"]), [])
+        self.assertEqual(self.get_ids(["user"]), ["a"])
+
+    def test_expire(self):
+        self.index.append(
+            [
+                build_notification("a", ["user"], self.current_time - 1),
+                build_notification("b", ["user"], self.current_time + 60),
+            ]
+        )
+        # Expired notifications are excluded from reads before they're removed
+        self.assertEqual(self.get_ids(["user"]), ["b"])
+        self.assertEqual(self.index.expire(self.current_time), 1)
+        self.assertEqual(self.index.expire(self.current_time), 0)
+        self.assertEqual(self.get_ids(["user"]), ["b"])
+
+    def test_reconcile_keeps_concurrent_writes(self):
+        self.index.append(
+            [
+                build_notification("a", ["user"], self.current_time + 60),
+                build_notification("b", ["user"], self.current_time + 60),
+            ]
+        )
+        indexed_ids = self.index.get_ids()
+        # Written after the snapshot was read, "a" moved to the group
+        self.index.append(
+            [
+                build_notification("a", ["group"], self.current_time + 60),
+                build_notification("c", ["user"], self.current_time + 60),
+            ]
+        )
+        changes = self.index.reconcile(
+            [
+                build_notification("a", ["user"], self.current_time + 60),
+                build_notification("d", ["user"], self.current_time + 60),
+            ],
+            indexed_ids,
+        )
+        self.assertEqual(changes, {"added": 1, "removed": 1})
+        self.assertEqual(self.get_ids(["user"]), ["c", "d"])
+        self.assertEqual(self.get_ids(["group"]), ["a"])
@@ -0,0 +1,73 @@
+import json
+from types import SimpleNamespace
+from unittest import IsolatedAsyncioTestCase
+
+from mock import patch
+
+JWKS_URI = "https://idp.example.com/jwks"
+
+
+class TestOidcKeyStore(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.documents = {JWKS_URI: {"keys": [{"kid": "key_1"}]}}
+        self.fetched_urls = []
+        self.fail_fetch = False
+
+    async def fake_fetch(self, url, **kwargs):
+        self.fetched_urls.append(url)
+        if self.fail_fetch:
+            raise Exception("IdP unavailable")
+        return SimpleNamespace(
+            body=json.dumps(self.documents[url]).encode(),
+            headers={"Cache-Control": "public, max-age=120"},
+        )
+
+    def patch_fetch(self):
+        http_client = SimpleNamespace(fetch=self.fake_fetch)
+        return patch(
+            "common.lib.oidc.key_store.tornado.httpclient.AsyncHTTPClient",
+            lambda: http_client,
+        )
+
+    def patch_parse_jwks(self):
+        return patch(
+            "common.lib.oidc.key_store.parse_jwks",
+            lambda jwks_data: {key["kid"]: key for key in jwks_data["keys"]},
+        )
+
+    async def test_keys_are_cached(self):
+        from common.lib.oidc.key_store import OidcKeyStore
+
+        key_store = OidcKeyStore("tenant")
+        with self.patch_fetch(), self.patch_parse_jwks():
+            await key_store.get_keys([JWKS_URI])
+            keys = await key_store.get_keys([JWKS_URI])
+
+        self.assertEqual(list(keys), ["key_1"])
+        self.assertEqual(self.fetched_urls, [JWKS_URI])
+
+    async def test_unknown_kid_refreshes_once(self):
+        from common.lib.oidc.key_store import OidcKeyStore
+
+        key_store = OidcKeyStore("tenant")
+        with self.patch_fetch(), self.patch_parse_jwks():
+            await key_store.get_keys([JWKS_URI])
+            self.documents[JWKS_URI] = {"keys": [{"kid": "key_1"}, {"kid": "key_2"}]}
+            key = await key_store.get_key([JWKS_URI], "key_2")
+            with self.assertRaises(KeyError):
+                await key_store.get_key([JWKS_URI], "unknown")
+
+        self.assertEqual(key, {"kid": "key_2"})
+        # The second miss is rate limited
+        self.assertEqual(self.fetched_urls, [JWKS_URI, JWKS_URI])
+
+    async def test_stale_keys_are_used_when_refresh_fails(self):
+        from common.lib.oidc.key_store import OidcKeyStore
+
+        key_store = OidcKeyStore("tenant")
+        with self.patch_fetch(), self.patch_parse_jwks():
+            await key_store.get_keys([JWKS_URI])
+            self.fail_fetch = True
+            keys = await key_store.get_keys([JWKS_URI], force_refresh=True)
+
+        self.assertEqual(list(keys), ["key_1"])
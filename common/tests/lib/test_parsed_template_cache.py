@@ -0,0 +1,61 @@
+import os
+import tempfile
+from types import SimpleNamespace
+from unittest import TestCase
+
+from mock import patch
+
+
+class TestParsedTemplateCache(TestCase):
+    def setUp(self):
+        from common.iambic.interface import _PARSED_TEMPLATE_CACHE
+
+        _PARSED_TEMPLATE_CACHE.clear()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.template_paths = []
+        for name in ["role_a.yaml", "role_b.yaml"]:
+            template_path = os.path.join(self.tmp_dir.name, name)
+            with open(template_path, "w") as f:
+                f.write("template_type: NOQ::AWS::IAM::Role\n")
+            self.template_paths.append(template_path)
+        self.template_map = {"NOQ::AWS::IAM::Role": None}
+        self.parsed_paths = []
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def fake_load_templates(self, template_paths, template_map, **kwargs):
+        self.parsed_paths.extend(template_paths)
+        return [SimpleNamespace(file_path=path) for path in template_paths]
+
+    def load_templates(self):
+        from common.iambic.interface import _load_templates_with_cache
+
+        with patch(
+            "common.iambic.interface.iambic_load_templates", self.fake_load_templates
+        ):
+            return _load_templates_with_cache(self.template_paths, self.template_map)
+
+    def test_unchanged_files_are_not_parsed_again(self):
+        first = self.load_templates()
+        second = self.load_templates()
+
+        self.assertEqual(self.parsed_paths, self.template_paths)
+        self.assertEqual(
+            [template.file_path for template in second], self.template_paths
+        )
+        self.assertIs(first[0], second[0])
+
+    def test_changed_file_is_parsed_again(self):
+        self.load_templates()
+        with open(self.template_paths[1], "a") as f:
+            f.write("identifier: role_b\n")
+
+        templates = self.load_templates()
+
+        self.assertEqual(
+            self.parsed_paths, self.template_paths + [self.template_paths[1]]
+        )
+        self.assertEqual(
+            [template.file_path for template in templates], self.template_paths
+        )
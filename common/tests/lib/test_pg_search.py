@@ -0,0 +1,109 @@
+from unittest import IsolatedAsyncioTestCase
+
+from sqlalchemy.dialects import postgresql
+
+
+def compile_pg(stmt) -> str:
+    return str(
+        stmt.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+
+
+class TestPgSearch(IsolatedAsyncioTestCase):
+    def test_escape_like(self):
+        from common.pg_core.search import escape_like
+
+        self.assertEqual(escape_like("role_name"), "role\\_name")
+        self.assertEqual(escape_like("100%"), "100\\%")
+        self.assertEqual(escape_like("a\\b"), "a\\\\b")
+        self.assertEqual(escape_like("plain"), "plain")
+
+    def test_searchable_columns_cast_non_text(self):
+        from common.iambic.templates.models import IambicTemplateContent
+        from common.pg_core.search import searchable_columns
+
+        # iambic_managed is generated from content
+        sql = [
+            compile_pg(column) for column in searchable_columns(IambicTemplateContent)
+        ]
+        self.assertIn("CAST(iambic_template_content.id AS VARCHAR)", sql)
+        self.assertIn("CAST(iambic_template_content.content AS VARCHAR)", sql)
+        self.assertFalse(any("iambic_managed" in column for column in sql))
+
+    def test_general_search_does_not_cast_text_columns(self):
+        from sqlalchemy import or_, select
+
+        from common.iambic.templates.models import IambicTemplate
+        from common.pg_core.search import ilike_contains, searchable_columns
+
+        stmt = select(IambicTemplate.id).filter(
+            or_(
+                *[
+                    ilike_contains(column, "admin")
+                    for column in searchable_columns(IambicTemplate)
+                ]
+            )
+        )
+        sql = compile_pg(stmt)
+        self.assertIn("iambic_template.resource_id ILIKE '%admin%'", sql)
+        self.assertIn("iambic_template.friendly_name ILIKE '%admin%'", sql)
+        self.assertNotIn("CAST(iambic_template.resource_id", sql)
+        # Non-text columns are still searched
+        self.assertIn("CAST(iambic_template.id AS VARCHAR) ILIKE '%admin%'", sql)
+
+    def test_template_resource_id_search_is_union_of_indexed_branches(self):
+        from common.iambic.templates.utils import _template_ids_matching_resource_id
+
+        sql = compile_pg(
+            _template_ids_matching_resource_id(1, "NOQ::AWS::IAM::Role", "app_role")
+        )
+        self.assertIn("UNION", sql)
+        self.assertIn("iambic_template.resource_id ILIKE '%app\\_role%'", sql)
+        self.assertIn(
+            "iambic_template_provider_definition.resource_id ILIKE '%app\\_role%'", sql
+        )
+
+
+class TestPgSearchExplain(IsolatedAsyncioTestCase):
+    """Verifies the search conditions are resolved using the trigram indexes.
+
+    Requires a migrated Postgres and is skipped when one isn't reachable.
+    """
+
+    async def asyncSetUp(self):
+        from sqlalchemy import text
+
+        from common.config.globals import ASYNC_PG_SESSION
+
+        try:
+            async with ASYNC_PG_SESSION() as session:
+                await session.execute(text("SELECT 1"))
+        except Exception:
+            self.skipTest("Postgres is not available")
+
+    async def test_template_resource_id_uses_trigram_index(self):
+        from common.iambic.templates.utils import _template_ids_matching_resource_id
+        from common.pg_core.search import explain_query
+
+        plan = await explain_query(
+            _template_ids_matching_resource_id(1, "NOQ::AWS::IAM::Role", "admin"),
+            enable_seqscan=False,
+        )
+        self.assertIn("itpd_resource_id_trgm_idx", plan)
+
+    async def test_iambic_managed_uses_generated_column_index(self):
+        from sqlalchemy import select
+
+        from common.iambic.templates.models import IambicTemplateContent
+        from common.pg_core.search import explain_query
+
+        plan = await explain_query(
+            select(IambicTemplateContent.id).filter(
+                IambicTemplateContent.tenant_id == 1,
+                IambicTemplateContent.iambic_managed != "import_only",
+            ),
+            enable_seqscan=False,
+        )
+        self.assertIn("iambic_tmplt_content_managed_idx", plan)
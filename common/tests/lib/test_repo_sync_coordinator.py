@@ -0,0 +1,110 @@
+import asyncio
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+
+class TestRepoSyncCoordinator(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.sync_count = 0
+        # Syncs take a file lock next to the repo path
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.repo_path = os.path.join(self.tmp_dir.name, "repo")
+
+    async def sync_fn(self):
+        self.sync_count += 1
+        await asyncio.sleep(0.01)
+
+    async def test_concurrent_syncs_are_coalesced(self):
+        from common.iambic.git.utils import RepoSyncCoordinator
+
+        coordinator = RepoSyncCoordinator()
+        await asyncio.gather(
+            *[coordinator.sync(self.repo_path, self.sync_fn) for _ in range(5)]
+        )
+
+        self.assertEqual(self.sync_count, 1)
+
+    async def test_sync_within_freshness_window_is_skipped(self):
+        from common.iambic.git.utils import RepoSyncCoordinator
+
+        coordinator = RepoSyncCoordinator()
+        await coordinator.sync(self.repo_path, self.sync_fn)
+        await coordinator.sync(self.repo_path, self.sync_fn)
+        await coordinator.sync(
+            os.path.join(self.tmp_dir.name, "other_repo"), self.sync_fn
+        )
+
+        self.assertEqual(self.sync_count, 2)
+
+    async def test_forced_sync_runs_after_the_running_sync(self):
+        from common.iambic.git.utils import RepoSyncCoordinator
+
+        coordinator = RepoSyncCoordinator()
+        running_sync = asyncio.create_task(
+            coordinator.sync(self.repo_path, self.sync_fn)
+        )
+        await asyncio.sleep(0)
+        await coordinator.sync(self.repo_path, self.sync_fn, force=True)
+        await running_sync
+
+        self.assertEqual(self.sync_count, 2)
+
+    async def test_failed_sync_is_not_fresh(self):
+        from common.iambic.git.utils import RepoSyncCoordinator
+
+        async def failing_sync_fn():
+            raise Exception("fetch failed")
+
+        coordinator = RepoSyncCoordinator()
+        with self.assertRaises(Exception):
+            await coordinator.sync(self.repo_path, failing_sync_fn)
+        await coordinator.sync(self.repo_path, self.sync_fn)
+
+        self.assertEqual(self.sync_count, 1)
+
+    async def test_lock_is_held_across_coordinators(self):
+        from common.iambic.git.utils import RepoSyncCoordinator
+
+        # Each process has its own coordinator, the file lock serializes them
+        events = []
+
+        async def hold(coordinator, name):
+            async with coordinator.lock(repo_path):
+                events.append(f"{name} acquired")
+                await asyncio.sleep(0.2)
+                events.append(f"{name} released")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            repo_path = os.path.join(tmp_dir, "workspaces", "request_branch")
+            await asyncio.gather(
+                hold(RepoSyncCoordinator(), "first"),
+                hold(RepoSyncCoordinator(), "second"),
+            )
+
+        self.assertEqual(
+            events,
+            ["first acquired", "first released", "second acquired", "second released"],
+        )
+
+    async def test_syncs_are_serialized_across_coordinators(self):
+        from common.iambic.git.utils import RepoSyncCoordinator
+
+        # Each process has its own coordinator, only one of them syncs the mirror at a time
+        events = []
+
+        async def sync_fn():
+            events.append("sync started")
+            await asyncio.sleep(0.2)
+            events.append("sync finished")
+
+        await asyncio.gather(
+            RepoSyncCoordinator().sync(self.repo_path, sync_fn),
+            RepoSyncCoordinator().sync(self.repo_path, sync_fn),
+        )
+
+        self.assertEqual(
+            events,
+            ["sync started", "sync finished", "sync started", "sync finished"],
+        )
@@ -0,0 +1,52 @@
+from unittest import TestCase
+
+
+class TestGetGroupPatchOperations(TestCase):
+    def test_member_operations(self):
+        from common.lib.scim import get_group_patch_operations
+
+        body = {
+            "schemas": ["urn:ietf:params:scim:api:messages:2.0:PatchOp"],
+            "Operations": [
+                {"op": "Add", "path": "members", "value": [{"value": "user_a"}]},
+                {"op": "remove", "path": 'members[value eq "user_b"]'},
+                {"op": "replace", "value": {"id": "group", "displayName": "Admins"}},
+                {"op": "replace", "path": "members", "value": []},
+            ],
+        }
+
+        self.assertEqual(
+            get_group_patch_operations(body),
+            [("add", ["user_a"]), ("remove", ["user_b"]), ("replace", [])],
+        )
+
+    def test_unsupported_operation(self):
+        from common.lib.scim import ScimError, get_group_patch_operations
+
+        with self.assertRaises(ScimError) as ctx:
+            get_group_patch_operations(
+                {"Operations": [{"op": "move", "path": "members", "value": []}]}
+            )
+        self.assertEqual(ctx.exception.status, 400)
+
+
+class TestResolveBulkIds(TestCase):
+    def test_references_are_replaced(self):
+        from common.lib.scim import resolve_bulk_ids
+
+        data = {
+            "displayName": "Admins",
+            "members": [{"value": "bulkId:user_a"}, {"value": "bulkId:unknown"}],
+        }
+
+        self.assertEqual(
+            resolve_bulk_ids(data, {"user_a": "1234"}),
+            {
+                "displayName": "Admins",
+                "members": [{"value": "1234"}, {"value": "bulkId:unknown"}],
+            },
+        )
+        self.assertEqual(
+            resolve_bulk_ids("/Groups/bulkId:group", {"group": "5678"}),
+            "/Groups/5678",
+        )
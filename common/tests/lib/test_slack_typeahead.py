@@ -0,0 +1,84 @@
+from unittest import TestCase
+
+
+class TestTemplateTypeaheadIndex(TestCase):
+    def setUp(self):
+        from common.lib.slack.typeahead import TemplateTypeaheadIndex
+
+        templates = [
+            {
+                "template_type": "NOQ::AWS::IAM::Role",
+                "identifier": "ProdAdmin",
+                "properties": {"name": "prod_admin"},
+                "repo_relative_file_path": "aws/roles/prod_admin.yaml",
+            },
+            {
+                "template_type": "NOQ::Google::Group",
+                "identifier": "engineering",
+                "properties": {"name": "Prod Engineering"},
+                "repo_relative_file_path": "google/groups/engineering.yaml",
+            },
+            {
+                "template_type": "NOQ::AWS::IAM::Role",
+                "identifier": "{{var.account_name}}_role(1)",
+                "properties": {"name": [{"default": "role"}]},
+                "repo_relative_file_path": "aws/roles/multi_account.yaml",
+            },
+        ]
+        self.index = TemplateTypeaheadIndex(
+            TemplateTypeaheadIndex.build_entries(templates), "1"
+        )
+
+    def get_paths(self, *args):
+        return [
+            template["repo_relative_file_path"] for template in self.index.search(*args)
+        ]
+
+    def test_identifier_matches_come_first(self):
+        self.assertEqual(
+            self.get_paths("PROD"),
+            ["aws/roles/prod_admin.yaml", "google/groups/engineering.yaml"],
+        )
+
+    def test_filter_by_template_type(self):
+        self.assertEqual(
+            self.get_paths("prod", "NOQ::Google::Group"),
+            ["google/groups/engineering.yaml"],
+        )
+
+    def test_regex_metacharacters_are_literal(self):
+        self.assertEqual(self.get_paths("_role(1"), ["aws/roles/multi_account.yaml"])
+        self.assertEqual(self.get_paths("prod.*"), [])
+
+
+class TestCloudIdentityTypeaheadIndex(TestCase):
+    def test_search_arn_and_account_name(self):
+        from common.lib.slack.typeahead import CloudIdentityTypeaheadIndex
+
+        identities = {
+            "arn:aws:iam::123456789012:role/admin": {
+                "account_name": "production",
+                "template_type": "NOQ::AWS::IAM::Role",
+                "hash": "abc",
+            },
+            "arn:aws:iam::210987654321:role/admin": {
+                "account_name": "staging",
+                "template_type": "NOQ::AWS::IAM::Role",
+                "hash": "def",
+            },
+        }
+        index = CloudIdentityTypeaheadIndex(
+            CloudIdentityTypeaheadIndex.build_entries(identities), "1"
+        )
+
+        self.assertEqual(
+            [option["value"] for _, option in index.search("Production:role")],
+            ["abc"],
+        )
+        self.assertEqual(
+            [option["value"] for _, option in index.search("210987654321")],
+            ["def"],
+        )
+        self.assertEqual(
+            index.search("staging")[0][1]["text"]["text"], "staging:role/admin"
+        )
@@ -0,0 +1,72 @@
+import time
+from unittest import TestCase
+
+import pytest
+
+from util.tests.fixtures.globals import tenant
+
+
+@pytest.mark.usefixtures("redis", "s3")
+class TestTypeaheadCache(TestCase):
+    def setUp(self):
+        from common.lib.aws.typeahead_cache import _get_resource_arns_redis_keys
+        from common.lib.redis import RedisHandler
+
+        self.red = RedisHandler().redis_sync(tenant)
+        self.redis_key, self.last_seen_key = _get_resource_arns_redis_keys(tenant)
+        self.red.delete(self.redis_key, self.last_seen_key)
+
+    def get_arns(self):
+        return sorted(self.red.hkeys(self.redis_key))
+
+    def test_accounts_are_merged(self):
+        from common.lib.aws.typeahead_cache import cache_aws_resource_details
+
+        cache_aws_resource_details({"arn:aws:iam::111:user/a": {}}, tenant)
+        cache_aws_resource_details({"arn:aws:iam::222:user/b": {}}, tenant)
+
+        self.assertEqual(
+            self.get_arns(), ["arn:aws:iam::111:user/a", "arn:aws:iam::222:user/b"]
+        )
+
+    def test_entry_is_only_written_once(self):
+        from common.lib.aws.typeahead_cache import cache_aws_resource_details
+
+        arn = "arn:aws:iam::111:user/a"
+        cache_aws_resource_details({arn: {}}, tenant)
+        entry = self.red.hget(self.redis_key, arn)
+        self.red.zadd(self.last_seen_key, {arn: 1})
+
+        cache_aws_resource_details({arn: {}}, tenant)
+
+        self.assertEqual(self.red.hget(self.redis_key, arn), entry)
+        self.assertGreater(self.red.zscore(self.last_seen_key, arn), 1)
+
+    def test_sweep_removes_stale_entries(self):
+        from common.lib.aws.typeahead_cache import (
+            cache_aws_resource_details,
+            sweep_stale_aws_resource_details,
+        )
+
+        cache_aws_resource_details(
+            {"arn:aws:iam::111:user/stale": {}, "arn:aws:iam::111:user/seen": {}},
+            tenant,
+        )
+        self.red.zadd(
+            self.last_seen_key,
+            {"arn:aws:iam::111:user/stale": int(time.time()) - 7200},
+        )
+
+        self.assertEqual(sweep_stale_aws_resource_details(tenant, max_age=3600), 1)
+        self.assertEqual(self.get_arns(), ["arn:aws:iam::111:user/seen"])
+        self.assertIsNone(
+            self.red.zscore(self.last_seen_key, "arn:aws:iam::111:user/stale")
+        )
+
+    def test_sweep_backfills_untracked_entries(self):
+        from common.lib.aws.typeahead_cache import sweep_stale_aws_resource_details
+
+        self.red.hset(self.redis_key, "arn:aws:iam::111:user/legacy", '{"ttl": 1}')
+
+        self.assertEqual(sweep_stale_aws_resource_details(tenant, max_age=3600), 0)
+        self.assertEqual(self.get_arns(), ["arn:aws:iam::111:user/legacy"])
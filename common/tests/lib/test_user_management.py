@@ -0,0 +1,20 @@
+from unittest import TestCase
+
+
+class TestGetGroupFingerprint(TestCase):
+    def test_fingerprint_ignores_order_and_duplicates(self):
+        from common.lib.auth.user_management import get_group_fingerprint
+
+        self.assertEqual(
+            get_group_fingerprint(["engineering", "admins"], "SSO"),
+            get_group_fingerprint(["admins", "engineering", "admins"], "SSO"),
+        )
+
+    def test_fingerprint_changes_with_groups(self):
+        from common.lib.auth.user_management import get_group_fingerprint
+
+        fingerprint = get_group_fingerprint(["engineering", "admins"], "SSO")
+        self.assertNotEqual(fingerprint, get_group_fingerprint(["engineering"], "SSO"))
+        self.assertNotEqual(
+            fingerprint, get_group_fingerprint(["engineering", "admins"], "SCIM")
+        )
@@ -0,0 +1,88 @@
+import asyncio
+import signal
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from mock import patch
+
+
+class FakeServer:
+    def __init__(self, connections):
+        self._connections = set(connections)
+        self.stopped = False
+        self.closed_connections = None
+
+    def stop(self):
+        self.stopped = True
+
+    async def close_all_connections(self):
+        self.closed_connections = set(self._connections)
+        self._connections.clear()
+
+
+class TestDrainServer(IsolatedAsyncioTestCase):
+    async def test_waits_for_in_flight_requests(self):
+        from api.workers import drain_server
+
+        server = FakeServer(["connection"])
+
+        async def finish_request():
+            await asyncio.sleep(0.1)
+            server._connections.clear()
+
+        finish_task = asyncio.create_task(finish_request())
+        await drain_server(server, timeout=5)
+        await finish_task
+
+        self.assertTrue(server.stopped)
+        self.assertEqual(server.closed_connections, set())
+
+    async def test_closes_connections_after_timeout(self):
+        from api.workers import drain_server
+
+        server = FakeServer(["connection"])
+        await drain_server(server, timeout=0)
+
+        self.assertTrue(server.stopped)
+        self.assertEqual(server.closed_connections, {"connection"})
+
+
+class TestWorkerSupervisor(TestCase):
+    def setUp(self):
+        from api.workers import WorkerSupervisor
+
+        self.supervisor = WorkerSupervisor(2, lambda worker_id, ready_fd: None)
+        self.supervisor.workers = {0: 100, 1: 101}
+        self.started_workers = []
+
+        def start_worker(worker_id, wait=False):
+            self.started_workers.append(worker_id)
+            self.supervisor.workers[worker_id] = 200 + worker_id
+
+        self.supervisor._start_worker = start_worker
+
+    def test_reap_restarts_exited_worker(self):
+        # Worker 1 exited with code 1, then no other child has exited
+        with patch("api.workers.os.waitpid", side_effect=[(101, 256), (0, 0)]):
+            self.supervisor._reap_workers()
+
+        self.assertEqual(self.started_workers, [1])
+        self.assertEqual(self.supervisor.workers, {0: 100, 1: 201})
+
+    def test_reap_ignores_unknown_children(self):
+        with patch(
+            "api.workers.os.waitpid", side_effect=[(999, 0), ChildProcessError()]
+        ):
+            self.supervisor._reap_workers()
+
+        self.assertEqual(self.started_workers, [])
+
+    def test_stop_workers_signals_each_worker_once(self):
+        with patch("api.workers.os.kill") as kill, patch(
+            "api.workers.os.waitpid", side_effect=lambda pid, options: (pid, 0)
+        ):
+            self.supervisor._stop_workers([100, 101])
+
+        self.assertEqual(
+            [call.args for call in kill.call_args_list],
+            [(100, signal.SIGTERM), (101, signal.SIGTERM)],
+        )
@@ -348,6 +348,21 @@ class User(SoftDeleteMixin, Base):
                 result = await session.scalars(stmt)
                 return result.unique().all()
 
+    @classmethod
+    async def get_existing_ids(cls, tenant, user_ids: list) -> set[uuid.UUID]:
+        """The IDs of the tenant's users in user_ids, without loading the users."""
+        async with ASYNC_PG_SESSION() as session:
+            async with session.begin():
+                stmt = select(User.id).where(
+                    and_(
+                        User.tenant == tenant,
+                        User.id.in_(user_ids),
+                        User.deleted == False,  # noqa
+                    )
+                )
+                result = await session.scalars(stmt)
+                return set(result.all())
+
     @classmethod
     async def get_by_email(cls, tenant, email, get_groups=False):
         async with ASYNC_PG_SESSION() as session:
@@ -424,6 +424,10 @@ resource "aws_dynamodb_table" "cloudumi_iamroles_multitenant_v2" {
     name = "tenant"
     type = "S"
   }
+  attribute {
+    name = "tenant_account_id"
+    type = "S"
+  }
   name         = "${var.cluster_id}_cloudumi_iamroles_multitenant_v2"
   hash_key     = "tenant"
   range_key    = "entity_id"
@@ -433,6 +437,12 @@ resource "aws_dynamodb_table" "cloudumi_iamroles_multitenant_v2" {
     hash_key        = "tenant"
     projection_type = "ALL"
   }
+  global_secondary_index {
+    name               = "tenant_account_id_index"
+    hash_key           = "tenant_account_id"
+    projection_type    = "INCLUDE"
+    non_key_attributes = ["arn"]
+  }
   stream_enabled   = true
   stream_view_type = "NEW_AND_OLD_IMAGES"
 
@@ -0,0 +1,147 @@
+"""Microbenchmarks for the hot paths behind the API endpoints covered by the load tests.
+
+Excluded from `make test`. Run with `make benchmark` to compare against the stored baseline
+and `make benchmark-baseline` to replace it. See load_tests/README.md.
+"""
+import asyncio
+import copy
+
+import pytest
+
+from common.scripts.benchmark_cache_codecs import (
+    CACHE_KEY_FORMATS,
+    generate_account_authorization_details,
+)
+from common.scripts.benchmark_noq_json import PAYLOADS
+from util.tests.fixtures.globals import tenant
+
+ROLE_COUNT = 2000
+
+
+def generate_policy_table_rows(count: int = ROLE_COUNT) -> list[dict]:
+    """Rows shaped like the policies table data filtered by the v4 roles and policies endpoints."""
+    return [
+        {
+            "arn": f"arn:aws:iam::{100000000000 + i % 20}:role/role_{i}",
+            "account_id": str(100000000000 + i % 20),
+            "account_name": f"account_{i % 20}",
+            "technology": "AWS::IAM::Role" if i % 3 else "AWS::S3::Bucket",
+            "templated": bool(i % 2),
+            "errors": i % 5,
+            "config_history_url": f"https://console.aws.amazon.com/config/{i}",
+        }
+        for i in range(count)
+    ]
+
+
+def generate_policy_statements(count: int = 50) -> list[dict]:
+    return [
+        {
+            "Sid": f"Statement{i}",
+            "Effect": "Allow",
+            "Action": [f"s3:GetObject{i % 5}", "s3:ListBucket", "S3:GetObject*"],
+            "Resource": [
+                f"arn:aws:s3:::bucket_{i % 10}",
+                f"arn:aws:s3:::bucket_{i % 10}/*",
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def run_async():
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.mark.parametrize(
+    "filter_obj",
+    [
+        {"pagination": {"currentPageIndex": 1, "pageSize": 30}},
+        {
+            "filtering": {
+                "tokens": [
+                    {"propertyKey": "account_name", "operator": ":", "value": "7"},
+                    {
+                        "propertyKey": "technology",
+                        "operator": "=",
+                        "value": "AWS::IAM::Role",
+                    },
+                ],
+                "operation": "and",
+            }
+        },
+        {
+            "filtering": {
+                "tokens": [{"propertyKey": None, "operator": ":", "value": "role_19"}],
+                "operation": "or",
+            }
+        },
+    ],
+    ids=["paginate", "property_filters", "generic_search"],
+)
+def test_filter_data(benchmark, run_async, filter_obj):
+    from common.lib.filter import filter_data
+
+    data = generate_policy_table_rows()
+    benchmark(lambda: run_async(filter_data(data, filter_obj)))
+
+
+def test_normalize_policies(benchmark, run_async):
+    from common.aws.iam.policy.utils import normalize_policies
+
+    statements = generate_policy_statements()
+    # normalize_policies updates the statements in place so every round gets a copy
+    benchmark.pedantic(
+        lambda policies: run_async(normalize_policies(policies)),
+        setup=lambda: ((copy.deepcopy(statements),), {}),
+        rounds=50,
+    )
+
+
+def test_minimize_iam_policy_statements(benchmark, run_async):
+    from common.aws.iam.policy.utils import minimize_iam_policy_statements
+
+    statements = generate_policy_statements()
+    benchmark.pedantic(
+        lambda policies: run_async(minimize_iam_policy_statements(policies)),
+        setup=lambda: ((copy.deepcopy(statements),), {}),
+        rounds=10,
+    )
+
+
+@pytest.mark.parametrize(
+    "key", ["site_name", "cloud_credential_authorization_mapping.role_tags.enabled"]
+)
+def test_get_tenant_specific_key(benchmark, key):
+    from common.config import config
+
+    benchmark(config.get_tenant_specific_key, key, tenant, None)
+
+
+@pytest.mark.parametrize("payload_name", list(PAYLOADS.keys()))
+def test_noq_json_dumps(benchmark, payload_name):
+    from common.lib.noq_json import dumps
+
+    payload = PAYLOADS[payload_name]()
+    benchmark(dumps, payload)
+
+
+@pytest.mark.parametrize("s3_key", CACHE_KEY_FORMATS)
+def test_encode_cache_object(benchmark, s3_key):
+    from common.lib.cache.codecs import encode_cache_object
+
+    data = generate_account_authorization_details(ROLE_COUNT)
+    benchmark(encode_cache_object, data, 0, s3_key)
+
+
+@pytest.mark.parametrize("s3_key", CACHE_KEY_FORMATS)
+def test_decode_cache_object(benchmark, s3_key):
+    from common.lib.cache.codecs import decode_cache_object, encode_cache_object
+
+    content = encode_cache_object(
+        generate_account_authorization_details(ROLE_COUNT), 0, s3_key
+    )
+    benchmark(decode_cache_object, content)
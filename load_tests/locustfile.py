@@ -1,29 +1,48 @@
 import asyncio
-import os
+import json
+import random
 
 from locust import FastHttpUser, run_single_user, task
 
 from common.lib.jwt import generate_jwt_token
-
-TEST_USER_NAME = "user@noq.dev"
-TEST_USER_GROUPS = ["engineering@noq.dev"]
-
-TEST_USER_DOMAIN: str = os.getenv("TEST_USER_DOMAIN")
-
-stage = os.getenv("STAGE", "staging")
-if not TEST_USER_DOMAIN:
-    if stage == "staging":
-        TEST_USER_DOMAIN = "corp.staging.noq.dev"
-    if stage == "prod":
-        TEST_USER_DOMAIN = "corp.noq.dev"
-    if stage == "dev":
-        TEST_USER_DOMAIN = "localhost"
-TEST_USER_DOMAIN_US = (
-    TEST_USER_DOMAIN.replace(".", "_").replace("https://", "").split(":")[0]
+from load_tests.settings import (
+    TEST_USER_DOMAIN,
+    TEST_USER_DOMAIN_US,
+    TEST_USER_GROUPS,
+    TEST_USER_NAME,
 )
 
+TYPEAHEAD_QUERIES = ["load", "test", "bucket", "role_1", "sqs", "sns"]
+
+
+def get_headers(token: str = None) -> dict:
+    headers = {
+        "Host": TEST_USER_DOMAIN,
+        "Accept": "application/json, text/plain, */*",
+        "Accept-Encoding": "gzip, deflate, br",
+        "Accept-Language": "en-US,en;q=0.9",
+        "Connection": "keep-alive",
+        "Referer": f"{TEST_USER_DOMAIN}/login",
+        "Sec-Fetch-Dest": "empty",
+        "Sec-Fetch-Mode": "cors",
+        "Sec-Fetch-Site": "same-origin",
+        "sec-ch-ua": '"Google Chrome";v="111", "Not(A:Brand";v="8", "Chromium";v="111"',
+        "sec-ch-ua-mobile": "?0",
+        "sec-ch-ua-platform": '"macOS"',
+        "X-Forwarded-Host": TEST_USER_DOMAIN,
+        "X-Forwarded-For": "127.0.0.1",
+    }
+    if token:
+        headers["Cookie"] = f"noq_auth={token}"
+    return headers
+
 
 class LoadTest(FastHttpUser):
+    """Exercises the most frequently called endpoints.
+
+    Run against a tenant seeded by load_tests/seed_tenant.py so every endpoint has data to return.
+    """
+
     default_headers = {
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/111.0.0.0 Safari/537.36"
     }
@@ -38,58 +57,31 @@ class LoadTest(FastHttpUser):
         )
     )
 
-    @task
-    def user_profile_auth(self):
-        resp = self.client.request(
-            "GET",
-            "/api/v2/user_profile",
-            headers={
-                "Host": TEST_USER_DOMAIN,
-                "Accept": "application/json, text/plain, */*",
-                "Accept-Encoding": "gzip, deflate, br",
-                "Accept-Language": "en-US,en;q=0.9",
-                "Connection": "keep-alive",
-                "Cookie": f"noq_auth={self.token}",
-                "Referer": f"{TEST_USER_DOMAIN}/login",
-                "Sec-Fetch-Dest": "empty",
-                "Sec-Fetch-Mode": "cors",
-                "Sec-Fetch-Site": "same-origin",
-                "sec-ch-ua": '"Google Chrome";v="111", "Not(A:Brand";v="8", "Chromium";v="111"',
-                "sec-ch-ua-mobile": "?0",
-                "sec-ch-ua-platform": '"macOS"',
-                "X-Forwarded-Host": TEST_USER_DOMAIN,
-                "X-Forwarded-For": "127.0.0.1",
-            },
-        )
+    def on_start(self):
+        self.role_arns = []
+        self.eligible_roles()
 
+    def log_error(self, resp):
         if resp.status_code != 200:
             print(TEST_USER_DOMAIN)
             print(self.host)
             print(resp.text)
             print(f"Error response: {resp.status_code}")
 
+    @task
+    def user_profile_auth(self):
+        resp = self.client.request(
+            "GET", "/api/v2/user_profile", headers=get_headers(self.token)
+        )
+        self.log_error(resp)
+
     @task
     def auth_endpoint_without_auth(self):
         # This will return a non 200 since it doesn't contain an auth cookie
         with self.client.request(
             "GET",
             "/api/v1/auth",
-            headers={
-                "Host": TEST_USER_DOMAIN,
-                "Accept": "application/json, text/plain, */*",
-                "Accept-Encoding": "gzip, deflate, br",
-                "Accept-Language": "en-US,en;q=0.9",
-                "Connection": "keep-alive",
-                "Referer": f"{TEST_USER_DOMAIN}/login",
-                "Sec-Fetch-Dest": "empty",
-                "Sec-Fetch-Mode": "cors",
-                "Sec-Fetch-Site": "same-origin",
-                "sec-ch-ua": '"Google Chrome";v="111", "Not(A:Brand";v="8", "Chromium";v="111"',
-                "sec-ch-ua-mobile": "?0",
-                "sec-ch-ua-platform": '"macOS"',
-                "X-Forwarded-Host": TEST_USER_DOMAIN,
-                "X-Forwarded-For": "127.0.0.1",
-            },
+            headers=get_headers(),
             catch_response=True,
         ) as resp:
             if resp.status_code != 200:
@@ -99,59 +91,130 @@ class LoadTest(FastHttpUser):
     def healthcheck_vanilla_tornado_handler(self):
         # This should be the fastest endpoint, because it
         # uses the native tornado.web.RequestHandler
+        resp = self.client.request("GET", "/healthcheck_vanilla", headers=get_headers())
+        self.log_error(resp)
+
+    @task
+    def healthcheck(self):
+        resp = self.client.request("GET", "/healthcheck", headers=get_headers())
+        self.log_error(resp)
+
+    @task(5)
+    def eligible_roles(self):
+        # Resolved from the credential authorization mapping
+        resp = self.client.request(
+            "GET", "/api/v2/eligible_roles", headers=get_headers(self.token)
+        )
+        self.log_error(resp)
+        if resp.status_code == 200 and not self.role_arns:
+            self.role_arns = [row["arn"] for row in resp.json().get("data", [])]
+
+    @task(5)
+    def resource_typeahead(self):
         resp = self.client.request(
             "GET",
-            "/healthcheck_vanilla",
-            headers={
-                "Host": TEST_USER_DOMAIN,
-                "Accept": "application/json, text/plain, */*",
-                "Accept-Encoding": "gzip, deflate, br",
-                "Accept-Language": "en-US,en;q=0.9",
-                "Connection": "keep-alive",
-                "Referer": f"{TEST_USER_DOMAIN}/login",
-                "Sec-Fetch-Dest": "empty",
-                "Sec-Fetch-Mode": "cors",
-                "Sec-Fetch-Site": "same-origin",
-                "sec-ch-ua": '"Google Chrome";v="111", "Not(A:Brand";v="8", "Chromium";v="111"',
-                "sec-ch-ua-mobile": "?0",
-                "sec-ch-ua-platform": '"macOS"',
-                "X-Forwarded-Host": TEST_USER_DOMAIN,
-                "X-Forwarded-For": "127.0.0.1",
+            "/api/v2/typeahead/resources",
+            params={"typeahead": random.choice(TYPEAHEAD_QUERIES), "limit": 20},
+            headers=get_headers(self.token),
+            name="/api/v2/typeahead/resources",
+        )
+        self.log_error(resp)
+
+    @task(3)
+    def role_detail(self):
+        if not self.role_arns:
+            return
+        account_id, role_name = self._split_role_arn(random.choice(self.role_arns))
+        resp = self.client.request(
+            "GET",
+            f"/api/v2/roles/{account_id}/{role_name}",
+            headers=get_headers(self.token),
+            name="/api/v2/roles/[account_id]/[role_name]",
+        )
+        self.log_error(resp)
+
+    @task(3)
+    def roles_table_filter(self):
+        resp = self.client.request(
+            "POST",
+            "/api/v4/roles",
+            json={
+                "pagination": {"currentPageIndex": 1, "pageSize": 30},
+                "filtering": {
+                    "tokens": [
+                        {
+                            "propertyKey": "arn",
+                            "operator": ":",
+                            "value": random.choice(TYPEAHEAD_QUERIES),
+                        }
+                    ],
+                    "operation": "and",
+                },
             },
+            headers=get_headers(self.token),
         )
-        if resp.status_code != 200:
-            print(TEST_USER_DOMAIN)
-            print(self.host)
-            print(resp.text)
-            print(f"Error response: {resp.status_code}")
+        self.log_error(resp)
 
-    @task
-    def healthcheck(self):
+    @task(3)
+    def policies_table_filter(self):
         resp = self.client.request(
             "GET",
-            "/healthcheck",
-            headers={
-                "Host": TEST_USER_DOMAIN,
-                "Accept": "application/json, text/plain, */*",
-                "Accept-Encoding": "gzip, deflate, br",
-                "Accept-Language": "en-US,en;q=0.9",
-                "Connection": "keep-alive",
-                "Referer": f"{TEST_USER_DOMAIN}/login",
-                "Sec-Fetch-Dest": "empty",
-                "Sec-Fetch-Mode": "cors",
-                "Sec-Fetch-Site": "same-origin",
-                "sec-ch-ua": '"Google Chrome";v="111", "Not(A:Brand";v="8", "Chromium";v="111"',
-                "sec-ch-ua-mobile": "?0",
-                "sec-ch-ua-platform": '"macOS"',
-                "X-Forwarded-Host": TEST_USER_DOMAIN,
-                "X-Forwarded-For": "127.0.0.1",
+            "/api/v2/policies",
+            params={
+                "filters": json.dumps({"arn": random.choice(TYPEAHEAD_QUERIES)}),
+                "limit": 100,
             },
+            headers=get_headers(self.token),
+            name="/api/v2/policies",
         )
-        if resp.status_code != 200:
-            print(TEST_USER_DOMAIN)
-            print(self.host)
-            print(resp.text)
-            print(f"Error response: {resp.status_code}")
+        self.log_error(resp)
+
+    @task
+    def create_request(self):
+        if not self.role_arns:
+            return
+        # A dry run builds and validates the request without storing it
+        resp = self.client.request(
+            "POST",
+            "/api/v2/request",
+            json={
+                "justification": "Load test",
+                "dry_run": True,
+                "changes": {
+                    "changes": [
+                        {
+                            "principal": {
+                                "principal_type": "AwsResource",
+                                "principal_arn": random.choice(self.role_arns),
+                            },
+                            "change_type": "inline_policy",
+                            "action": "attach",
+                            "new": True,
+                            "policy": {
+                                "policy_document": {
+                                    "Version": "2012-10-17",
+                                    "Statement": [
+                                        {
+                                            "Effect": "Allow",
+                                            "Action": ["s3:GetObject"],
+                                            "Resource": [
+                                                "arn:aws:s3:::load-test-bucket-0/*"
+                                            ],
+                                        }
+                                    ],
+                                }
+                            },
+                        }
+                    ]
+                },
+            },
+            headers=get_headers(self.token),
+        )
+        self.log_error(resp)
+
+    @staticmethod
+    def _split_role_arn(arn: str) -> tuple[str, str]:
+        return arn.split(":")[4], arn.split("/")[-1]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,171 @@
+"""Seeds a local tenant with fake AWS resources for the load tests.
+
+Writes directly to the local development stack, no AWS account is needed:
+    - IAM roles in DynamoDB, tagged so the load test user's group is authorized to use them
+    - S3, SQS and SNS ARNs in the AWS Config resource cache used by the typeahead endpoints
+    - The credential authorization mapping and policies table caches, built by their celery tasks
+
+The tenant, its spoke accounts and the load test user must already exist.
+Run common/scripts/initialize_dynamodb.py and common/scripts/initialize_postgres.py first.
+
+Usage:
+    CONFIG_LOCATION=... python -m load_tests.seed_tenant --tenant localhost --roles-per-account 500
+"""
+import argparse
+import asyncio
+import time
+
+import common.lib.noq_json as json
+from common.aws.iam.role.models import IAMRole
+from common.config import config
+from common.lib.account_indexers import get_account_id_to_name_mapping
+from common.lib.aws.typeahead_cache import cache_aws_resource_details
+from common.lib.redis import RedisHandler
+from load_tests.settings import TEST_USER_GROUPS
+
+RESOURCE_TYPES = ["s3", "sqs", "sns"]
+
+
+def generate_role_details(tenant: str, account_id: str, role_count: int) -> list[dict]:
+    """Roles shaped like the RoleDetailList of get_account_authorization_details."""
+    authorized_groups_tag = next(
+        iter(
+            config.get_tenant_specific_key(
+                "cloud_credential_authorization_mapping.role_tags.authorized_groups_tags",
+                tenant,
+                ["noq-authorized"],
+            )
+        ),
+        "noq-authorized",
+    )
+    return [
+        {
+            "Path": "/",
+            "RoleName": f"load_test_role_{i}",
+            "RoleId": f"AROALOADTEST{account_id}{i}",
+            "Arn": f"arn:aws:iam::{account_id}:role/load_test_role_{i}",
+            "CreateDate": "2023-01-01T00:00:00Z",
+            "AssumeRolePolicyDocument": {
+                "Version": "2012-10-17",
+                "Statement": [
+                    {
+                        "Effect": "Allow",
+                        "Principal": {"Service": "ec2.amazonaws.com"},
+                        "Action": "sts:AssumeRole",
+                    }
+                ],
+            },
+            "InstanceProfileList": [],
+            "RolePolicyList": [
+                {
+                    "PolicyName": f"load_test_policy_{i}",
+                    "PolicyDocument": {
+                        "Version": "2012-10-17",
+                        "Statement": [
+                            {
+                                "Effect": "Allow",
+                                "Action": ["s3:GetObject", "s3:ListBucket"],
+                                "Resource": [
+                                    f"arn:aws:s3:::load-test-bucket-{i % 50}",
+                                    f"arn:aws:s3:::load-test-bucket-{i % 50}/*",
+                                ],
+                            }
+                        ],
+                    },
+                }
+            ],
+            "AttachedManagedPolicies": [],
+            "Tags": [
+                {
+                    "Key": authorized_groups_tag,
+                    "Value": ":".join(TEST_USER_GROUPS),
+                },
+                {"Key": "owner", "Value": f"team_{i % 10}@noq.dev"},
+            ],
+            "RoleLastUsed": {},
+        }
+        for i in range(role_count)
+    ]
+
+
+def generate_resources(
+    tenant: str, account_id: str, resource_count: int, ttl: int
+) -> dict[str, str]:
+    """Resources shaped like the AWS Config resource cache, keyed by ARN."""
+    resources = {}
+    for i in range(resource_count):
+        resource_type = RESOURCE_TYPES[i % len(RESOURCE_TYPES)]
+        if resource_type == "s3":
+            arn = f"arn:aws:s3:::load-test-bucket-{account_id}-{i}"
+        else:
+            arn = f"arn:aws:{resource_type}:us-east-1:{account_id}:load-test-{resource_type}-{i}"
+        resources[arn] = json.dumps(
+            {
+                "arn": arn,
+                "accountId": account_id,
+                "awsRegion": "us-east-1",
+                "resourceType": resource_type,
+                "resourceId": arn.split(":")[-1],
+                "tenant": tenant,
+                "ttl": ttl,
+                "entity_id": arn,
+            }
+        )
+    return resources
+
+
+async def seed_tenant(tenant: str, roles_per_account: int, resources_per_account: int):
+    accounts = await get_account_id_to_name_mapping(tenant)
+    if not accounts:
+        raise Exception(
+            f"No spoke accounts are configured for {tenant}. Add them to the tenant config before seeding."
+        )
+
+    red = await RedisHandler().redis(tenant)
+    resource_redis_cache_key = config.get_tenant_specific_key(
+        "aws_config_cache.redis_key",
+        tenant,
+        f"{tenant}_AWSCONFIG_RESOURCE_CACHE",
+    )
+    ttl = int(time.time()) + 86400
+
+    for account_id in accounts.keys():
+        start = time.time()
+        role_details = generate_role_details(tenant, account_id, roles_per_account)
+        await IAMRole.sync_account_roles(tenant, account_id, role_details)
+
+        resources = generate_resources(tenant, account_id, resources_per_account, ttl)
+        red.hset(resource_redis_cache_key, mapping=resources)
+        cache_aws_resource_details({role["Arn"]: role for role in role_details}, tenant)
+        print(
+            f"Seeded account {account_id}: {len(role_details)} roles, "
+            f"{len(resources)} resources in {time.time() - start:.2f} seconds"
+        )
+
+
+def build_tenant_caches(tenant: str):
+    """Run the cache tasks in this process to build the caches from the seeded data."""
+    from common.celery_tasks.celery_tasks import (
+        cache_credential_authorization_mapping,
+        cache_policies_table_details,
+    )
+
+    cache_credential_authorization_mapping(tenant)
+    cache_policies_table_details(tenant)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Seed a local tenant with fake AWS data for the load tests"
+    )
+    parser.add_argument("--tenant", default="localhost")
+    parser.add_argument("--roles-per-account", type=int, default=500)
+    parser.add_argument("--resources-per-account", type=int, default=1000)
+    args = parser.parse_args()
+
+    asyncio.run(
+        seed_tenant(args.tenant, args.roles_per_account, args.resources_per_account)
+    )
+    # The tasks use async_to_sync so they can't run inside the event loop
+    build_tenant_caches(args.tenant)
+    print(f"Finished seeding {args.tenant}")
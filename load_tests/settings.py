@@ -0,0 +1,18 @@
+import os
+
+TEST_USER_NAME = "user@noq.dev"
+TEST_USER_GROUPS = ["engineering@noq.dev"]
+
+TEST_USER_DOMAIN: str = os.getenv("TEST_USER_DOMAIN")
+
+stage = os.getenv("STAGE", "staging")
+if not TEST_USER_DOMAIN:
+    if stage == "staging":
+        TEST_USER_DOMAIN = "corp.staging.noq.dev"
+    if stage == "prod":
+        TEST_USER_DOMAIN = "corp.noq.dev"
+    if stage == "dev":
+        TEST_USER_DOMAIN = "localhost"
+TEST_USER_DOMAIN_US = (
+    TEST_USER_DOMAIN.replace(".", "_").replace("https://", "").split(":")[0]
+)
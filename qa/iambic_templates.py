@@ -1,7 +1,9 @@
 import json
+import time
+import uuid
 from datetime import datetime, timedelta
 
-from sqlalchemy import select, update
+from sqlalchemy import delete, select, update
 
 from common.config.globals import ASYNC_PG_SESSION
 from common.iambic.templates.models import (
@@ -10,10 +12,12 @@ from common.iambic.templates.models import (
     IambicTemplateProviderDefinition,
 )
 from common.iambic.templates.tasks import (
+    TEMPLATE_CONTENT_COPY_COLUMNS,
+    TEMPLATE_COPY_COLUMNS,
     rollback_full_create,
     sync_tenant_templates_and_definitions,
 )
-from common.pg_core.utils import bulk_delete
+from common.pg_core.utils import bulk_add, bulk_copy, bulk_delete
 from qa import TENANT_SUMMARY
 from qa.utils import generic_api_get_request
 
@@ -36,6 +40,10 @@ await sync_test_tenant_templates()
 
 # Attempt to get all IAM role templates from the API
 list_templates_api_request("NOQ::AWS::IAM::Role")
+
+# Compare the ORM and COPY bulk load paths
+from qa.iambic_templates import benchmark_template_bulk_load
+await benchmark_template_bulk_load(5000)
 """
 
 
@@ -129,3 +137,130 @@ def list_templates_api_request(
     response = response.json()
     print(json.dumps(response, indent=2))
     return response
+
+
+def _benchmark_template_content(resource_id: str) -> dict:
+    return {
+        "template_type": "NOQ::AWS::IAM::Role",
+        "identifier": resource_id,
+        "properties": {
+            "role_name": resource_id,
+            "description": "Benchmark role " * 10,
+            "inline_policies": [
+                {
+                    "policy_name": f"policy_{i}",
+                    "statement": [
+                        {
+                            "effect": "Allow",
+                            "action": [f"s3:GetObject{n}" for n in range(25)],
+                            "resource": [f"arn:aws:s3:::{resource_id}-{i}/*"],
+                        }
+                    ],
+                }
+                for i in range(5)
+            ],
+        },
+    }
+
+
+async def _remove_benchmark_templates(repo_name: str):
+    tenant_id = TENANT_SUMMARY.tenant.id
+    template_ids = select(IambicTemplate.id).where(
+        IambicTemplate.tenant_id == tenant_id, IambicTemplate.repo_name == repo_name
+    )
+    async with ASYNC_PG_SESSION() as session:
+        async with session.begin():
+            await session.execute(
+                delete(IambicTemplateContent).where(
+                    IambicTemplateContent.iambic_template_id.in_(template_ids)
+                )
+            )
+            await session.execute(
+                delete(IambicTemplate).where(
+                    IambicTemplate.tenant_id == tenant_id,
+                    IambicTemplate.repo_name == repo_name,
+                )
+            )
+
+
+async def benchmark_template_bulk_load(template_count: int = 1000) -> dict:
+    """Compares loading templates and their content using the ORM with bulk_add vs COPY with bulk_copy.
+
+    Synthetic templates are written to a throwaway repo name and removed after each run.
+    """
+    tenant = TENANT_SUMMARY.tenant
+    repo_name = f"benchmark-{uuid.uuid4()}"
+    resource_ids = [f"benchmark_role_{i}" for i in range(template_count)]
+    results = {}
+
+    start = time.perf_counter()
+    templates = []
+    contents = []
+    for resource_id in resource_ids:
+        template = IambicTemplate(
+            tenant=tenant,
+            repo_name=repo_name,
+            file_path=f"resources/aws/{resource_id}.yaml",
+            template_type="NOQ::AWS::IAM::Role",
+            provider="aws",
+            resource_type="role",
+            resource_id=resource_id,
+            friendly_name=resource_id,
+        )
+        templates.append(template)
+        contents.append(
+            IambicTemplateContent(
+                tenant=tenant,
+                iambic_template=template,
+                content=_benchmark_template_content(resource_id),
+            )
+        )
+    await bulk_add(templates)
+    await bulk_add(contents)
+    results["orm_seconds"] = time.perf_counter() - start
+    await _remove_benchmark_templates(repo_name)
+
+    start = time.perf_counter()
+    template_rows = []
+    content_rows = []
+    for resource_id in resource_ids:
+        template_id = uuid.uuid4()
+        template_rows.append(
+            (
+                template_id,
+                tenant.id,
+                repo_name,
+                f"resources/aws/{resource_id}.yaml",
+                "NOQ::AWS::IAM::Role",
+                "aws",
+                "role",
+                resource_id,
+                resource_id,
+            )
+        )
+        content_rows.append(
+            (
+                uuid.uuid4(),
+                tenant.id,
+                template_id,
+                json.dumps(_benchmark_template_content(resource_id)),
+            )
+        )
+    async with ASYNC_PG_SESSION() as session:
+        async with session.begin():
+            await bulk_copy(
+                IambicTemplate, TEMPLATE_COPY_COLUMNS, template_rows, session
+            )
+            await bulk_copy(
+                IambicTemplateContent,
+                TEMPLATE_CONTENT_COPY_COLUMNS,
+                content_rows,
+                session,
+            )
+    results["copy_seconds"] = time.perf_counter() - start
+    await _remove_benchmark_templates(repo_name)
+
+    results["template_count"] = template_count
+    results["speedup"] = results["orm_seconds"] / results["copy_seconds"]
+    print(json.dumps(results, indent=2))
+    return results
@@ -474,12 +474,29 @@ def iamrole_table(dynamodb):
         AttributeDefinitions=[
             {"AttributeName": "tenant", "AttributeType": "S"},
             {"AttributeName": "entity_id", "AttributeType": "S"},
+            {"AttributeName": "tenant_account_id", "AttributeType": "S"},
         ],
         KeySchema=[
             {"AttributeName": "tenant", "KeyType": "HASH"},
             {"AttributeName": "entity_id", "KeyType": "RANGE"},
         ],
         ProvisionedThroughput={"ReadCapacityUnits": 1000, "WriteCapacityUnits": 1000},
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": "tenant_account_id_index",
+                "KeySchema": [
+                    {"AttributeName": "tenant_account_id", "KeyType": "HASH"},
+                ],
+                "Projection": {
+                    "ProjectionType": "INCLUDE",
+                    "NonKeyAttributes": ["arn"],
+                },
+                "ProvisionedThroughput": {
+                    "ReadCapacityUnits": 1000,
+                    "WriteCapacityUnits": 1000,
+                },
+            }
+        ],
     )
 
     yield dynamodb